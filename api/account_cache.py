@@ -0,0 +1,81 @@
+import threading
+import time
+from api.oanda_api import OandaApi
+
+
+class AccountCache:
+    """Short-lived cache of open trades and prices in front of an OandaApi.
+
+    It has the same interface as OandaApi (other calls pass straight
+    through), so it can be handed to place_trade / get_trade_units.
+    Open trades are dropped after place_trade and close_trade; prices
+    are dropped with invalidate_prices before sizing an order.
+    """
+
+    OPEN_TRADES_TTL = 2.0
+    PRICES_TTL = 5.0
+
+    def __init__(self, api: OandaApi, open_trades_ttl=OPEN_TRADES_TTL, prices_ttl=PRICES_TTL,
+                 clock=time.monotonic):
+        self.api = api
+        self.open_trades_ttl = open_trades_ttl
+        self.prices_ttl = prices_ttl
+        self.clock = clock
+        self.open_trades = None
+        self.open_trades_time = 0.0
+        self.prices = {}
+        # held while fetching so concurrent callers wait for one request
+        self.trades_lock = threading.Lock()
+        self.prices_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # only called for names not found normally; api itself is missing
+        # while copy / pickle rebuild the object before __dict__ is restored
+        if name == 'api' or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.api, name)
+
+    def get_open_trades(self):
+        with self.trades_lock:
+            now = self.clock()
+            if self.open_trades is None or now - self.open_trades_time > self.open_trades_ttl:
+                open_trades = self.api.get_open_trades()
+                if open_trades is None:
+                    return None
+                self.open_trades = open_trades
+                self.open_trades_time = now
+            return list(self.open_trades)
+
+    def get_prices(self, instruments_list):
+        with self.prices_lock:
+            now = self.clock()
+            missing = [i for i in instruments_list if i not in self.prices
+                       or now - self.prices[i][0] > self.prices_ttl]
+            if missing:
+                prices = self.api.get_prices(missing)
+                if prices is not None:
+                    for p in prices:
+                        self.prices[p.instrument] = (now, p)
+            found = [self.prices[i][1] for i in instruments_list
+                     if i in self.prices and now - self.prices[i][0] <= self.prices_ttl]
+            return found if found else None
+
+    def invalidate(self):
+        with self.trades_lock:
+            self.open_trades = None
+
+    def invalidate_prices(self, instruments_list):
+        # the next get_prices for these is a new request whatever their age
+        with self.prices_lock:
+            for i in instruments_list:
+                self.prices.pop(i, None)
+
+    def place_trade(self, *args, **kwargs):
+        trade_id = self.api.place_trade(*args, **kwargs)
+        self.invalidate()
+        return trade_id
+
+    def close_trade(self, trade_id):
+        ok = self.api.close_trade(trade_id)
+        self.invalidate()
+        return ok
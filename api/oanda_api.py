@@ -1,29 +1,117 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import json
 import constants.defs as defs
 from infrastructure.log_wrapper import LogWrapper
-from dateutil import parser
+from infrastructure.rate_limiter import RateLimiter, rateLimiter, endpoint_class, ORDERS
 from datetime import datetime as dt
 from infrastructure.instrument_collection import instrumentCollection as InstrumentCollection
 from models.api_price import ApiPrice
 from models.open_trade import OpenTrade
 
+PRICES = ['mid', 'bid', 'ask']
+OHLC = ['o', 'h', 'l', 'c']
+
+
+def candles_to_dataframe(data):
+    # Columnar parse: flat lists go through one numpy/pandas conversion each
+    # instead of building a dict and parsing a datetime per candle.
+    prices = [p for p in PRICES if p in data[0]]
+    complete = np.array([candle['complete'] for candle in data], dtype=bool)
+
+    times = pd.to_datetime([candle['time'] for candle in data],
+                           utc=True, format='ISO8601')
+    volume = np.array([candle['volume'] for candle in data], dtype=np.int64)
+    values = np.array([candle[p][o] for candle in data for p in prices for o in OHLC],
+                      dtype=np.float64).reshape(len(data), len(prices) * len(OHLC))
+
+    columns = {'time': times[complete], 'volume': volume[complete]}
+    for i, name in enumerate(f"{p}_{o}" for p in prices for o in OHLC):
+        columns[name] = values[complete, i]
+    return pd.DataFrame(columns)
+
+
+def candle_params(count, granularity, price, date_from, date_to):
+    params = dict(
+        granularity=granularity,
+        price=price
+    )
+
+    if date_from is not None and date_to is not None:
+        date_format = "%Y-%m-%dT%H:%M:%SZ"
+        params["from"] = dt.strftime(date_from, date_format)
+        params["to"] = dt.strftime(date_to, date_format)
+    else:
+        params["count"] = count
+    return params
+
+
+def candle_job_kwargs(job):
+    """(pair, granularity, count or (date_from, date_to)) -> pair, kwargs
+    for get_candles_dataframe."""
+    pair_name, granularity, candle_range = job
+    kwargs = dict(granularity=granularity)
+    if isinstance(candle_range, tuple):
+        kwargs['date_from'], kwargs['date_to'] = candle_range
+    else:
+        kwargs['count'] = candle_range
+    return pair_name, kwargs
+
+
+def order_data(pair_name, units, direction, stop_loss=None, take_profit=None):
+    instrument = InstrumentCollection.instruments_dict[pair_name]
+    units = round(units, instrument.tradeUnitsPrecision)
+
+    if direction == defs.SELL:
+        units *= -1
+
+    data = dict(
+        order=dict(
+            units=str(units),
+            instrument=pair_name,
+            type="MARKET"
+        )
+    )
+
+    if stop_loss is not None:
+        sld = dict(price=str(round(stop_loss, instrument.displayPrecision)))
+        data['order']['stopLossOnFill'] = sld
+
+    if take_profit is not None:
+        tpd = dict(
+            price=str(round(take_profit, instrument.displayPrecision)))
+        data['order']['takeProfitOnFill'] = tpd
+
+    return data
+
 
 class OandaApi:
 
-    def __init__(self):
+    MAX_WORKERS = 8
+
+    def __init__(self, limiter: RateLimiter = None, base_url=defs.OANDA_URL):
+        self.base_url = base_url
         self.session = requests.Session()
         self.session.headers.update(defs.SECURE_HEADER)
+        self.session.mount("https://", requests.adapters.HTTPAdapter(
+            pool_maxsize=OandaApi.MAX_WORKERS))
         self.log = LogWrapper("OandaApi")
+        self.limiter = limiter if limiter else rateLimiter
 
     def make_request(self, url, verb='get', expected_status=200, params=None, data=None, headers=None):
-        full_url = f"{defs.OANDA_URL}/{url}"
+        full_url = f"{self.base_url}/{url}"
 
         if data is not None:
             data = json.dumps(data)
 
         try:
+            endpoint = endpoint_class(url)
+            waited = self.limiter.acquire(endpoint, priority=endpoint == ORDERS)
+            if waited > 0:
+                self.log.logger.debug(
+                    f"rate limit {endpoint} waited {waited:.3f}s")
             self.log.logger.debug(f"{full_url} {verb} {params} {data}")
             response = None
             if verb == "get":
@@ -66,17 +154,7 @@ class OandaApi:
 
     def fetch_candles(self, pair_name, count=10, granularity="H1", price="MBA", date_from=None, date_to=None):
         url = f"instruments/{pair_name}/candles"
-        params = dict(
-            granularity=granularity,
-            price=price
-        )
-
-        if date_from is not None and date_to is not None:
-            date_format = "%Y-%m-%dT%H:%M:%SZ"
-            params["from"] = dt.strftime(date_from, date_format)
-            params["to"] = dt.strftime(date_to, date_format)
-        else:
-            params["count"] = count
+        params = candle_params(count, granularity, price, date_from, date_to)
 
         ok, data = self.make_request(url, params=params)
 
@@ -94,28 +172,33 @@ class OandaApi:
         if not data:
             return pd.DataFrame()
 
-        prices = ['mid', 'bid', 'ask']
-        ohlc = ['o', 'h', 'l', 'c']
-
-        final_data = []
-        for candle in data:
-            if candle['complete'] is False:
-                continue
-            new_dict = {}
-            new_dict['time'] = parser.parse(candle['time'])
-            new_dict['volume'] = candle['volume']
-            for p in prices:
-                if p in candle:
-                    for o in ohlc:
-                        new_dict[f"{p}_{o}"] = float(candle[p][o])
-            final_data.append(new_dict)
-        dataframe = pd.DataFrame.from_dict(final_data)
-        return dataframe
-
-    def last_complete_candle(self, pair_name, granularity):
+        return candles_to_dataframe(data)
+
+    def fetch_candles_job(self, job, attempts=3):
+        pair_name, kwargs = candle_job_kwargs(job)
+        for _ in range(attempts):
+            dataframe = self.get_candles_dataframe(pair_name, **kwargs)
+            if dataframe is not None:
+                return dataframe
+        self.log.logger.error(f"fetch_candles_job failed {job}")
+        return None
+
+    def fetch_candles_many(self, jobs, attempts=3, max_workers=MAX_WORKERS):
+        """Fetches (pair, granularity, count or (date_from, date_to)) jobs
+        concurrently over the shared session. Returns {job: DataFrame}, with
+        None for jobs that failed every attempt."""
+        jobs = list(jobs)
+        if not jobs:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+            results = executor.map(
+                lambda job: self.fetch_candles_job(job, attempts), jobs)
+            return dict(zip(jobs, results))
+
+    def last_complete_candle(self, pair_name, granularity, count=10):
         dataframe = self.get_candles_dataframe(
-            pair_name, granularity=granularity, count=10)
-        if dataframe.shape[0] == 0:
+            pair_name, granularity=granularity, count=count)
+        if dataframe is None or dataframe.shape[0] == 0:
             return None
         return dataframe.iloc[-1].time
 
@@ -136,29 +219,7 @@ class OandaApi:
                     stop_loss: float = None, take_profit: float = None):
 
         url = f"accounts/{defs.ACCOUNT_ID}/orders"
-
-        instrument = InstrumentCollection.instruments_dict[pair_name]
-        units = round(units, instrument.tradeUnitsPrecision)
-
-        if direction == defs.SELL:
-            units *= -1
-
-        data = dict(
-            order=dict(
-                units=str(units),
-                instrument=pair_name,
-                type="MARKET"
-            )
-        )
-
-        if stop_loss is not None:
-            sld = dict(price=str(round(stop_loss, instrument.displayPrecision)))
-            data['order']['stopLossOnFill'] = sld
-
-        if take_profit is not None:
-            tpd = dict(
-                price=str(round(take_profit, instrument.displayPrecision)))
-            data['order']['takeProfitOnFill'] = tpd
+        data = order_data(pair_name, units, direction, stop_loss, take_profit)
 
         ok, response = self.make_request(
             url, verb="post", data=data, expected_status=201)
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import aiohttp
+import pandas as pd
+import constants.defs as defs
+from infrastructure.log_wrapper import LogWrapper
+from infrastructure.rate_limiter import RateLimiter, rateLimiter, endpoint_class, ORDERS
+from api.oanda_api import candles_to_dataframe, candle_params, candle_job_kwargs, order_data
+from models.api_price import ApiPrice
+from models.open_trade import OpenTrade
+
+
+class AsyncOandaApi:
+    """asyncio counterpart of OandaApi with the same (ok, data) contract.
+
+    One aiohttp session (and connection pool) is shared by every call and
+    at most max_concurrent requests are in flight at once. base_url lets
+    it run against a local mock server.
+
+    Usage:
+        async with AsyncOandaApi() as api:
+            results = await asyncio.gather(
+                *[api.get_candles_dataframe(p, count=100) for p in pairs])
+    """
+
+    MAX_CONCURRENT = 10
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, base_url=defs.OANDA_URL, headers=defs.SECURE_HEADER,
+                 limiter: RateLimiter = None):
+        self.max_concurrent = max_concurrent
+        self.limiter = limiter if limiter else rateLimiter
+        self.base_url = base_url
+        self.headers = headers
+        self.session = None
+        self.semaphore = None
+        self.log = LogWrapper("AsyncOandaApi")
+
+    async def open(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrent)
+            self.session = aiohttp.ClientSession(
+                headers=self.headers, connector=connector)
+            self.semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def acquire(self, endpoint):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        waited = 0.0
+        while True:
+            wait = self.limiter.try_acquire(
+                endpoint, priority=endpoint == ORDERS)
+            if wait == 0.0:
+                break
+            await asyncio.sleep(wait)
+            waited = loop.time() - start
+        self.limiter.record(endpoint, waited)
+        if waited > 0:
+            self.log.logger.debug(f"rate limit {endpoint} waited {waited:.3f}s")
+
+    async def make_request(self, url, verb='get', expected_status=200, params=None, data=None, headers=None):
+        full_url = f"{self.base_url}/{url}"
+
+        if data is not None:
+            data = json.dumps(data)
+
+        if params is not None:
+            # aiohttp only takes str/int/float query values, requests str()s them
+            params = {k: str(v) for k, v in params.items()}
+
+        try:
+            await self.open()
+            await self.acquire(endpoint_class(url))
+            self.log.logger.debug(f"{full_url} {verb} {params} {data}")
+            async with self.semaphore:
+                async with self.session.request(verb.upper(), full_url, params=params,
+                                                data=data, headers=headers) as response:
+                    self.log.logger.debug(f"response:{response.status}")
+                    body = await response.json(content_type=None)
+                    return response.status == expected_status, body
+
+        except Exception as error:
+            return False, {'Exception': error}
+
+    async def fetch_candles(self, pair_name, count=10, granularity="H1", price="MBA", date_from=None, date_to=None):
+        url = f"instruments/{pair_name}/candles"
+        params = candle_params(count, granularity, price, date_from, date_to)
+
+        ok, data = await self.make_request(url, params=params)
+
+        if ok and 'candles' in data:
+            return data['candles']
+        else:
+            print("ERROR fetch_candles()", params, data)
+            return None
+
+    async def get_candles_dataframe(self, pair_name, **kwargs):
+        data = await self.fetch_candles(pair_name, **kwargs)
+
+        if data is None:
+            return None
+        if not data:
+            return pd.DataFrame()
+
+        return candles_to_dataframe(data)
+
+    async def fetch_candles_job(self, job, attempts=3):
+        pair_name, kwargs = candle_job_kwargs(job)
+        for _ in range(attempts):
+            dataframe = await self.get_candles_dataframe(pair_name, **kwargs)
+            if dataframe is not None:
+                return dataframe
+        self.log.logger.error(f"fetch_candles_job failed {job}")
+        return None
+
+    async def fetch_candles_many(self, jobs, attempts=3):
+        """Same as OandaApi.fetch_candles_many: {job: DataFrame}, with None
+        for jobs that failed every attempt. Concurrency is max_concurrent."""
+        jobs = list(jobs)
+        results = await asyncio.gather(*[self.fetch_candles_job(job, attempts) for job in jobs])
+        return dict(zip(jobs, results))
+
+    async def place_trade(self, pair_name: str, units: float, direction: int,
+                          stop_loss: float = None, take_profit: float = None):
+
+        url = f"accounts/{defs.ACCOUNT_ID}/orders"
+        data = order_data(pair_name, units, direction, stop_loss, take_profit)
+
+        ok, response = await self.make_request(
+            url, verb="post", data=data, expected_status=201)
+
+        if ok and 'orderFillTransaction' in response:
+            return response['orderFillTransaction']['id']
+        else:
+            return None
+
+    async def close_trade(self, trade_id):
+        url = f"accounts/{defs.ACCOUNT_ID}/trades/{trade_id}/close"
+        ok, _ = await self.make_request(url, verb="put", expected_status=200)
+
+        if ok:
+            print(f"Closed {trade_id} successfully")
+        else:
+            print(f"Failed to close {trade_id}")
+
+        return ok
+
+    async def get_open_trades(self):
+        url = f"accounts/{defs.ACCOUNT_ID}/openTrades"
+        ok, response = await self.make_request(url)
+
+        if ok and 'trades' in response:
+            return [OpenTrade(x) for x in response['trades']]
+
+    async def get_prices(self, instruments_list):
+        url = f"accounts/{defs.ACCOUNT_ID}/pricing"
+
+        params = dict(
+            instruments=','.join(instruments_list),
+            includeHomeConversions=True
+        )
+
+        ok, response = await self.make_request(url, params=params)
+
+        if ok and 'prices' in response and 'homeConversions' in response:
+            return [ApiPrice(x, response['homeConversions']) for x in response['prices']]
+
+        return None
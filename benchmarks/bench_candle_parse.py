@@ -0,0 +1,68 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+from dateutil import parser
+from timeit import default_timer as timer
+
+from api.oanda_api import candles_to_dataframe
+
+# python -m benchmarks.bench_candle_parse
+
+CANDLES = 3000
+PAGES = 20
+
+
+def make_candles(count):
+    rng = np.random.default_rng(7)
+    start = dt.datetime(2023, 1, 2)
+    candles = []
+    for i in range(count):
+        price = 1.1 + rng.normal(0, 0.001)
+        candle = dict(
+            complete=i < count - 1,
+            volume=int(rng.integers(1, 500)),
+            time=(start + dt.timedelta(minutes=5 * i)
+                  ).strftime("%Y-%m-%dT%H:%M:%S.000000000Z")
+        )
+        for j, p in enumerate(['mid', 'bid', 'ask']):
+            offset = (j - 1) * 0.0001
+            candle[p] = {o: f"{price + offset + k * 0.0002:.5f}" for k, o in enumerate('ohlc')}
+        candles.append(candle)
+    return candles
+
+
+def legacy_parse(data):
+    final_data = []
+    for candle in data:
+        if candle['complete'] is False:
+            continue
+        new_dict = {}
+        new_dict['time'] = parser.parse(candle['time'])
+        new_dict['volume'] = candle['volume']
+        for p in ['mid', 'bid', 'ask']:
+            if p in candle:
+                for o in ['o', 'h', 'l', 'c']:
+                    new_dict[f"{p}_{o}"] = float(candle[p][o])
+        final_data.append(new_dict)
+    return pd.DataFrame.from_dict(final_data)
+
+
+data = make_candles(CANDLES)
+print(f"{PAGES} pages of {CANDLES} candles")
+
+start = timer()
+for _ in range(PAGES):
+    df_legacy = legacy_parse(data)
+t_legacy = timer() - start
+print(f"per-candle parse -> {t_legacy:.4f}s")
+
+start = timer()
+for _ in range(PAGES):
+    df_fast = candles_to_dataframe(data)
+t_fast = timer() - start
+print(f"columnar parse   -> {t_fast:.4f}s ({t_legacy / t_fast:.0f}x)")
+
+assert list(df_legacy.columns) == list(df_fast.columns)
+assert (df_legacy.time == df_fast.time).all()
+assert df_legacy.drop(columns='time').equals(df_fast.drop(columns='time'))
+print(f"{df_fast.shape[0]} complete candles identical")
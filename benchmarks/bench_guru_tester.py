@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from timeit import default_timer as timer
+
+from simulation.guru_tester import GuruTester, BUY, SELL, NONE
+
+# python -m benchmarks.bench_guru_tester
+# GuruTester.run_test_loop (iterrows over every M5 row) vs run_test
+# (simulation/trade_resolution.py) on the same signals.
+
+LOOP_ROWS = 60_000
+ROWS = 750_000
+
+
+def make_m5(rows, seed):
+    rng = np.random.default_rng(seed)
+    mid_c = np.round(1.1 * np.exp(np.cumsum(rng.normal(0, 3e-4, rows))), 5)
+    mid_o = np.r_[mid_c[0], mid_c[:-1]]
+    df = pd.DataFrame(dict(
+        time=pd.date_range("2014-01-06", periods=rows, freq="5min", tz="UTC"),
+        mid_o=mid_o,
+        mid_h=np.round(np.maximum(mid_o, mid_c) + rng.uniform(0, 3e-4, rows), 5),
+        mid_l=np.round(np.minimum(mid_o, mid_c) - rng.uniform(0, 3e-4, rows), 5),
+        mid_c=mid_c
+    ))
+    for side, offset in [('bid', -1e-5), ('ask', 1e-5)]:
+        for o in 'ohlc':
+            df[f"{side}_{o}"] = np.round(df[f"mid_{o}"] + offset, 5)
+    return df
+
+
+def make_hourly(df_m5, seed):
+    grouped = df_m5.groupby(df_m5.time.dt.floor("1h"))
+    df = pd.DataFrame({'time': grouped.time.first()})
+    for side in ['mid', 'bid', 'ask']:
+        df[f"{side}_o"] = grouped[f"{side}_o"].first()
+        df[f"{side}_h"] = grouped[f"{side}_h"].max()
+        df[f"{side}_l"] = grouped[f"{side}_l"].min()
+        df[f"{side}_c"] = grouped[f"{side}_c"].last()
+    df.reset_index(drop=True, inplace=True)
+    df['direction'] = np.random.default_rng(seed).choice([BUY, SELL, NONE, NONE], df.shape[0])
+    return df
+
+
+def apply_signal(row):
+    return row.direction
+
+
+def tester(rows, seed=23):
+    df_m5 = make_m5(rows, seed)
+    return GuruTester(make_hourly(df_m5, seed), apply_signal, df_m5)
+
+
+gt = tester(LOOP_ROWS)
+start = timer()
+gt.run_test_loop()
+t_loop = timer() - start
+df_loop = gt.df_results
+print(f"{LOOP_ROWS} M5 rows, loop   -> {t_loop:.4f}s {df_loop.shape[0]} trades")
+
+start = timer()
+gt.run_test()
+t_fast = timer() - start
+df_fast = gt.df_results
+print(f"{LOOP_ROWS} M5 rows, arrays -> {t_fast:.4f}s ({t_loop / t_fast:.0f}x)")
+
+assert list(df_loop.columns) == list(df_fast.columns)
+for c in df_loop.columns:
+    if c.endswith('time'):
+        assert (pd.to_datetime(df_loop[c]) == pd.to_datetime(df_fast[c])).all(), c
+    else:
+        assert (df_loop[c].to_numpy().astype(float) == df_fast[c].to_numpy().astype(float)).all(), c
+print(f"{df_fast.shape[0]} trades identical")
+
+gt = tester(ROWS)
+best = None
+for _ in range(3):
+    start = timer()
+    gt.run_test()
+    best = min(best or 1e9, timer() - start)
+print(f"{ROWS} M5 rows, arrays -> {best:.4f}s {gt.df_results.shape[0]} trades")
@@ -0,0 +1,32 @@
+import subprocess
+import sys
+from timeit import default_timer as timer
+
+# python -m benchmarks.bench_import
+# Wall time of a fresh interpreter importing each module, best of 5, and a
+# check that importing technicals.patterns reads no config and pulls in no
+# dask.
+
+MODULES = ['pandas', 'technicals.indicators', 'technicals.patterns', 'technicals.streaming']
+RUNS = 5
+
+
+def import_time(module):
+    best = None
+    for _ in range(RUNS):
+        start = timer()
+        subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+        best = min(best or float('inf'), timer() - start)
+    return best
+
+
+baseline = import_time('sys')
+print(f"{'interpreter':24s} -> {baseline:.4f}s")
+for module in MODULES:
+    print(f"{module:24s} -> {import_time(module):.4f}s")
+
+check = ("import sys, technicals.patterns as p; "
+         "assert p._pattern_config is None, 'config read at import'; "
+         "assert not any(m.split('.')[0] == 'dask' for m in sys.modules), 'dask imported'")
+subprocess.run([sys.executable, "-c", check], check=True)
+print("technicals.patterns import has no side effects")
@@ -0,0 +1,84 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from timeit import default_timer as timer
+
+from infrastructure.candle_store import candleStore
+from simulation import ma_cross
+from simulation.ma_cross import (assess_pair, assess_pair_grid, get_ma_col, load_price_data,
+                                 run_ma_sim)
+
+# python -m benchmarks.bench_ma_cross
+# assess_pair per (ma_l, ma_s) combination, as analyse_pair used to do, vs
+# assess_pair_grid on the same price data, then a whole run_ma_sim on
+# synthetic M5 candles in a temporary candle store.
+
+ROWS = 40_000
+SIM_ROWS = 100_000
+MA_LONG = [20, 40, 80, 120, 150, 200]
+MA_SHORT = [10, 20, 30, 40, 50, 100]
+CURRENCIES = ["EUR", "USD", "GBP", "JPY"]
+
+
+def make_m5(rows, seed):
+    rng = np.random.default_rng(seed)
+    mid_c = np.round(1.1 * np.exp(np.cumsum(rng.normal(0, 3e-4, rows))), 5)
+    mid_o = np.r_[mid_c[0], mid_c[:-1]]
+    df = pd.DataFrame(dict(
+        time=pd.date_range("2014-01-06", periods=rows, freq="5min", tz="UTC"),
+        volume=rng.integers(1, 900, rows),
+        mid_o=mid_o,
+        mid_h=np.round(np.maximum(mid_o, mid_c) + rng.uniform(0, 3e-4, rows), 5),
+        mid_l=np.round(np.minimum(mid_o, mid_c) - rng.uniform(0, 3e-4, rows), 5),
+        mid_c=mid_c
+    ))
+    for side, offset in [('bid', -1e-5), ('ask', 1e-5)]:
+        for o in 'ohlc':
+            df[f"{side}_{o}"] = np.round(df[f"mid_{o}"] + offset, 5)
+    return df
+
+
+path = tempfile.mkdtemp()
+store_path = candleStore.path
+candleStore.path = os.path.join(path, "store")
+try:
+    ma_cross.ic.LoadInstruments("./data")
+    instrument = ma_cross.ic.instruments_dict["EUR_USD"]
+    candleStore.write("EUR_USD", "M5", make_m5(ROWS, 25))
+    price_data = load_price_data("EUR_USD", "M5", set(MA_LONG + MA_SHORT))
+
+    start = timer()
+    per_pair = [assess_pair(price_data, get_ma_col(ma_l), get_ma_col(ma_s), instrument, "M5")
+                for ma_l in MA_LONG for ma_s in MA_SHORT if ma_l > ma_s]
+    t_loop = timer() - start
+    print(f"{ROWS} rows {len(per_pair)} combinations, assess_pair      -> {t_loop:.4f}s")
+
+    start = timer()
+    grid = assess_pair_grid(price_data, MA_LONG, MA_SHORT, instrument, "M5")
+    t_grid = timer() - start
+    print(f"{ROWS} rows {len(grid)} combinations, assess_pair_grid -> {t_grid:.4f}s "
+          f"({t_loop / t_grid:.0f}x)")
+
+    assert len(per_pair) == len(grid)
+    for a, b in zip(per_pair, grid):
+        assert a.result == b.result, (a.result, b.result)
+        pd.testing.assert_frame_equal(a.df_trades, b.df_trades, check_dtype=False)
+    print(f"{len(grid)} results and {sum(r.df_trades.shape[0] for r in grid)} trades identical")
+
+    for i, p1 in enumerate(CURRENCIES):
+        for p2 in CURRENCIES:
+            if f"{p1}_{p2}" in ma_cross.ic.instruments_dict:
+                candleStore.write(f"{p1}_{p2}", "M5", make_m5(SIM_ROWS, i))
+    start = timer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_ma_sim(curr_list=CURRENCIES, granularity=["M5", "H1"], ma_long=MA_LONG, ma_short=MA_SHORT,
+                   filepath=os.path.join(path, "candles"))
+    print(f"run_ma_sim {len(candleStore.series())} pairs x M5, H1 ({SIM_ROWS} M5 rows each) "
+          f"-> {timer() - start:.2f}s")
+finally:
+    candleStore.path = store_path
+    shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from timeit import default_timer as timer
+
+import technicals.indicators as indicators
+from technicals.panel import Panel, compute
+
+# python -m benchmarks.bench_panel
+# 28 pairs, every indicator: one pandas pipeline per pair vs one Panel,
+# then ATR / RSI / ADX again with Wilder and EMA smoothing.
+
+PAIRS = 28
+ROWS = 20_000
+INDICATORS = ['BollingerBands', 'ATR', 'KeltnerChannels', 'RSI', 'MACD', 'ADX',
+              'StochasticOscillator', 'CommodityChannelIndex', 'Aroon', 'IchimokuCloud']
+SMOOTHED = ['ATR', 'RSI', 'ADX']
+
+rng = np.random.default_rng(13)
+time = pd.date_range('2024-01-01', periods=ROWS, freq='5min', tz='UTC')
+frames = {}
+for i in range(PAIRS):
+    mid_c = 1.1 + np.cumsum(rng.normal(0, 0.0002, ROWS))
+    mid_o = np.r_[mid_c[0], mid_c[:-1]]
+    frames[f"P{i:02d}"] = pd.DataFrame(dict(
+        time=time,
+        mid_o=mid_o,
+        mid_h=np.maximum(mid_o, mid_c) + rng.uniform(0, 0.0005, ROWS),
+        mid_l=np.minimum(mid_o, mid_c) - rng.uniform(0, 0.0005, ROWS),
+        mid_c=mid_c,
+        volume=rng.integers(1, 500, ROWS)
+    ))
+print(f"Pairs:{PAIRS} Rows:{ROWS} Indicators:{len(INDICATORS)}")
+
+
+def per_pair(names, params):
+    out = {}
+    for pair, df in frames.items():
+        df = df.copy()
+        for name in names:
+            df = getattr(indicators, name)(df, **params)
+        out[pair] = df
+    return out
+
+
+def panel(names, params):
+    p = Panel.from_pairs(frames)
+    for name in names:
+        p = compute(p, name, **params)
+    return p
+
+
+def best_of(func, *args, runs=3):
+    best, result = None, None
+    for _ in range(runs):
+        start = timer()
+        result = func(*args)
+        best = min(best or float('inf'), timer() - start)
+    return best, result
+
+
+for label, names, params in [(indicators.SMA, INDICATORS, {}),
+                             (indicators.WILDER, SMOOTHED, dict(smoothing=indicators.WILDER)),
+                             (indicators.EMA, SMOOTHED, dict(smoothing=indicators.EMA))]:
+    t_pair, res_pair = best_of(per_pair, names, params)
+    print(f"{label:<6} per pair -> {t_pair:.4f}s")
+    t_panel, res_panel = best_of(panel, names, params)
+    print(f"{label:<6} panel    -> {t_panel:.4f}s ({t_pair / t_panel:.1f}x)")
+
+    for pair, df in res_pair.items():
+        for col in df.columns.difference(frames[pair].columns):
+            assert np.array_equal(df[col].to_numpy(dtype=float),
+                                  res_panel[col][pair].to_numpy(dtype=float), equal_nan=True), \
+                (label, pair, col)
+    print(f"{label:<6} identical")
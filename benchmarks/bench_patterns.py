@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from timeit import default_timer as timer
+
+from technicals.patterns import PATTERNS, apply_patterns, pattern_masks, patterns_frame
+
+# python -m benchmarks.bench_patterns
+
+ROWS = 500_000
+
+rng = np.random.default_rng(3)
+mid_c = np.round(1.1 + np.cumsum(rng.normal(0, 0.0003, ROWS)), 4)
+mid_o = np.round(np.r_[mid_c[0], mid_c[:-1]] + rng.normal(0, 0.0001, ROWS), 4)
+df = pd.DataFrame(dict(
+    mid_o=mid_o,
+    mid_h=np.maximum(mid_o, mid_c) + np.round(rng.uniform(0, 0.0003, ROWS), 4),
+    mid_l=np.minimum(mid_o, mid_c) - np.round(rng.uniform(0, 0.0003, ROWS), 4),
+    mid_c=mid_c
+))
+print(f"Total Rows:{df.shape[0]} Patterns:{len(PATTERNS)}")
+
+
+def best_of(func, runs=3):
+    best, result = None, None
+    for _ in range(runs):
+        start = timer()
+        result = func()
+        best = min(best or float('inf'), timer() - start)
+    return best, result
+
+
+t_frame, df_an = best_of(lambda: apply_patterns(df))
+print(f"apply_patterns -> {t_frame:.4f}s {df_an.memory_usage(deep=True).sum() / 1e6:.1f}MB")
+t_masks, masks = best_of(lambda: pattern_masks(df))
+print(f"pattern_masks  -> {t_masks:.4f}s {masks.nbytes / 1e6:.1f}MB ({t_frame / t_masks:.1f}x)")
+
+decoded = patterns_frame(masks)
+for name in PATTERNS:
+    assert np.array_equal(df_an[name].to_numpy(dtype=bool), decoded[name].to_numpy()), name
+print("identical")
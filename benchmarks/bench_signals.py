@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from timeit import default_timer as timer
+
+from bot.technicals_manager import (apply_signal, apply_TP, apply_SL,
+                                    apply_signal_vectorized, apply_TP_SL_vectorized)
+from models.trade_settings import TradeSettings
+
+# python -m benchmarks.bench_signals
+
+ROWS = 100_000
+
+settings = TradeSettings({
+    "bollinger_bands": {"n_ma": 12, "n_std": 2.5, "maxspread": 0.0003, "mingain": 0.0005, "riskreward": 2},
+    "ichimoku_cloud": {"n1": 9, "n2": 26, "n3": 52},
+    "chaikin_money_flow": {"n_cmf": 20},
+    "atr": {"n_atr": 14, "tp_multiplier": 2, "sl_multiplier": 1}
+}, "EUR_USD")
+
+
+def make_frame(rows):
+    rng = np.random.default_rng(42)
+    mid_c = 1.1 + np.cumsum(rng.normal(0, 0.0005, rows))
+    band = rng.uniform(0.0002, 0.002, rows)
+    return pd.DataFrame(dict(
+        mid_o=mid_c + rng.normal(0, 0.001, rows),
+        mid_c=mid_c,
+        BB_UP=mid_c + rng.normal(0, 1, rows) * band,
+        BB_LW=mid_c + rng.normal(0, 1, rows) * band,
+        Senkou_Span_A=mid_c + rng.normal(0, 0.002, rows),
+        Senkou_Span_B=mid_c + rng.normal(0, 0.002, rows),
+        SPREAD=rng.uniform(0, 0.0005, rows),
+        GAIN=rng.uniform(0, 0.002, rows),
+        ATR=rng.uniform(0.0001, 0.001, rows)
+    ))
+
+
+df = make_frame(ROWS)
+print(f"Total Rows:{df.shape[0]}")
+
+start = timer()
+df_apply = df.copy()
+df_apply['SIGNAL'] = df_apply.apply(
+    apply_signal, axis=1, trade_settings=settings)
+df_apply['TP'] = df_apply.apply(apply_TP, axis=1, trade_settings=settings)
+df_apply['SL'] = df_apply.apply(apply_SL, axis=1, trade_settings=settings)
+t_apply = timer() - start
+print(f"df.apply(axis=1)  -> {t_apply:.4f}s")
+
+start = timer()
+df_vec = df.copy()
+df_vec['SIGNAL'] = apply_signal_vectorized(df_vec, settings)
+df_vec['TP'], df_vec['SL'] = apply_TP_SL_vectorized(df_vec, settings)
+t_vec = timer() - start
+print(f"vectorized        -> {t_vec:.4f}s ({t_apply / t_vec:.0f}x)")
+
+for col in ['SIGNAL', 'TP', 'SL']:
+    assert np.array_equal(df_apply[col].to_numpy(float),
+                          df_vec[col].to_numpy(float)), col
+print(f"signals BUY:{(df_vec.SIGNAL == 1).sum()} SELL:{(df_vec.SIGNAL == -1).sum()} identical")
@@ -0,0 +1,140 @@
+import asyncio
+import contextlib
+import io
+import shutil
+import socket
+import tempfile
+import threading
+from collections import Counter
+import datetime as dt
+import pandas as pd
+from aiohttp import web
+
+from infrastructure.log_wrapper import LogWrapper
+from infrastructure.rate_limiter import RateLimiter
+
+# python -m benchmarks.check_async_api
+# AsyncOandaApi and OandaApi against the same local mock of the candles
+# endpoint: fetch_candles_many must return the same frames and make the
+# same requests, including the retries for a 500 that clears, a 400 that
+# doesn't, a body that is not JSON and a server that is not there.
+
+LAST = pd.Timestamp("2024-03-06 14:00", tz="UTC")
+FLAKY_FAILURES = 2
+STEPS = {"M5": "5min", "M15": "15min", "H1": "1h"}
+
+
+class MockOanda:
+
+    def __init__(self):
+        self.requests = Counter()
+        self.failures = Counter()
+        self.port = None
+
+    def candles(self, pair, granularity, count, date_from, date_to):
+        step = pd.Timedelta(STEPS[granularity])
+        if date_from is not None:
+            times = pd.date_range(pd.Timestamp(date_from), pd.Timestamp(date_to), freq=step, inclusive="left")
+        else:
+            times = pd.date_range(end=LAST, periods=int(count), freq=step)
+        seed = sum(map(ord, pair))
+        candles = []
+        for i, t in enumerate(times):
+            mid = 1.1 + ((seed + t.value // 10**9 // 60) % 997) * 1e-5
+            candle = dict(complete=t != LAST, volume=int(10 + i % 7),
+                          time=t.strftime("%Y-%m-%dT%H:%M:%S.000000000Z"))
+            for name, offset in [('mid', 0.0), ('bid', -1e-5), ('ask', 1e-5)]:
+                price = mid + offset
+                candle[name] = {o: f"{price + d:.5f}" for o, d in zip('ohlc', [0, 2e-5, -2e-5, 1e-5])}
+            candles.append(candle)
+        return dict(instrument=pair, granularity=granularity, candles=candles)
+
+    async def handle_candles(self, request):
+        pair = request.match_info['pair']
+        self.requests[pair] += 1
+        if pair == "BAD_PAIR":
+            return web.json_response({"errorMessage": "Invalid value specified for 'instrument'"}, status=400)
+        if pair == "NOT_JSON":
+            return web.Response(text="<html>502 Bad Gateway</html>", status=502)
+        if pair == "GBP_USD" and self.failures[pair] < FLAKY_FAILURES:
+            self.failures[pair] += 1
+            return web.json_response({"errorMessage": "Internal Server Error"}, status=500)
+        q = request.query
+        return web.json_response(self.candles(pair, q['granularity'], q.get('count'), q.get('from'), q.get('to')))
+
+    def start(self):
+        started = threading.Event()
+
+        def serve():
+            loop = asyncio.new_event_loop()
+            app = web.Application()
+            app.router.add_get("/v3/instruments/{pair}/candles", self.handle_candles)
+            runner = web.AppRunner(app)
+            loop.run_until_complete(runner.setup())
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            loop.run_until_complete(site.start())
+            self.port = runner.addresses[0][1]
+            started.set()
+            loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        started.wait()
+        return f"http://127.0.0.1:{self.port}/v3"
+
+    def reset(self):
+        self.requests.clear()
+        self.failures.clear()
+
+
+def unused_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}/v3"
+
+
+JOBS = [("EUR_USD", "M5", 50), ("USD_JPY", "H1", 200), ("GBP_USD", "M5", 10),
+        ("EUR_USD", "M15", (dt.datetime(2024, 3, 1), dt.datetime(2024, 3, 2))),
+        ("BAD_PAIR", "M5", 10), ("NOT_JSON", "M5", 10)]
+
+
+async def fetch_async(base_url, jobs):
+    from api.oanda_api_async import AsyncOandaApi
+    async with AsyncOandaApi(base_url=base_url, limiter=RateLimiter()) as api:
+        return await api.fetch_candles_many(jobs)
+
+
+logs = tempfile.mkdtemp()
+LogWrapper.PATH = logs
+try:
+    from api.oanda_api import OandaApi
+
+    mock = MockOanda()
+    base_url = mock.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sync_results = OandaApi(limiter=RateLimiter(), base_url=base_url).fetch_candles_many(JOBS)
+        sync_requests = dict(mock.requests)
+        mock.reset()
+        async_results = asyncio.run(fetch_async(base_url, JOBS))
+        async_requests = dict(mock.requests)
+
+    assert sync_requests == async_requests, (sync_requests, async_requests)
+    for job in JOBS:
+        a, b = sync_results[job], async_results[job]
+        if a is None:
+            assert b is None, job
+            print(f"{job[0]:9} {job[1]:4} -> None from both after {sync_requests[job[0]]} requests")
+            continue
+        pd.testing.assert_frame_equal(a, b)
+        print(f"{job[0]:9} {job[1]:4} -> {a.shape[0]:3} candles, identical")
+    assert sync_results[("GBP_USD", "M5", 10)] is not None
+    assert sync_requests["GBP_USD"] == FLAKY_FAILURES + 1
+    assert sync_requests["BAD_PAIR"] == 3 and sync_requests["NOT_JSON"] == 3
+
+    down = unused_url()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sync_down = OandaApi(limiter=RateLimiter(), base_url=down).fetch_candles_many(JOBS[:2])
+        async_down = asyncio.run(fetch_async(down, JOBS[:2]))
+    assert all(v is None for v in sync_down.values()) and all(v is None for v in async_down.values())
+    print("server down -> None from both")
+finally:
+    shutil.rmtree(logs, ignore_errors=True)
@@ -0,0 +1,83 @@
+import datetime as dt
+import time
+import numpy as np
+import pandas as pd
+
+from bot.bot import Bot
+from bot.candle_manager import CandleManager
+from bot.candle_scheduler import CandleScheduler
+
+# python -m benchmarks.check_bot_confirm
+# Candle requests Bot.on_close makes for one M1 close against a fake API:
+# with no new candle, with one that completes late, and with the market
+# closed. Sleeps are recorded instead of slept.
+
+CLOSE = dt.datetime(2024, 3, 6, 14, 0, tzinfo=dt.timezone.utc)  # Wednesday
+WEEKEND_CLOSE = dt.datetime(2024, 3, 9, 14, 0, tzinfo=dt.timezone.utc)  # Saturday
+
+
+class FakeApi:
+    """Serves the complete M1 candles up to complete_until[pair] and counts
+    candle requests."""
+
+    def __init__(self, pairs, last):
+        times = pd.date_range(end=last + dt.timedelta(minutes=10), periods=300, freq="1min", tz="UTC")
+        self.frame = pd.DataFrame(dict(time=times, volume=np.full(times.shape[0], 10)))
+        for p in ['mid', 'bid', 'ask']:
+            for o in 'ohlc':
+                self.frame[f"{p}_{o}"] = 1.1 + np.arange(times.shape[0]) * 1e-5
+        self.complete_until = {pair: pd.Timestamp(last) for pair in pairs}
+        self.requests = 0
+
+    def fetch_candles_many(self, jobs):
+        jobs = list(jobs)
+        self.requests += len(jobs)
+        return {job: self.frame[self.frame.time <= self.complete_until[job[0]]].tail(job[2])
+                .reset_index(drop=True) for job in jobs}
+
+
+def make_bot(close_time):
+    bot = Bot.__new__(Bot)
+    bot.load_settings()
+    bot.log_message = lambda msg, key: None
+    bot.api = FakeApi(bot.trade_settings, close_time - dt.timedelta(minutes=2))
+    bot.candle_manager = CandleManager(bot.api, bot.trade_settings, bot.log_message, Bot.GRANULARITY)
+    bot.scheduler = CandleScheduler(Bot.GRANULARITY, clock=lambda: close_time.timestamp() + 0.25)
+    bot.api.requests = 0
+    bot.triggered = []
+    bot.process_candles = lambda triggered: bot.triggered.extend(triggered) or []
+    return bot
+
+
+sleeps = []
+time.sleep = sleeps.append
+
+bot = make_bot(CLOSE)
+pairs = len(bot.candle_manager.pairs_list)
+bot.on_close(CLOSE)
+assert bot.api.requests == pairs * Bot.CONFIRM_ATTEMPTS and not bot.triggered, bot.api.requests
+print(f"no new candle, {pairs} pairs    -> {bot.api.requests} requests, sleeps {sleeps}")
+
+sleeps.clear()
+bot = make_bot(CLOSE)
+fetch = bot.api.fetch_candles_many
+
+
+def late_candle(jobs):
+    # the candle closing at CLOSE is only complete from the second fetch on
+    if bot.api.requests:
+        for pair in bot.api.complete_until:
+            bot.api.complete_until[pair] = pd.Timestamp(CLOSE - dt.timedelta(minutes=1))
+    return fetch(jobs)
+
+
+bot.api.fetch_candles_many = late_candle
+bot.on_close(CLOSE)
+assert bot.api.requests == 2 * pairs and len(bot.triggered) == pairs, bot.api.requests
+print(f"candle complete on retry      -> {bot.api.requests} requests, sleeps {sleeps}")
+
+sleeps.clear()
+bot = make_bot(WEEKEND_CLOSE)
+bot.on_close(WEEKEND_CLOSE)
+assert bot.api.requests == 0 and not sleeps
+print(f"market closed                 -> {bot.api.requests} requests")
@@ -0,0 +1,70 @@
+import types
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import bot.bot as bot_module
+from api.account_cache import AccountCache
+from bot.bot import Bot
+import constants.defs as defs
+from infrastructure.instrument_collection import instrumentCollection
+
+# python -m benchmarks.check_bot_prices
+# Pricing requests Bot.process_candles makes for one close against a fake
+# API: none when every decision is NONE, one per pair that places a trade,
+# and a new one even when the cached price is still inside PRICES_TTL.
+
+
+class FakeApi:
+    """Prices every pair at 1.0 and counts pricing requests per pair."""
+
+    def __init__(self):
+        self.priced = []
+        self.placed = []
+
+    def get_prices(self, instruments_list):
+        self.priced.extend(instruments_list)
+        return [types.SimpleNamespace(instrument=i, buy_conv=1.0, sell_conv=1.0)
+                for i in instruments_list]
+
+    def get_open_trades(self):
+        return []
+
+    def place_trade(self, pair, units, *args):
+        self.placed.append((pair, round(units, 1)))
+        return len(self.placed)
+
+
+def make_bot(trading):
+    bot = Bot.__new__(Bot)
+    bot.load_settings()
+    bot.log_message = lambda msg, key: None
+    bot.api = FakeApi()
+    bot.account = AccountCache(bot.api, clock=lambda: 0.0)
+    bot.candle_manager = types.SimpleNamespace(
+        timings={p: types.SimpleNamespace(last_time=None) for p in bot.trade_settings},
+        get_candles=lambda p: None)
+    bot.executor = ThreadPoolExecutor(max_workers=bot.max_workers)
+    bot.trading = trading
+    return bot
+
+
+def decision(candle_time, pair, granularity, api, trade_settings, log_message, candles=None):
+    signal = defs.BUY if pair in bot.trading else defs.NONE
+    return types.SimpleNamespace(pair=pair, signal=signal, loss=0.002, sl=0.0, tp=0.0)
+
+
+instrumentCollection.LoadInstruments("./data")
+bot_module.get_trade_decision = decision
+
+bot = make_bot([])
+pairs = list(bot.trade_settings)
+wait(bot.process_candles(pairs))
+assert bot.api.priced == [] and bot.api.placed == [], bot.api.priced
+print(f"{len(pairs)} pairs, no trade         -> {len(bot.api.priced)} pricing requests")
+
+bot = make_bot(pairs[:1])
+bot.account.get_prices(pairs)
+bot.api.priced.clear()
+wait(bot.process_candles(pairs))
+assert bot.api.priced == pairs[:1] and len(bot.api.placed) == 1, bot.api.priced
+print(f"{len(pairs)} pairs, 1 trade, price cached -> {len(bot.api.priced)} pricing request "
+      f"for {bot.api.priced}, placed {bot.api.placed}")
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+from infrastructure.candle_store import CandleStore
+from infrastructure.collect_data import collect_data, INCREMENTS
+
+# python -m benchmarks.check_candle_store
+# Store writes and appends that have gone wrong before.
+
+
+def make_candles(start, rows):
+    df = pd.DataFrame(dict(
+        time=pd.date_range(start, periods=rows, freq='5min', tz='UTC'),
+        volume=np.arange(rows)
+    ))
+    for o in 'ohlc':
+        df[f"mid_{o}"] = 1.1 + np.arange(rows) * 1e-5
+    return df
+
+
+def check_stale_old_dir(store):
+    df = make_candles('2020-01-06', 100)
+    store.write('EUR_USD', 'M5', df)
+    # as if a write died between moving the series aside and the new one in
+    stale = f"{store.series_path('EUR_USD', 'M5')}.old"
+    os.makedirs(stale)
+    with open(os.path.join(stale, 'time.bin'), 'wb') as f:
+        f.write(b'stale')
+    assert store.write('EUR_USD', 'M5', make_candles('2020-01-06', 120)) == 120
+    assert not os.path.exists(stale)
+    print("write over a stale .old directory -> ok")
+
+
+def check_interrupted_write(store):
+    df = make_candles('2020-01-06', 1010)
+    store.write('USD_JPY', 'M5', df.iloc[:1000])
+    # as if a write died after moving the series aside, before moving the
+    # new one in: {series}.old is the only copy
+    final = store.series_path('USD_JPY', 'M5')
+    os.replace(final, f"{final}.old")
+    assert store.exists('USD_JPY', 'M5')
+    assert store.append('USD_JPY', 'M5', df.iloc[1000:]) == 1010
+    assert store.read('USD_JPY', 'M5').drop(columns='time').equals(df.drop(columns='time'))
+
+    os.replace(final, f"{final}.old")
+    assert 'USD_JPY_M5' in store.series() and not os.path.exists(f"{final}.old")
+    os.replace(final, f"{final}.old")
+    assert store.write('USD_JPY', 'M5', df.iloc[:10]) == 10
+    assert not os.path.exists(f"{final}.old")
+    print("series moved aside by an interrupted write -> restored")
+
+
+class PagedApi:
+    """Serves pages from a frame the way OANDA does with includeFirst:
+    the candle covering from comes back too."""
+
+    def __init__(self, df):
+        self.df = df
+        self.pages = 0
+
+    def fetch_candles_job(self, job):
+        _, _, (date_from, date_to) = job
+        self.pages += 1
+        start = pd.Timestamp(date_from).floor('5min')
+        return self.df[(self.df.time >= start) & (self.df.time < date_to)].reset_index(drop=True)
+
+
+def check_collect_onto_migrated(store):
+    full = make_candles('2020-01-06', 9000)
+    migrated = 2000
+    store.write('GBP_USD', 'M5', full.iloc[:migrated])
+    writes = []
+    write = store.write
+    store.write = lambda *args: writes.append(args) or write(*args)
+
+    api = PagedApi(full)
+    end = full.time.iloc[-1] + pd.Timedelta('5min')
+    # two pages past the stored candles
+    date_to = full.time.iloc[migrated] + pd.Timedelta(minutes=INCREMENTS['M5'] * 2)
+    collect_data('GBP_USD', 'M5', full.time.iloc[0], min(date_to, end), api, store)
+    store.write = write
+
+    assert api.pages == 2, api.pages
+    assert not writes, f"{len(writes)} rewrites"
+    stored = store.read('GBP_USD', 'M5')
+    expected = full[full.time < min(date_to, end)].reset_index(drop=True)
+    assert (stored.time == expected.time).all()
+    assert stored.drop(columns='time').equals(expected.drop(columns='time'))
+    print(f"collect {api.pages} pages onto a migrated series -> ok, no rewrite")
+
+
+path = tempfile.mkdtemp()
+try:
+    check_stale_old_dir(CandleStore(path))
+    check_interrupted_write(CandleStore(path))
+    check_collect_onto_migrated(CandleStore(path))
+finally:
+    shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from bot.technicals_manager import apply_signal_vectorized
+from models.trade_settings import TradeSettings
+from technicals.indicators import BollingerBands, IchimokuCloud, MovingAverage
+from infrastructure.candle_data import compact_candles, memory_usage, signal_mismatches
+
+# python -m benchmarks.check_compact
+# Memory of a float64 vs compact candle frame and the signals that change
+# when indicators run on float32 prices, raw and restored to their decimals.
+
+ROWS = 500_000
+PAIRS = [("EUR_USD", 1.1, 5), ("USD_JPY", 150.0, 3), ("USD_MXN", 17.0, 5)]
+
+rng = np.random.default_rng(17)
+settings = TradeSettings({
+    "bollinger_bands": {"n_ma": 12, "n_std": 2.5, "maxspread": 0.0003, "mingain": 0.0005, "riskreward": 2},
+    "ichimoku_cloud": {"n1": 9, "n2": 26, "n3": 52},
+    "chaikin_money_flow": {"n_cmf": 20},
+    "atr": {"n_atr": 14, "tp_multiplier": 2, "sl_multiplier": 1}
+}, "EUR_USD")
+bb = settings.bollinger_bands_settings
+
+
+def make_frame(base, decimals):
+    mid_c = np.round(base * np.exp(np.cumsum(rng.normal(0, 2e-4, ROWS))), decimals)
+    mid_o = np.r_[mid_c[0], mid_c[:-1]]
+    df = pd.DataFrame(dict(
+        time=pd.date_range('2014-01-01', periods=ROWS, freq='5min', tz='UTC'),
+        volume=rng.integers(1, 900, ROWS),
+        mid_o=mid_o,
+        mid_h=np.round(np.maximum(mid_o, mid_c) + rng.uniform(0, base * 3e-4, ROWS), decimals),
+        mid_l=np.round(np.minimum(mid_o, mid_c) - rng.uniform(0, base * 3e-4, ROWS), decimals),
+        mid_c=mid_c
+    ))
+    for side in ['bid', 'ask']:
+        for o in 'ohlc':
+            offset = (-1 if side == 'bid' else 1) * 10.0 ** -decimals
+            df[f"{side}_{o}"] = np.round(df[f"mid_{o}"] + offset, decimals)
+    return df
+
+
+def bb_ichimoku(df):
+    df = BollingerBands(df, bb['n_ma'], bb['n_std'])
+    df = IchimokuCloud(df)
+    df['SPREAD'] = df.ask_c - df.bid_c
+    df['GAIN'] = abs(df.mid_c - df.BB_MA)
+    df['SIGNAL'] = apply_signal_vectorized(df, settings)
+    return df
+
+
+def ma_cross(df):
+    df = MovingAverage(df, 10)
+    df = MovingAverage(df, 40)
+    df['SIGNAL'] = np.sign(df.MA_10 - df.MA_40)
+    return df
+
+
+for pair, base, decimals in PAIRS:
+    df = make_frame(base, decimals)
+    print(f"{pair} rows:{ROWS} float64:{memory_usage(df) / 1e6:.1f}MB "
+          f"compact:{memory_usage(compact_candles(df.copy())) / 1e6:.1f}MB")
+    for name, build in [("bb_ichimoku", bb_ichimoku), ("ma_cross", ma_cross)]:
+        raw = signal_mismatches(df, build)
+        restored = signal_mismatches(df, build, decimals=decimals)
+        print(f"  {name:12s} float32 mismatches:{len(raw)} restored mismatches:{len(restored)}")
+        assert len(restored) == 0
+print("restored signals identical")
@@ -0,0 +1,63 @@
+import multiprocessing as mp
+import os
+import tempfile
+import time
+from timeit import default_timer as timer
+
+from infrastructure.rate_limiter import (BUDGETS, CANDLES, RateLimiter,
+                                         SharedRateLimiter)
+
+# python -m benchmarks.check_rate_limiter
+# PROCESSES processes take candle tokens as fast as the limiter lets them for
+# SECONDS. With a RateLimiter each has its own budget; with a
+# SharedRateLimiter on one file all of them together stay inside one
+# budget. Then the cost of a try_acquire with and without the file.
+
+PROCESSES = 4
+SECONDS = 1.0
+
+
+def take_tokens(path, start, counts):
+    limiter = SharedRateLimiter(path) if path else RateLimiter()
+    while time.monotonic() < start:
+        time.sleep(0.001)
+    taken = 0
+    while time.monotonic() - start < SECONDS:
+        limiter.acquire(CANDLES)
+        taken += 1
+    counts.put(taken)
+
+
+def run(path):
+    counts = mp.Queue()
+    start = time.monotonic() + 0.5
+    procs = [mp.Process(target=take_tokens, args=(path, start, counts)) for _ in range(PROCESSES)]
+    for p in procs:
+        p.start()
+    taken = [counts.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return taken
+
+
+if __name__ == "__main__":
+    rate, capacity = BUDGETS[CANDLES]
+    budget = capacity + rate * SECONDS
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "oanda_rate_limiter")
+
+        taken = run(None)
+        print(f"RateLimiter per process  -> {sum(taken)} tokens {taken}, one budget is {budget:.0f}")
+        assert sum(taken) > budget * (PROCESSES - 1)
+
+        taken = run(path)
+        print(f"SharedRateLimiter        -> {sum(taken)} tokens {taken}, one budget is {budget:.0f}")
+        # the last acquire of each process may finish just past SECONDS
+        assert sum(taken) <= budget + PROCESSES, taken
+
+        big = {k: (1e9, 1e9) for k in BUDGETS}
+        for limiter in [RateLimiter(big, (1e9, 1e9)), SharedRateLimiter(path, big, (1e9, 1e9))]:
+            start = timer()
+            for _ in range(10_000):
+                limiter.try_acquire(CANDLES)
+            print(f"{type(limiter).__name__:<24} -> {(timer() - start) / 10_000 * 1e6:.1f}us per try_acquire")
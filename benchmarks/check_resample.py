@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from timeit import default_timer as timer
+
+from infrastructure.candle_resample import (ALIGNMENT_TIMEZONE, DAILY_ALIGNMENT,
+                                            resample_candles, resample_mismatches)
+
+# python -m benchmarks.check_resample
+# Builds M5 and higher timeframe candles from the same synthetic ticks over
+# the March 2021 DST change, checks that resampled M5 matches the candles
+# made straight from the ticks, then times ten years of M5 -> H4.
+
+TICKS = 400_000
+GRANULARITIES = {"M15": "15min", "M30": "30min", "H1": "1h", "H2": "2h", "H4": "4h", "D": "1D"}
+
+rng = np.random.default_rng(22)
+start = pd.Timestamp("2021-02-26", tz="UTC")
+seconds = np.sort(rng.integers(0, 6 * 7 * 86400, TICKS))
+times = start + pd.to_timedelta(seconds, unit="s")
+wall = times.tz_convert(ALIGNMENT_TIMEZONE).tz_localize(None)
+# market open from Sunday to Friday 17:00 New York
+is_open = (wall + pd.Timedelta(hours=24 - DAILY_ALIGNMENT)).dayofweek < 5
+times, wall = times[is_open], wall[is_open]
+mid = np.round(1.2 + np.cumsum(rng.normal(0, 2e-5, times.shape[0])), 5)
+ticks = pd.DataFrame(dict(mid=mid, bid=np.round(mid - 5e-5, 5), ask=np.round(mid + 5e-5, 5)))
+
+
+def candles_from_ticks(keys):
+    grouped = ticks.groupby(keys, sort=True)
+    df = pd.DataFrame({'volume': grouped.size()})
+    for p in ['mid', 'bid', 'ask']:
+        df[f"{p}_o"] = grouped[p].first()
+        df[f"{p}_h"] = grouped[p].max()
+        df[f"{p}_l"] = grouped[p].min()
+        df[f"{p}_c"] = grouped[p].last()
+    df.index.name = 'time'
+    return df.reset_index()
+
+
+df_m5 = candles_from_ticks(times.floor("5min"))
+print(f"{df_m5.shape[0]} M5 candles from {ticks.shape[0]} ticks")
+
+failed = 0
+for granularity, freq in GRANULARITIES.items():
+    # bucket on the New York trading day, then back to UTC
+    day_offset = pd.Timedelta(hours=DAILY_ALIGNMENT)
+    local_start = (wall - day_offset).floor(freq) + day_offset
+    keys = local_start.tz_localize(ALIGNMENT_TIMEZONE).tz_convert("UTC")
+    downloaded = candles_from_ticks(keys)
+    resampled = resample_candles(df_m5, granularity, complete=False)
+    bad = resample_mismatches(resampled, downloaded)
+    failed += bad.shape[0]
+    print(f"{granularity:4} {resampled.shape[0]:5} candles, {bad.shape[0]} mismatches")
+assert failed == 0
+
+rows = 750_000
+m5 = pd.DataFrame(dict(time=pd.date_range("2014-01-06", periods=rows, freq="5min", tz="UTC"),
+                       volume=rng.integers(1, 900, rows)))
+for p in ['mid', 'bid', 'ask']:
+    for o in 'ohlc':
+        m5[f"{p}_{o}"] = rng.normal(1.1, 0.01, rows)
+best = None
+for _ in range(3):
+    t0 = timer()
+    h4 = resample_candles(m5, "H4")
+    best = min(best or 1e9, timer() - t0)
+print(f"{rows} M5 -> {h4.shape[0]} H4 -> {best:.4f}s")
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from bot.candle_scheduler import CandleScheduler
+from infrastructure.candle_resample import ALIGNMENT_TIMEZONE, bucket_starts
+
+# python -m benchmarks.check_scheduler
+# CandleScheduler closes against the candle starts bucket_starts gives for
+# every minute over both 2021 DST changes, and that closes above H1 fall
+# on New York wall clock hours counted from 17:00.
+
+PERIODS = [("2021-03-05", "2021-03-22"), ("2021-10-29", "2021-11-15")]
+
+for start, end in PERIODS:
+    minutes = pd.date_range(start, end, freq="1min", tz="UTC").as_unit("s").asi8
+    for granularity in ["M5", "M15", "H1", "H2", "H4", "D", "W"]:
+        scheduler = CandleScheduler(granularity)
+        if granularity == "W":
+            daily = np.unique(bucket_starts(minutes, "D"))
+            weekday = pd.to_datetime(daily, unit='s', utc=True).tz_convert(ALIGNMENT_TIMEZONE).dayofweek
+            starts = daily[np.asarray(weekday) == 4]
+        else:
+            starts = np.unique(bucket_starts(minutes, granularity))
+        checked = minutes[::7][minutes[::7] < starts[-1]]
+        expected = starts[np.searchsorted(starts, checked, side='right')]
+        closes = np.array([scheduler.next_close(t) for t in checked])
+        assert (closes == expected).all(), granularity
+        wall = pd.to_datetime(np.unique(closes), unit='s', utc=True).tz_convert(ALIGNMENT_TIMEZONE)
+        if scheduler.interval > 3600:
+            hours = min(scheduler.interval, 86400) // 3600
+            assert ((wall.hour - 17) % hours == 0).all() and (wall.minute == 0).all(), granularity
+        print(f"{start} {granularity:3} {checked.shape[0]} times, {np.unique(closes).shape[0]} closes -> ok")
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from technicals import indicators as ind
+from technicals import streaming as st
+from technicals.indicators import SMA, WILDER, EMA
+from technicals.patterns import pattern_masks
+
+# python -m benchmarks.check_streaming
+# Every *Stream in technicals/streaming.py against its batch function in
+# technicals/indicators.py on the same candles: fed one candle at a time,
+# and warmed up on the first half then fed the rest. Values must agree to
+# TOLERANCE (relative and absolute), NaN where the batch has NaN.
+
+ROWS = 3_000
+TOLERANCE = 1e-8
+
+rng = np.random.default_rng(4)
+mid_c = np.round(1.1 + np.cumsum(rng.normal(0, 3e-4, ROWS)), 4)
+mid_o = np.round(np.r_[mid_c[0], mid_c[:-1]] + rng.normal(0, 1e-4, ROWS), 4)
+candles = pd.DataFrame(dict(
+    mid_o=mid_o,
+    mid_h=np.maximum(mid_o, mid_c) + np.round(rng.uniform(0, 3e-4, ROWS), 4),
+    mid_l=np.minimum(mid_o, mid_c) - np.round(rng.uniform(0, 3e-4, ROWS), 4),
+    mid_c=mid_c,
+    volume=rng.integers(1, 500, ROWS).astype(float)
+))
+# flat candles: zero ranges and unchanged closes for the division edge cases
+flat = rng.choice(ROWS, 30, replace=False)
+candles.loc[flat, ['mid_o', 'mid_h', 'mid_l']] = candles.loc[flat, 'mid_c'].to_numpy()[:, None]
+
+CASES = [
+    (ind.BollingerBands, st.BollingerBandsStream, dict(n=20, n_std=2)),
+    (ind.KeltnerChannels, st.KeltnerChannelsStream, dict(n_ema=20, n_atr=10)),
+    (ind.MACD, st.MACDStream, dict(n_slow=26, n_fast=12, n_signal=9)),
+    (ind.VWAP, st.VWAPStream, dict()),
+    (ind.StochasticOscillator, st.StochasticOscillatorStream, dict(n=14)),
+    (ind.MovingAverage, st.MovingAverageStream, dict(n=50)),
+    (ind.ExponentialMovingAverage, st.ExponentialMovingAverageStream, dict(n=50)),
+    (ind.CommodityChannelIndex, st.CommodityChannelIndexStream, dict(n=20)),
+    (ind.Momentum, st.MomentumStream, dict(n=14)),
+    (ind.RateOfChange, st.RateOfChangeStream, dict(n=14)),
+    (ind.OnBalanceVolume, st.OnBalanceVolumeStream, dict()),
+    (ind.ADL, st.ADLStream, dict()),
+    (ind.Aroon, st.AroonStream, dict(n=14)),
+    (ind.Aroon_Oscillator, st.AroonOscillatorStream, dict(n=14)),
+    (ind.CMF, st.CMFStream, dict(n_cmf=20)),
+    (ind.EVM, st.EVMStream, dict()),
+    (ind.IchimokuCloud, st.IchimokuCloudStream, dict(n1=9, n2=26, n3=52)),
+]
+for smoothing in [SMA, WILDER, EMA]:
+    CASES += [
+        (ind.ATR, st.ATRStream, dict(n_atr=14, smoothing=smoothing)),
+        (ind.RSI, st.RSIStream, dict(n=14, smoothing=smoothing)),
+        (ind.ADX, st.ADXStream, dict(n=14, smoothing=smoothing)),
+    ]
+
+
+def stream_rows(stream, df, warm_rows):
+    rows = []
+    if warm_rows:
+        stream.warm_up(df.iloc[:warm_rows])
+    for candle in df.iloc[warm_rows:].to_dict('records'):
+        rows.append(stream.update(candle))
+    return pd.DataFrame(rows, index=df.index[warm_rows:])
+
+
+def mismatches(expected, got):
+    expected, got = expected.to_numpy(dtype=float), got.to_numpy(dtype=float)
+    close = np.isclose(expected, got, rtol=TOLERANCE, atol=TOLERANCE, equal_nan=True)
+    return int((~close).sum())
+
+
+failed = 0
+for batch, stream_class, kwargs in CASES:
+    # EVM takes n, the stream has no use for it
+    batch_kwargs = dict(kwargs, n=14) if batch is ind.EVM else kwargs
+    expected = batch(candles.copy(), **batch_kwargs)
+    label = f"{stream_class.__name__} {kwargs.get('smoothing', '')}"
+    for warm_rows in [0, ROWS // 2]:
+        got = stream_rows(stream_class(**kwargs), candles, warm_rows)
+        # Chikou_Span looks ahead, the stream never has it
+        columns = [c for c in got.columns if c != 'Chikou_Span']
+        bad = {c: mismatches(expected[c].iloc[warm_rows:], got[c]) for c in columns}
+        bad = {c: n for c, n in bad.items() if n}
+        failed += sum(bad.values())
+        mode = "warm_up + update" if warm_rows else "update"
+        print(f"{label:32} {mode:16} {', '.join(columns)} -> {bad or 'ok'}")
+
+for warm_rows in [0, ROWS // 2]:
+    got = stream_rows(st.PatternStream(), candles, warm_rows)
+    bad = int((pattern_masks(candles)[warm_rows:] != got.PATTERNS.to_numpy()).sum())
+    failed += bad
+    print(f"{'PatternStream':32} {'warm_up + update' if warm_rows else 'update':16} PATTERNS -> {bad or 'ok'}")
+assert failed == 0, failed
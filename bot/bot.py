@@ -1,12 +1,15 @@
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 from bot.candle_manager import CandleManager
+from bot.candle_scheduler import CandleScheduler
 from bot.technicals_manager import get_trade_decision
 from bot.trade_manager import place_trade
 from infrastructure.log_wrapper import LogWrapper
 from models.trade_settings import TradeSettings
 from api.oanda_api import OandaApi
+from api.account_cache import AccountCache
 import constants.defs as defs
 import logging
 
@@ -16,14 +19,21 @@ class Bot:
     ERROR_LOG = "error"
     MAIN_LOG = "main"
     GRANULARITY = "M1"
-    SLEEP = 10
+    # fetches per pair for one close, CONFIRM_SLEEP doubling between them
+    CONFIRM_SLEEP = 1
+    CONFIRM_ATTEMPTS = 4
+    MAX_WORKERS = 4
 
     def __init__(self, api: OandaApi = None):
         self.api = api if api else OandaApi()
+        self.account = AccountCache(self.api)
         self.load_settings()
         self.setup_logs()
         self.candle_manager = CandleManager(
             self.api, self.trade_settings, self.log_message, Bot.GRANULARITY)
+        self.scheduler = CandleScheduler(Bot.GRANULARITY)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="pair")
         self.log_to_main("Bot started")
         self.log_to_error("Bot started")
 
@@ -35,6 +45,7 @@ class Bot:
             self.trade_settings = {k: TradeSettings(
                 v, k) for k, v in data['pairs'].items()}
             self.trade_risk = data['trade_risk']
+            self.max_workers = int(data.get('max_workers', Bot.MAX_WORKERS))
         except Exception as e:
             logging.error(f"Failed to load settings: {e}")
             raise
@@ -55,27 +66,72 @@ class Bot:
     def log_to_error(self, msg):
         self.log_message(msg, Bot.ERROR_LOG)
 
+    def process_pair(self, p, last_time, candles):
+        try:
+            trade_decision = get_trade_decision(
+                last_time, p, Bot.GRANULARITY, self.account, self.trade_settings[p], self.log_message,
+                candles=candles)
+            if trade_decision and trade_decision.signal != defs.NONE:
+                self.log_message(f"Place Trade: {trade_decision}", p)
+                self.log_to_main(f"Place Trade: {trade_decision}")
+                # units are sized from a price fetched now, not one cached
+                # up to PRICES_TTL ago
+                self.account.invalidate_prices([p])
+                place_trade(
+                    trade_decision, self.account, self.log_message, self.log_to_error, self.trade_risk)
+        except Exception as e:
+            self.log_to_error(f"Error in process_candles for {p}: {e}")
+
     def process_candles(self, triggered):
+        # Each pair runs decision -> order as one task on the pool, so pairs
+        # overlap while a single pair's steps stay in order.
+        futures = []
         if triggered:
             self.log_message(
                 f"process_candles triggered:{triggered}", Bot.MAIN_LOG)
             for p in triggered:
                 last_time = self.candle_manager.timings[p].last_time
-                try:
-                    trade_decision = get_trade_decision(
-                        last_time, p, Bot.GRANULARITY, self.api, self.trade_settings[p], self.log_message)
-                    if trade_decision and trade_decision.signal != defs.NONE:
-                        self.log_message(f"Place Trade: {trade_decision}", p)
-                        self.log_to_main(f"Place Trade: {trade_decision}")
-                        place_trade(
-                            trade_decision, self.api, self.log_message, self.log_to_error, self.trade_risk)
-                except Exception as e:
-                    self.log_to_error(f"Error in process_candles for {p}: {e}")
+                candles = self.candle_manager.get_candles(p)
+                futures.append(self.executor.submit(
+                    self.process_pair, p, last_time, candles))
+        return futures
+
+    def confirm_candles(self):
+        # OANDA only marks a candle complete once the next period has ticked,
+        # so pairs that are not confirmed at the boundary are retried with a
+        # backoff, never past the next close. A pair whose candle has not
+        # moved after CONFIRM_ATTEMPTS fetches (no ticks) waits for the next
+        # close. Work for this close is awaited before returning, so a pair
+        # never has two candles in flight at once.
+        pending = list(self.candle_manager.pairs_list)
+        futures = []
+        try:
+            for attempt in range(Bot.CONFIRM_ATTEMPTS):
+                if attempt:
+                    delay = Bot.CONFIRM_SLEEP * 2 ** (attempt - 1)
+                    if delay >= self.scheduler.seconds_to_close():
+                        break
+                    time.sleep(delay)
+                triggered = self.candle_manager.update_timings(pending)
+                futures.extend(self.process_candles(triggered))
+                pending = [p for p in pending if p not in triggered]
+                if not pending:
+                    return
+            self.log_to_main(f"confirm_candles no new candle for:{pending}")
+        finally:
+            wait(futures)
+
+    def on_close(self, close_time):
+        if not self.scheduler.in_session(close_time):
+            return
+        self.log_message(f"run candle close:{close_time}", Bot.MAIN_LOG)
+        self.confirm_candles()
 
     def run(self):
+        self.log_to_main(f"Bot scheduler: {self.scheduler}")
         while True:
-            time.sleep(Bot.SLEEP)
+            close_time = self.scheduler.wait_for_close()
             try:
-                self.process_candles(self.candle_manager.update_timings())
+                self.on_close(close_time)
             except Exception as error:
                 self.log_to_error(f"Error in run loop: {error}")
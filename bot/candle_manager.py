@@ -1,30 +1,82 @@
 from api.oanda_api import OandaApi
+from bot.technicals_manager import get_max_rows
+from models.candle_buffer import CandleBuffer
 from models.candle_timing import CandleTiming
+from technicals.patterns import decode_patterns
+from technicals.streaming import PatternStream
 
 
 class CandleManager:
 
+    # one candle of overlap with the buffer, the new one and the open one
+    CONFIRM_COUNT = 3
+
     def __init__(self, api: OandaApi, trade_settings, log_message, granularity):
         self.api = api
         self.trade_settings = trade_settings
         self.log_message = log_message
         self.granularity = granularity
         self.pairs_list = list(self.trade_settings.keys())
-        self.timings = {p: CandleTiming(self.api.last_complete_candle(
-            p, self.granularity)) for p in self.pairs_list}
+        self.buffers = {p: CandleBuffer(get_max_rows(
+            self.trade_settings[p])) for p in self.pairs_list}
+        # candle pattern bitmask of each pair's newest candle, updated per
+        # candle instead of re-scanning the buffer
+        self.patterns = {p: PatternStream() for p in self.pairs_list}
+        # +1 as the newest candle is usually still open and gets dropped
+        jobs = {p: (p, self.granularity, self.buffers[p].size + 1)
+                for p in self.pairs_list}
+        seeds = self.api.fetch_candles_many(jobs.values())
+        self.timings = {p: CandleTiming(self.seed_buffer(p, seeds[jobs[p]]))
+                        for p in self.pairs_list}
         for p, t in self.timings.items():
             self.log_message(f"CandleManager() init last_candle:{t}", p)
 
-    def update_timings(self):
+    def seed_buffer(self, pair, df=None):
+        buffer = self.buffers[pair]
+        if df is None:
+            df = self.api.fetch_candles_job(
+                (pair, self.granularity, buffer.size + 1))
+        if df is None or df.shape[0] == 0:
+            self.log_message("CandleManager() unable to seed buffer", pair)
+            return None
+        buffer.seed(df)
+        self.patterns[pair] = PatternStream()
+        self.patterns[pair].warm_up(df)
+        self.log_message(f"CandleManager() seeded {buffer}", pair)
+        return buffer.last_time
+
+    def get_candles(self, pair):
+        return self.buffers[pair].to_dataframe()
+
+    def get_patterns(self, pair):
+        """Pattern bitmask (technicals/patterns.py) of the newest candle."""
+        return self.patterns[pair].mask
+
+    def update_timings(self, pairs=None):
         triggered = []
+        pairs = self.pairs_list if pairs is None else pairs
+        latest = self.api.fetch_candles_many(
+            [(p, self.granularity, CandleManager.CONFIRM_COUNT) for p in pairs])
 
-        for pair in self.pairs_list:
-            current = self.api.last_complete_candle(pair, self.granularity)
-            if current is None:
+        for pair in pairs:
+            df = latest[(pair, self.granularity, CandleManager.CONFIRM_COUNT)]
+            if df is None or df.shape[0] == 0:
                 self.log_message("Unable to get candle", pair)
                 continue
+            current = df.iloc[-1].time
             self.timings[pair].is_ready = False
             if current > self.timings[pair].last_time:
+                new_candles = df[df.time > self.timings[pair].last_time]
+                if self.buffers[pair].extend(df):
+                    self.patterns[pair].warm_up(new_candles)
+                else:
+                    self.log_message(
+                        "CandleManager() missed candles, seeding buffer again", pair)
+                    self.seed_buffer(pair)
+                mask = self.get_patterns(pair)
+                if mask:
+                    self.log_message(
+                        f"CandleManager() patterns:{decode_patterns(mask)}", pair)
                 self.timings[pair].is_ready = True
                 self.timings[pair].last_time = current
                 self.log_message(
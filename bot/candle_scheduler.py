@@ -0,0 +1,87 @@
+import time
+import datetime as dt
+import numpy as np
+import pandas as pd
+from infrastructure.candle_resample import ALIGNMENT_TIMEZONE, DAILY_ALIGNMENT, bucket_starts
+
+GRANULARITY_SECONDS = {
+    "S5": 5,
+    "S10": 10,
+    "S15": 15,
+    "S30": 30,
+    "M1": 60,
+    "M2": 120,
+    "M4": 240,
+    "M5": 300,
+    "M10": 600,
+    "M15": 900,
+    "M30": 1800,
+    "H1": 3600,
+    "H2": 7200,
+    "H3": 10800,
+    "H4": 14400,
+    "H6": 21600,
+    "H8": 28800,
+    "H12": 43200,
+    "D": 86400,
+    "W": 604800,
+}
+
+# Candles up to H1 close on UTC epoch multiples. Larger ones follow OANDA's
+# daily alignment (17:00 New York, weeks from Friday), so their length in
+# UTC changes with DST; their closes are the whole UTC hours where a
+# candle starts, as bucket_starts aligns them for resampling.
+MAX_EPOCH_ALIGNED = 3600
+WEEKLY_ALIGNMENT = 4  # Friday
+
+
+def is_candle_start(hours, granularity):
+    """Which of the epoch seconds hours (whole UTC hours) open a candle."""
+    if granularity == "W":
+        weekday = pd.to_datetime(hours, unit='s', utc=True).tz_convert(ALIGNMENT_TIMEZONE).dayofweek
+        return (bucket_starts(hours, "D") == hours) & (np.asarray(weekday) == WEEKLY_ALIGNMENT)
+    return bucket_starts(hours, granularity) == hours
+
+
+def market_open(epoch_seconds):
+    """FX trades from Sunday to Friday 17:00 New York."""
+    wall = pd.Timestamp(epoch_seconds, unit='s', tz='UTC').tz_convert(ALIGNMENT_TIMEZONE).tz_localize(None)
+    return (wall + pd.Timedelta(hours=24 - DAILY_ALIGNMENT)).dayofweek < 5
+
+
+class CandleScheduler:
+
+    CLOSE_DELAY = 0.25
+
+    def __init__(self, granularity, clock=time.time, sleep=time.sleep):
+        if granularity not in GRANULARITY_SECONDS:
+            raise ValueError(f"Unsupported granularity: {granularity}")
+        self.granularity = granularity
+        self.interval = GRANULARITY_SECONDS[granularity]
+        self.clock = clock
+        self.sleep = sleep
+
+    def next_close(self, now=None):
+        now = self.clock() if now is None else now
+        if self.interval <= MAX_EPOCH_ALIGNED:
+            return (int(now // self.interval) + 1) * self.interval
+        # a candle lasts at most an hour more than interval across DST
+        first = (int(now // 3600) + 1) * 3600
+        hours = np.arange(first, first + self.interval + 2 * 3600, 3600, dtype=np.int64)
+        return int(hours[np.argmax(is_candle_start(hours, self.granularity))])
+
+    def seconds_to_close(self):
+        now = self.clock()
+        return self.next_close(now) - now
+
+    def wait_for_close(self):
+        close_time = self.next_close()
+        self.sleep(max(0.0, close_time - self.clock()) + self.CLOSE_DELAY)
+        return dt.datetime.fromtimestamp(close_time, tz=dt.timezone.utc)
+
+    def in_session(self, close_time):
+        """Whether the market was open for the candle closing at close_time."""
+        return market_open(close_time.timestamp() - 1)
+
+    def __repr__(self):
+        return f"CandleScheduler({self.granularity} every {self.interval}s)"
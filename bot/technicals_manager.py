@@ -58,11 +58,43 @@ def apply_TP(row, trade_settings: TradeSettings):
     return defs.NONE
 
 
+def apply_signal_vectorized(df: pd.DataFrame, trade_settings: TradeSettings):
+    bb_settings = trade_settings.bollinger_bands_settings
+
+    bb_ok = (df.SPREAD <= bb_settings['maxspread']) & (
+        df.GAIN >= bb_settings['mingain'])
+    bb_signal = np.select(
+        [bb_ok & (df.mid_c > df.BB_UP) & (df.mid_o < df.BB_UP),
+         bb_ok & (df.mid_c < df.BB_LW) & (df.mid_o > df.BB_LW)],
+        [defs.SELL, defs.BUY],
+        default=defs.NONE
+    )
+    ichimoku_signal = np.select(
+        [(df.mid_c > df.Senkou_Span_A) & (df.mid_c > df.Senkou_Span_B),
+         (df.mid_c < df.Senkou_Span_A) & (df.mid_c < df.Senkou_Span_B)],
+        [defs.BUY, defs.SELL],
+        default=defs.NONE
+    )
+    return np.where(bb_signal == ichimoku_signal, bb_signal, defs.NONE)
+
+
+def apply_TP_SL_vectorized(df: pd.DataFrame, trade_settings: TradeSettings):
+    distance = df.ATR * trade_settings.bollinger_bands_settings['riskreward']
+    is_buy = df.SIGNAL == defs.BUY
+    is_sell = df.SIGNAL == defs.SELL
+    tp = np.select([is_buy, is_sell], [df.mid_c + distance,
+                   df.mid_c - distance], default=defs.NONE)
+    sl = np.select([is_buy, is_sell], [df.mid_c - distance,
+                   df.mid_c + distance], default=defs.NONE)
+    return tp, sl
+
+
 def fetch_candles(pair, row_count, candle_time, granularity, api: OandaApi, log_message, attempts=3):
     for _ in range(attempts):
         row_count = int(row_count)
 
-        df = api.get_candles_df(pair, count=row_count, granularity=granularity)
+        df = api.get_candles_dataframe(
+            pair, count=row_count, granularity=granularity)
 
         if df is not None and df.shape[0] != 0 and df.iloc[-1].time == candle_time:
             return df
@@ -110,10 +142,8 @@ def process_candles(df: pd.DataFrame, pair, trade_settings: TradeSettings, log_m
                                        df.Senkou_Span_A) + abs(df.mid_c - df.CMF)
     )
 
-    df['SIGNAL'] = df.apply(apply_signal, axis=1,
-                            trade_settings=trade_settings)
-    df['TP'] = df.apply(apply_TP, axis=1, trade_settings=trade_settings)
-    df['SL'] = df.apply(apply_SL, axis=1, trade_settings=trade_settings)
+    df['SIGNAL'] = apply_signal_vectorized(df, trade_settings)
+    df['TP'], df['SL'] = apply_TP_SL_vectorized(df, trade_settings)
     df['LOSS'] = abs(df.mid_c - df.SL)
 
     log_cols = ['PAIR', 'time', 'mid_c', 'mid_o',
@@ -123,8 +153,8 @@ def process_candles(df: pd.DataFrame, pair, trade_settings: TradeSettings, log_m
     return df[log_cols].iloc[-1]
 
 
-def get_trade_decision(candle_time, pair, granularity, api: OandaApi, trade_settings: TradeSettings, log_message):
-    max_rows = (
+def get_max_rows(trade_settings: TradeSettings):
+    return (
         trade_settings.bollinger_bands_settings['n_ma']
         + trade_settings.ichimoku_cloud_settings['n1']
         + trade_settings.ichimoku_cloud_settings['n3']
@@ -132,11 +162,19 @@ def get_trade_decision(candle_time, pair, granularity, api: OandaApi, trade_sett
         + ADDROWS
     )
 
+
+def get_trade_decision(candle_time, pair, granularity, api: OandaApi, trade_settings: TradeSettings, log_message,
+                       candles: pd.DataFrame = None):
+    max_rows = get_max_rows(trade_settings)
+
     log_message(
         f"tech_manager: max_rows:{max_rows} candle_time:{candle_time} granularity:{granularity}", pair)
 
-    df = fetch_candles(pair, max_rows, candle_time,
-                       granularity, api, log_message)
+    if candles is not None and candles.shape[0] >= max_rows and candles.iloc[-1].time == candle_time:
+        df = candles
+    else:
+        df = fetch_candles(pair, max_rows, candle_time,
+                           granularity, api, log_message)
 
     if df is not None:
         last_row = process_candles(df, pair, trade_settings, log_message)
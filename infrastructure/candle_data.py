@@ -0,0 +1,121 @@
+import os
+import numpy as np
+import pandas as pd
+from infrastructure.candle_store import candleStore
+from infrastructure.candle_resample import BASE_GRANULARITY, load_resampled
+
+# Loading candle CSVs, optionally in compact dtypes: float32 prices and
+# indicator columns, int32 volume and time as int64 seconds since the epoch
+# (UTC). That is less than half the memory of the float64 / datetime frames,
+# so several simulation processes fit side by side.
+#
+# float32 keeps about 7 significant digits. Rounding back to the quoted
+# precision (restore_candles with decimals) gives the exact float64 prices;
+# signal_mismatches() compares a strategy's signals on both paths.
+#
+# load_candles reads from the columnar store (infrastructure/candle_store.py)
+# when the series has been migrated there and falls back to the CSV. Any
+# other granularity is resampled from the stored M5 candles.
+
+CANDLES_PATH = "./data/candles"
+PRICE_DTYPE = np.float32
+VOLUME_DTYPE = np.int32
+TIME_DTYPE = np.int64
+PRICE_PREFIXES = ('mid_', 'bid_', 'ask_')
+
+
+def is_compact(df: pd.DataFrame):
+    return 'time' in df.columns and pd.api.types.is_integer_dtype(df.time)
+
+
+def epoch_seconds(times):
+    return (pd.to_datetime(times, utc=True).astype('datetime64[ns, UTC]')
+            .astype(np.int64) // 10**9).astype(TIME_DTYPE)
+
+
+def to_datetime(times):
+    """Parses a time column whether it is compact (epoch seconds) or not."""
+    if pd.api.types.is_integer_dtype(times):
+        return pd.to_datetime(times, unit='s', utc=True)
+    return pd.to_datetime(times)
+
+
+def compact_candles(df: pd.DataFrame):
+    """Converts df in place: float64 columns (prices and indicators) to
+    float32, volume to int32 and time to epoch seconds."""
+    for c in df.columns:
+        if c == 'time':
+            if not is_compact(df):
+                df[c] = epoch_seconds(df[c]).to_numpy()
+        elif c == 'volume':
+            df[c] = df[c].astype(VOLUME_DTYPE)
+        elif df[c].dtype == np.float64:
+            df[c] = df[c].astype(PRICE_DTYPE)
+    return df
+
+
+def restore_candles(df: pd.DataFrame, decimals=None):
+    """float64 / datetime copy of a compact frame. With decimals the prices
+    are rounded back to their quoted precision, which undoes the float32
+    rounding exactly."""
+    df = df.copy()
+    for c in df.columns:
+        if c == 'time':
+            df[c] = to_datetime(df[c])
+        elif c == 'volume':
+            df[c] = df[c].astype(np.int64)
+        elif df[c].dtype == PRICE_DTYPE:
+            df[c] = df[c].astype(np.float64)
+            if decimals is not None and c.startswith(PRICE_PREFIXES):
+                df[c] = df[c].round(decimals)
+    return df
+
+
+def load_candles(pair, granularity, compact=False, date_from=None, date_to=None,
+                 path=CANDLES_PATH, store=candleStore):
+    if store is not None and store.exists(pair, granularity):
+        return load_stored_candles(store, pair, granularity, compact, date_from, date_to)
+    filename = f"{path}/{pair}_{granularity}.csv"
+    if store is not None and not os.path.exists(filename) and store.exists(pair, BASE_GRANULARITY):
+        df = load_resampled(pair, granularity, date_from, date_to, store)
+        return compact_candles(df) if compact else df
+    if compact:
+        header = pd.read_csv(filename, nrows=0).columns
+        dtype = {c: PRICE_DTYPE for c in header if c.startswith(PRICE_PREFIXES)}
+        dtype['volume'] = VOLUME_DTYPE
+        df = pd.read_csv(filename, dtype=dtype)
+    else:
+        df = pd.read_csv(filename)
+    df['time'] = pd.to_datetime(df['time'], utc=True)
+    if date_from is not None:
+        df = df[df.time >= date_from]
+    if date_to is not None:
+        df = df[df.time < date_to]
+    df.reset_index(drop=True, inplace=True)
+    if compact:
+        df = compact_candles(df)
+    return df
+
+
+def load_stored_candles(store, pair, granularity, compact=False, date_from=None, date_to=None):
+    if not compact:
+        return store.read(pair, granularity, date_from, date_to)
+    arrays = store.read_arrays(pair, granularity, date_from, date_to)
+    return compact_candles(pd.DataFrame({c: np.array(v) for c, v in arrays.items()}))
+
+
+def memory_usage(df: pd.DataFrame):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def signal_mismatches(df: pd.DataFrame, build, column='SIGNAL', decimals=None):
+    """Runs build (df -> df with a signal column) on the float64 frame and
+    on its compact version and returns the rows where the signals differ."""
+    df_64 = build(df.copy())
+    df_32 = build(restore_candles(compact_candles(df.copy()), decimals)) \
+        if decimals is not None else build(compact_candles(df.copy()))
+    s_64 = df_64[column].to_numpy()
+    s_32 = df_32[column].to_numpy()
+    if s_64.shape != s_32.shape:
+        raise ValueError(f"signal lengths differ: {s_64.shape} {s_32.shape}")
+    return np.flatnonzero((s_64 != s_32) & ~(pd.isna(s_64) & pd.isna(s_32)))
@@ -0,0 +1,128 @@
+import re
+import numpy as np
+import pandas as pd
+from infrastructure.candle_store import CandleStore, candleStore, to_epoch
+
+# Builds higher timeframes from stored M5 candles instead of downloading
+# each granularity. Candles are bucketed the way OANDA aligns them: every
+# granularity divides the trading day that starts at 17:00 New York time,
+# so H2, H4, H8 and D move by an hour in UTC when New York changes between
+# EST and EDT. The market is closed over those changes, so one bucket never
+# spans two offsets.
+#
+# Open is the first M5 open, high/low the extremes, close the last close and
+# volume (tick count) the sum, which is what OANDA builds from the same
+# ticks. resample_mismatches() compares against downloaded candles.
+#
+#   df_h4 = resample_candles(df_m5, "H4")
+#   df_h4 = load_resampled("EUR_USD", "H4", date_from, date_to)
+
+BASE_GRANULARITY = "M5"
+ALIGNMENT_TIMEZONE = "America/New_York"
+DAILY_ALIGNMENT = 17
+PRICES = ['mid', 'bid', 'ask']
+OHLC = ['o', 'h', 'l', 'c']
+
+
+def granularity_seconds(granularity):
+    """M15, H4, D, D1... -> bucket length in seconds"""
+    match = re.fullmatch(r"([SMHD])(\d*)", granularity)
+    if match is None:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    unit, count = match.group(1), int(match.group(2) or 1)
+    return count * dict(S=1, M=60, H=3600, D=86400)[unit]
+
+
+def utc_offsets(times):
+    """Seconds the New York wall clock is ahead of UTC at each epoch time."""
+    wall = pd.to_datetime(times, unit='s', utc=True).tz_convert(ALIGNMENT_TIMEZONE).tz_localize(None)
+    return np.asarray(wall.astype('datetime64[ns]').astype(np.int64)) // 10**9 - times
+
+
+def bucket_starts(times, granularity):
+    """UTC epoch seconds of the OANDA candle each epoch time falls in."""
+    step = granularity_seconds(granularity)
+    if step > 86400 or 86400 % step:
+        raise ValueError(f"{granularity} does not divide the trading day")
+    times = np.asarray(times, dtype=np.int64)
+    offsets = utc_offsets(times)
+    starts = times - (times + offsets - DAILY_ALIGNMENT * 3600) % step
+    # a DST change inside the candle: its start is on the other offset
+    return starts - (utc_offsets(starts) - offsets)
+
+
+def resample_arrays(arrays: dict, granularity, complete=True, base=BASE_GRANULARITY):
+    """arrays: 'time' (epoch seconds, sorted) plus any of volume and
+    {mid,bid,ask}_{o,h,l,c}. Returns the same keys for the resampled candles.
+    With complete the last bucket is dropped if the base candles stop
+    before it ends."""
+    time = np.asarray(arrays['time'], dtype=np.int64)
+    if time.shape[0] == 0:
+        return {k: np.asarray(v)[:0] for k, v in arrays.items()}
+    buckets = bucket_starts(time, granularity)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], time.shape[0]] - 1
+
+    out = {'time': buckets[starts]}
+    for name, values in arrays.items():
+        values = np.asarray(values)
+        if name == 'volume':
+            out[name] = np.add.reduceat(values, starts)
+        elif name.endswith('_o'):
+            out[name] = values[starts]
+        elif name.endswith('_h'):
+            out[name] = np.maximum.reduceat(values, starts)
+        elif name.endswith('_l'):
+            out[name] = np.minimum.reduceat(values, starts)
+        elif name.endswith('_c'):
+            out[name] = values[ends]
+
+    if complete:
+        if time[-1] + granularity_seconds(base) < out['time'][-1] + granularity_seconds(granularity):
+            out = {k: v[:-1] for k, v in out.items()}
+    return out
+
+
+def resample_candles(df: pd.DataFrame, granularity, complete=True, base=BASE_GRANULARITY):
+    """df of M5 (or any finer) candles -> df of granularity candles. time can
+    be datetimes or compact epoch seconds and comes back the same way."""
+    compact = pd.api.types.is_integer_dtype(df.time)
+    arrays = {c: df[c].to_numpy() for c in df.columns
+              if c == 'volume' or c[:-2] in PRICES and c[-1] in OHLC}
+    arrays['time'] = df.time.to_numpy() if compact else to_epoch(df.time)
+    out = resample_arrays(arrays, granularity, complete, base)
+    columns = ['time'] + [c for c in df.columns if c in out and c != 'time']
+    resampled = pd.DataFrame({c: out[c] for c in columns})
+    if not compact:
+        resampled['time'] = pd.to_datetime(resampled['time'], unit='s', utc=True)
+    return resampled
+
+
+def load_resampled(pair, granularity, date_from=None, date_to=None,
+                   store: CandleStore = candleStore, base=BASE_GRANULARITY):
+    """granularity candles built from the stored base series. Buckets cut
+    by date_from or date_to are left out."""
+    arrays = store.read_arrays(pair, base, date_from, date_to)
+    out = resample_arrays(arrays, granularity, base=base)
+    if date_from is not None and out['time'].shape[0] and out['time'][0] < to_epoch(date_from):
+        out = {k: v[1:] for k, v in out.items()}
+    df = pd.DataFrame(out)
+    df['time'] = pd.to_datetime(df['time'], unit='s', utc=True)
+    return df
+
+
+def resample_mismatches(resampled: pd.DataFrame, downloaded: pd.DataFrame, decimals=None):
+    """Rows (on time) where resampled and downloaded candles disagree, plus
+    candles only one side has. Prices are compared after rounding to
+    decimals when given."""
+    merged = resampled.merge(downloaded, on='time', how='outer',
+                             suffixes=('_res', '_dl'), indicator=True)
+    bad = merged['_merge'] != 'both'
+    for c in resampled.columns:
+        if c == 'time' or f"{c}_dl" not in merged.columns:
+            continue
+        a, b = merged[f"{c}_res"], merged[f"{c}_dl"]
+        if decimals is not None and c != 'volume':
+            a, b = a.round(decimals), b.round(decimals)
+        bad |= (a != b) & merged['_merge'].eq('both')
+    return merged[bad]
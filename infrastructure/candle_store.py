@@ -0,0 +1,217 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+# Columnar on-disk candle store, one directory per pair and granularity:
+#
+#   ./data/store/EUR_USD_M5/meta.json    {"rows": N, "columns": {"time": "<i8", ...}}
+#   ./data/store/EUR_USD_M5/time.bin     int64 seconds since the epoch (UTC), sorted
+#   ./data/store/EUR_USD_M5/mid_c.bin    ...one raw array per column
+#
+# Columns are read with np.memmap, so read_arrays() returns views of the
+# files without copying, and a time range is two searchsorted calls on the
+# time column. Appends write the new bytes first and then replace
+# meta.json, so an interrupted append leaves the series as it was. Writes
+# build the series in {series}.tmp and swap it in through {series}.old; a
+# series left in .old by an interrupted swap is moved back on next access.
+#
+#   candleStore.migrate_csvs()                      # once, from ./data/candles
+#   df = candleStore.read("EUR_USD", "M5", date_from, date_to)
+
+STORE_PATH = "./data/store"
+CANDLES_PATH = "./data/candles"
+META_FILE = "meta.json"
+
+
+def to_epoch(times):
+    """Seconds since the epoch for datetimes, ISO strings or epoch ints,
+    either a single value or a column."""
+    if isinstance(times, (pd.Series, pd.Index, np.ndarray, list)):
+        if isinstance(times, list):
+            times = np.asarray(times)
+        if pd.api.types.is_integer_dtype(times.dtype):
+            return np.asarray(times, dtype=np.int64)
+        return pd.DatetimeIndex(pd.to_datetime(times, utc=True)).as_unit('s').asi8
+    if isinstance(times, (int, np.integer)):
+        return int(times)
+    ts = pd.Timestamp(times)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize('UTC')
+    return ts.value // 10**9
+
+
+class CandleStore:
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+
+    def series_path(self, pair, granularity):
+        return os.path.join(self.path, f"{pair}_{granularity}")
+
+    def restore(self, final):
+        """A write that died between moving the series aside and moving the
+        new one in leaves the only copy in {final}.old; moves it back.
+        Returns whether it did."""
+        old = f"{final}.old"
+        if os.path.exists(final) or not os.path.isdir(old):
+            return False
+        os.replace(old, final)
+        return True
+
+    def meta(self, pair, granularity):
+        path = self.series_path(pair, granularity)
+        self.restore(path)
+        try:
+            with open(os.path.join(path, META_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def exists(self, pair, granularity):
+        return self.meta(pair, granularity) is not None
+
+    def series(self):
+        if not os.path.isdir(self.path):
+            return []
+        for name in os.listdir(self.path):
+            if name.endswith(".old"):
+                self.restore(os.path.join(self.path, name[:-4]))
+        # .tmp / .old directories are writes in progress, not series
+        return sorted(name for name in os.listdir(self.path)
+                      if '.' not in name and os.path.isfile(os.path.join(self.path, name, META_FILE)))
+
+    def column(self, pair, granularity, name, meta=None):
+        meta = meta or self.meta(pair, granularity)
+        if meta is None:
+            raise FileNotFoundError(f"{pair} {granularity} not in store {self.path}")
+        dtype = np.dtype(meta['columns'][name])
+        if meta['rows'] == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.series_path(pair, granularity), f"{name}.bin"),
+                         dtype=dtype, mode='r', shape=(meta['rows'],))
+
+    def row_range(self, pair, granularity, date_from=None, date_to=None, meta=None):
+        times = self.column(pair, granularity, 'time', meta)
+        start = 0 if date_from is None else int(np.searchsorted(times, to_epoch(date_from), 'left'))
+        end = times.shape[0] if date_to is None else int(np.searchsorted(times, to_epoch(date_to), 'left'))
+        return start, max(start, end)
+
+    def read_arrays(self, pair, granularity, date_from=None, date_to=None, columns=None):
+        """Read-only views of the columns for date_from <= time < date_to,
+        time as epoch seconds."""
+        meta = self.meta(pair, granularity)
+        start, end = self.row_range(pair, granularity, date_from, date_to, meta)
+        columns = list(meta['columns']) if columns is None else columns
+        return {c: self.column(pair, granularity, c, meta)[start:end] for c in columns}
+
+    def read(self, pair, granularity, date_from=None, date_to=None, columns=None):
+        """DataFrame for date_from <= time < date_to with time as UTC datetimes."""
+        arrays = self.read_arrays(pair, granularity, date_from, date_to, columns)
+        df = pd.DataFrame({c: np.array(v) for c, v in arrays.items()})
+        if 'time' in df.columns:
+            df['time'] = pd.to_datetime(df['time'], unit='s', utc=True)
+        return df
+
+    def time_range(self, pair, granularity):
+        times = self.column(pair, granularity, 'time')
+        if times.shape[0] == 0:
+            return None, None
+        return (pd.to_datetime(int(times[0]), unit='s', utc=True),
+                pd.to_datetime(int(times[-1]), unit='s', utc=True))
+
+    def prepare(self, df: pd.DataFrame):
+        df = df.drop(columns=[c for c in df.columns if c.startswith('Unnamed')])
+        df['time'] = to_epoch(df['time'])
+        return df.sort_values('time', kind='stable').drop_duplicates(subset=['time'], keep='last')
+
+    def write(self, pair, granularity, df: pd.DataFrame):
+        """Replaces the series with df."""
+        df = self.prepare(df)
+        final = self.series_path(pair, granularity)
+        tmp = f"{final}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        columns = {}
+        for c in df.columns:
+            values = np.ascontiguousarray(df[c].to_numpy())
+            if values.dtype == object:
+                raise ValueError(f"column {c} is not numeric")
+            values.tofile(os.path.join(tmp, f"{c}.bin"))
+            columns[c] = values.dtype.str
+        self.write_meta(tmp, dict(rows=int(df.shape[0]), columns=columns))
+        old = f"{final}.old"
+        # left over if an earlier write died between the two renames: the
+        # only copy of the series if final is missing, stale otherwise
+        self.restore(final)
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(final):
+            os.replace(final, old)
+        os.replace(tmp, final)
+        shutil.rmtree(old, ignore_errors=True)
+        return df.shape[0]
+
+    def append(self, pair, granularity, df: pd.DataFrame):
+        """Adds the candles in df. Candles already stored (same time) are
+        skipped, later ones are appended in place and only candles missing
+        from before the last stored one force a merge and rewrite.
+        Returns the number of candles stored after the call."""
+        meta = self.meta(pair, granularity)
+        if meta is None:
+            return self.write(pair, granularity, df)
+        df = self.prepare(df)
+        missing = set(meta['columns']) - set(df.columns)
+        if missing:
+            raise ValueError(f"{pair} {granularity} append is missing columns {missing}")
+        times = self.column(pair, granularity, 'time', meta)
+        last = int(times[-1]) if times.shape[0] else None
+        if last is not None:
+            new_times = df.time.to_numpy()
+            idx = np.minimum(np.searchsorted(times, new_times), times.shape[0] - 1)
+            df = df[times[idx] != new_times]
+        if df.shape[0] == 0:
+            return meta['rows']
+        if last is not None and (df.time <= last).any():
+            stored = pd.DataFrame({c: np.array(self.column(pair, granularity, c, meta))
+                                   for c in meta['columns']})
+            merged = pd.concat([stored, df[list(meta['columns'])]])
+            return self.write(pair, granularity, merged)
+
+        path = self.series_path(pair, granularity)
+        for c, dtype in meta['columns'].items():
+            dtype = np.dtype(dtype)
+            with open(os.path.join(path, f"{c}.bin"), "r+b" if meta['rows'] else "wb") as f:
+                # drop bytes of an earlier append that never reached meta.json
+                f.truncate(meta['rows'] * dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(df[c].to_numpy(dtype=dtype)).tobytes())
+        meta['rows'] += int(df.shape[0])
+        self.write_meta(path, meta)
+        return meta['rows']
+
+    def write_meta(self, path, meta):
+        tmp = os.path.join(path, f"{META_FILE}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, META_FILE))
+
+    def migrate_csvs(self, csv_path=CANDLES_PATH, overwrite=False):
+        """One-shot import of {pair}_{granularity}.csv files."""
+        migrated = []
+        for name in sorted(os.listdir(csv_path)):
+            if not name.endswith(".csv"):
+                continue
+            pair, _, granularity = name[:-4].rpartition("_")
+            if not pair or (self.exists(pair, granularity) and not overwrite):
+                continue
+            rows = self.write(pair, granularity, pd.read_csv(os.path.join(csv_path, name)))
+            print(f"{pair} {granularity} --> {rows} candles")
+            migrated.append((pair, granularity))
+        return migrated
+
+    def __repr__(self):
+        return f"CandleStore() {self.path} {len(self.series())} series"
+
+
+candleStore = CandleStore()
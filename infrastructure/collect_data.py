@@ -2,13 +2,23 @@ from typing import List
 import pandas as pd
 import datetime as dt
 from dateutil import parser
+import json
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from infrastructure.instrument_collection import InstrumentCollection
+from infrastructure.candle_store import CandleStore, candleStore
+from infrastructure.candle_resample import bucket_starts, granularity_seconds
 from api.oanda_api import OandaApi
 
 logging.basicConfig(level=logging.INFO)
 
+# Historical candles go straight into the candle store. A manifest next to
+# the store records which time ranges each series has already fetched, so a
+# run only asks OANDA for the gaps and an interrupted run resumes from the
+# last stored page. Series are collected in parallel on a thread pool.
+
 CANDLE_COUNT = 3000
 
 INCREMENTS = {
@@ -29,101 +39,166 @@ INCREMENTS = {
 
 CURRENCIES = ["AUD", "CAD", "JPY", "USD", "EUR", "GBP",
               "NZD", "SEK", "CHF", "CNY", "HKD", "IDR", "INR"]
-GRANULARITIES = ["M5", "M15", "M30", "H1", "H2", "H4"]
+# higher timeframes are resampled from M5 (infrastructure/candle_resample.py)
+GRANULARITIES = ["M5"]
+MANIFEST_FILE = "collect_manifest.json"
+MAX_WORKERS = 8
 
 
 def generate_currency_pairs(currencies: List[str]) -> List[str]:
     return [f"{p1}_{p2}" for p1 in currencies for p2 in currencies if p1 != p2]
 
 
-def save_file(final_df: pd.DataFrame, file_prefix, granularity, pair):
-    filename = f"{file_prefix}{pair}_{granularity}.csv"
-    final_df.drop_duplicates(subset=['time'], inplace=True)
-    final_df.sort_values(by='time', inplace=True)
-    final_df.reset_index(drop=True, inplace=True)
-    final_df.to_csv(filename)
-    logging.info(
-        f"*** {pair} {granularity} {final_df.time.min()} {final_df.time.max()} --> {final_df.shape[0]} candles ***")
+def to_utc(date) -> dt.datetime:
+    if isinstance(date, str):
+        date = parser.parse(date)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=dt.timezone.utc)
+    return date.astimezone(dt.timezone.utc)
+
 
+def from_epoch(seconds) -> dt.datetime:
+    return dt.datetime.fromtimestamp(seconds, tz=dt.timezone.utc)
 
-def fetch_candles(pair, granularity, date_f: dt.datetime, date_t: dt.datetime, api: OandaApi):
-    attempts = 0
-    while attempts < 3:
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(covered, start, end):
+    """Parts of [start, end) not inside the sorted, merged covered ranges."""
+    gaps = []
+    for c_start, c_end in covered:
+        if c_end <= start:
+            continue
+        if c_start >= end:
+            break
+        if c_start > start:
+            gaps.append((start, c_start))
+        start = max(start, c_end)
+    if start < end:
+        gaps.append((start, end))
+    return gaps
+
+
+class CollectionManifest:
+    """Time ranges (epoch seconds, end exclusive) already fetched for each
+    series, including ranges that returned no candles such as weekends.
+    Saved after every page so an interrupted run carries on where it
+    stopped."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = threading.Lock()
         try:
-            candles_df = api.get_candles_df(
-                pair,
-                granularity=granularity,
-                date_f=date_f,
-                date_t=date_t
-            )
-            if candles_df is not None:
+            with open(filename) as f:
+                self.ranges = json.load(f)
+        except FileNotFoundError:
+            self.ranges = {}
+
+    def covered(self, series):
+        with self.lock:
+            return [tuple(r) for r in self.ranges.get(series, [])]
+
+    def add(self, series, start, end):
+        with self.lock:
+            self.ranges[series] = merge_ranges(self.ranges.get(series, []) + [[start, end]])
+            tmp = f"{self.filename}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.ranges, f)
+            os.replace(tmp, self.filename)
+
+
+def collect_data(pair, granularity, date_f, date_t, api: OandaApi,
+                 store: CandleStore = candleStore, manifest: CollectionManifest = None):
+    """Fetches the parts of [date_f, date_t) not yet in the manifest and
+    appends them to the store page by page."""
+    series = f"{pair}_{granularity}"
+    manifest = manifest or CollectionManifest(os.path.join(store.path, MANIFEST_FILE))
+    start = int(to_utc(date_f).timestamp())
+    end = int(min(to_utc(date_t), dt.datetime.now(dt.timezone.utc)).timestamp())
+
+    if not manifest.covered(series) and store.exists(pair, granularity):
+        # series migrated from csv: trust what is already stored
+        first, last = store.time_range(pair, granularity)
+        if first is not None:
+            # covered up to the start of the candle after the last one
+            manifest.add(series, int(first.timestamp()),
+                         int(last.timestamp()) + granularity_seconds(granularity))
+
+    gaps = missing_ranges(manifest.covered(series), start, end)
+    if not gaps:
+        logging.info(f"{pair} {granularity} --> Data already exists. Skipping...")
+        return 0
+
+    time_step = INCREMENTS[granularity] * 60
+    loaded = 0
+    for gap_start, gap_end in gaps:
+        stored_last = store.time_range(pair, granularity)[1] if store.exists(pair, granularity) else None
+        # pages before the stored data would each force a rewrite of the
+        # series, so those are stored once the whole gap is in
+        in_order = stored_last is None or gap_start > stored_last.timestamp()
+        pending = []
+        # start on a candle boundary; OANDA returns the candle covering
+        # from, which append drops if it is already stored
+        from_date = int(bucket_starts([gap_start], granularity)[0])
+        while from_date < gap_end:
+            to_date = min(from_date + time_step, gap_end)
+            candles = api.fetch_candles_job((pair, granularity, (from_epoch(from_date), from_epoch(to_date))))
+            if candles is None:
+                logging.error(f"{pair} {granularity} {from_epoch(from_date)} to {from_epoch(to_date)} --> FAILED")
                 break
-        except Exception as e:
-            logging.error(f"Error fetching candles: {e}")
-            attempts += 1
-
-    if candles_df is not None and not candles_df.empty:
-        return candles_df
-    else:
-        return None
-
-
-def collect_data(pair, granularity, date_f, date_t, file_prefix, api: OandaApi):
-    time_step = INCREMENTS[granularity]
-    end_date = parser.parse(date_t)
-    from_date = parser.parse(date_f)
-    candle_dfs = []
-    to_date = from_date
-
-    while to_date < end_date:
-        to_date = from_date + dt.timedelta(minutes=time_step)
-        if to_date > end_date:
-            to_date = end_date
-        filename = f"{file_prefix}{pair}_{granularity}.csv"
-
-        if os.path.exists(filename):
-            existing_data = pd.read_csv(filename)
-
-            if (existing_data['time'] >= from_date.isoformat()).any() and (existing_data['time'] <= to_date.isoformat()).any():
-                logging.info(
-                    f"{pair} {granularity} {from_date} to {to_date} --> Data already exists. Skipping...")
-                return
-
-        candles = fetch_candles(
-            pair,
-            granularity,
-            from_date,
-            to_date,
-            api
-        )
-
-        if candles is not None:
-            candle_dfs.append(candles)
+            if candles.shape[0] > 0:
+                loaded += candles.shape[0]
+                if in_order:
+                    store.append(pair, granularity, candles)
+                else:
+                    pending.append(candles)
             logging.info(
-                f"{pair} {granularity} {from_date} to {to_date} --> {candles.shape[0]} candles loaded")
-        else:
-            logging.info(
-                f"{pair} {granularity} {from_date} to {to_date} --> NO CANDLES")
-
-        from_date = to_date
-
-    if len(candle_dfs) > 0:
-        final_df = pd.concat(candle_dfs)
-        save_file(final_df, file_prefix, granularity, pair)
-    else:
-        logging.info(f"{pair} {granularity} --> NO DATA SAVED!")
-
-
-def run_collection(ic: InstrumentCollection, api: OandaApi):
-    for pair in generate_currency_pairs(CURRENCIES):
-        if pair in ic.instruments_dict.keys():
-            for granularity in GRANULARITIES:
-                logging.info(f"Collecting data for {pair} {granularity}")
-                collect_data(
-                    pair,
-                    granularity,
-                    dt.datetime(2013, 1, 7).isoformat() + "Z",
-                    dt.datetime(2023, 11, 30).isoformat() + "Z",
-                    "./data/candles/",
-                    api
-                )
+                f"{pair} {granularity} {from_epoch(from_date)} to {from_epoch(to_date)} --> {candles.shape[0]} candles loaded")
+            if in_order:
+                manifest.add(series, from_date, to_date)
+            from_date = to_date
+
+        if not in_order and from_date > gap_start:
+            if pending:
+                store.append(pair, granularity, pd.concat(pending))
+            manifest.add(series, gap_start, from_date)
+
+    logging.info(f"*** {pair} {granularity} --> {loaded} candles stored ***")
+    return loaded
+
+
+def collection_jobs(ic: InstrumentCollection, currencies=CURRENCIES, granularities=GRANULARITIES):
+    return [(pair, granularity) for pair in generate_currency_pairs(currencies)
+            if pair in ic.instruments_dict.keys() for granularity in granularities]
+
+
+def run_collection(ic: InstrumentCollection, api: OandaApi,
+                   date_f=dt.datetime(2013, 1, 7), date_t=dt.datetime(2023, 11, 30),
+                   store: CandleStore = candleStore, max_workers=MAX_WORKERS):
+    """Collects every pair x granularity on a thread pool. Requests go
+    through the api's rate limiter, so more workers only keep it busy."""
+    os.makedirs(store.path, exist_ok=True)
+    manifest = CollectionManifest(os.path.join(store.path, MANIFEST_FILE))
+    jobs = collection_jobs(ic)
+
+    def collect(job):
+        pair, granularity = job
+        try:
+            return collect_data(pair, granularity, date_f, date_t, api, store, manifest)
+        except Exception as error:
+            logging.error(f"{pair} {granularity} collection failed: {error}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = dict(zip(jobs, executor.map(collect, jobs)))
+    failed = [job for job, loaded in results.items() if loaded is None]
+    logging.info(f"Collection done: {len(jobs) - len(failed)} series, {len(failed)} failed {failed}")
+    return results
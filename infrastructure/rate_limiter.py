@@ -0,0 +1,186 @@
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# The token buckets are kept in a small file under an exclusive lock, so
+# every process on the machine (the bot, candle collection, a backtest
+# pulling history) draws from one OANDA budget instead of each spending the
+# whole of it. metrics() only counts this process's requests. The bucket
+# times come from time.monotonic, which is the same clock in every process.
+
+CANDLES = "candles"
+PRICING = "pricing"
+ORDERS = "orders"
+ACCOUNT = "account"
+
+# requests per second, burst size
+BUDGETS = {
+    CANDLES: (20, 20),
+    PRICING: (20, 20),
+    ORDERS: (50, 50),
+    ACCOUNT: (20, 20),
+}
+# OANDA allows 120 requests per second, keep some headroom
+GLOBAL_BUDGET = (100, 100)
+# global tokens only priority (order) requests may use
+PRIORITY_RESERVE = 10
+SHARED_PATH = os.path.join(tempfile.gettempdir(), "oanda_rate_limiter")
+
+
+def endpoint_class(url):
+    if url.startswith("instruments/") and url.endswith("/candles"):
+        return CANDLES
+    if url.endswith("/pricing"):
+        return PRICING
+    if "/orders" in url or "/trades" in url or url.endswith("/openTrades"):
+        return ORDERS
+    return ACCOUNT
+
+
+class TokenBucket:
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = now
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens +
+                          (now - self.last) * self.rate)
+        self.last = now
+
+    def wait_time(self, needed):
+        return max(0.0, (needed - self.tokens) / self.rate)
+
+
+class RateLimiter:
+
+    def __init__(self, budgets=BUDGETS, global_budget=GLOBAL_BUDGET,
+                 priority_reserve=PRIORITY_RESERVE, clock=time.monotonic):
+        self.clock = clock
+        now = clock()
+        self.buckets = {k: TokenBucket(rate, capacity, now)
+                        for k, (rate, capacity) in budgets.items()}
+        self.global_bucket = TokenBucket(*global_budget, now)
+        self.priority_reserve = priority_reserve
+        self.lock = threading.Lock()
+        self.stats = {k: dict(requests=0, waited=0, total_wait=0.0, max_wait=0.0)
+                      for k in budgets}
+
+    def take(self, endpoint, priority):
+        now = self.clock()
+        bucket = self.buckets[endpoint]
+        bucket.refill(now)
+        self.global_bucket.refill(now)
+        needed = 1 if priority else 1 + self.priority_reserve
+        wait = max(bucket.wait_time(1), self.global_bucket.wait_time(needed))
+        if wait == 0.0:
+            bucket.tokens -= 1
+            self.global_bucket.tokens -= 1
+        return wait
+
+    def try_acquire(self, endpoint, priority=False):
+        """Takes a token for endpoint and returns 0.0, or returns the seconds
+        to wait before trying again."""
+        with self.lock:
+            return self.take(endpoint, priority)
+
+    def record(self, endpoint, waited):
+        with self.lock:
+            s = self.stats[endpoint]
+            s['requests'] += 1
+            if waited > 0:
+                s['waited'] += 1
+                s['total_wait'] += waited
+                s['max_wait'] = max(s['max_wait'], waited)
+
+    def acquire(self, endpoint, priority=False):
+        start = self.clock()
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(endpoint, priority)
+            if wait == 0.0:
+                break
+            time.sleep(wait)
+            waited = self.clock() - start
+        self.record(endpoint, waited)
+        return waited
+
+    def metrics(self):
+        with self.lock:
+            return {k: dict(v, mean_wait=v['total_wait'] / v['requests'] if v['requests'] else 0.0)
+                    for k, v in self.stats.items()}
+
+    def __repr__(self):
+        return f"RateLimiter() {self.metrics()}"
+
+
+class SharedRateLimiter(RateLimiter):
+    """RateLimiter whose bucket levels live in the file at path, shared by
+    every process that opens the same one. Each try_acquire reads the
+    levels, takes its token and writes them back under the file lock."""
+
+    def __init__(self, path=SHARED_PATH, budgets=BUDGETS, global_budget=GLOBAL_BUDGET,
+                 priority_reserve=PRIORITY_RESERVE, clock=time.monotonic):
+        super().__init__(budgets, global_budget, priority_reserve, clock)
+        self.path = path
+        self.order = [self.buckets[k] for k in sorted(self.buckets)] + [self.global_bucket]
+        self.layout = struct.Struct(f"<{2 * len(self.order)}d")
+
+    def locked_file(self):
+        # opened per call: a descriptor inherited through fork would share
+        # its flock with the parent
+        f = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666), "r+b")
+        try:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        except BaseException:
+            f.close()
+            raise
+        return f
+
+    def load(self, f):
+        data = f.read(self.layout.size)
+        if len(data) < self.layout.size:
+            # new file (or another budget layout): start from full buckets
+            return
+        values = self.layout.unpack(data)
+        if max(values[1::2]) > self.clock():
+            # written before a reboot reset the monotonic clock
+            return
+        for i, bucket in enumerate(self.order):
+            bucket.tokens, bucket.last = values[2 * i], values[2 * i + 1]
+
+    def save(self, f):
+        f.seek(0)
+        f.write(self.layout.pack(*[v for b in self.order for v in (b.tokens, b.last)]))
+        f.flush()
+
+    def try_acquire(self, endpoint, priority=False):
+        with self.lock:
+            f = self.locked_file()
+            try:
+                self.load(f)
+                wait = self.take(endpoint, priority)
+                if wait == 0.0:
+                    self.save(f)
+                return wait
+            finally:
+                if not fcntl:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+                f.close()
+
+
+rateLimiter = SharedRateLimiter()
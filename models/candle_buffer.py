@@ -0,0 +1,38 @@
+from collections import deque
+import pandas as pd
+
+
+class CandleBuffer:
+
+    def __init__(self, size):
+        self.size = size
+        self.rows = deque(maxlen=size)
+
+    @property
+    def last_time(self):
+        return self.rows[-1]['time'] if self.rows else None
+
+    def seed(self, df: pd.DataFrame):
+        self.rows.clear()
+        self.rows.extend(df.tail(self.size).to_dict('records'))
+
+    def extend(self, df: pd.DataFrame):
+        """Appends the candles in df newer than the buffer.
+        Returns False when df does not overlap the buffer, meaning candles
+        were missed and the buffer has to be seeded again."""
+        if not self.rows:
+            self.seed(df)
+            return True
+        if not (df.time == self.last_time).any():
+            return False
+        self.rows.extend(df[df.time > self.last_time].to_dict('records'))
+        return True
+
+    def to_dataframe(self):
+        return pd.DataFrame(list(self.rows))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return f"CandleBuffer() {len(self.rows)}/{self.size} last_time:{self.last_time}"
@@ -1,6 +1,7 @@
 import pandas as pd
 from dateutil import parser
 from technicals.indicators import MACD
+from infrastructure.candle_data import load_candles
 from simulation.guru_tester import GuruTester
 from infrastructure.instrument_collection import InstrumentCollection
 
@@ -41,17 +42,8 @@ def load_data(pair, time_d=1):
     start = parser.parse("2016-10-01T00:00:00Z")
     end = parser.parse("2021-01-01T00:00:00Z")
 
-    df = pd.read_csv(f"./data/candles/{pair}_H{time_d}.csv")
-    df_m5 = pd.read_csv(f"./data/candles/{pair}_M5.csv")
-
-    df['time'] = pd.to_datetime(df['time'])
-    df_m5['time'] = pd.to_datetime(df_m5['time'])
-
-    df = df[(df['time'] >= start) & (df['time'] < end)]
-    df_m5 = df_m5[(df_m5['time'] >= start) & (df_m5['time'] < end)]
-
-    df.reset_index(drop=True, inplace=True)
-    df_m5.reset_index(drop=True, inplace=True)
+    df = load_candles(pair, f"H{time_d}", date_from=start, date_to=end)
+    df_m5 = load_candles(pair, "M5", date_from=start, date_to=end)
 
     return df, df_m5
 
@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 import datetime as dt
+from infrastructure.candle_data import is_compact, restore_candles, to_datetime
+from simulation.trade_resolution import resolve_trades
 
 BUY = 1
 SELL = -1
@@ -39,7 +41,7 @@ def apply_signals(df, PROFIT_FACTOR, sig):
 
 def create_signals(df, time_d=1):
     df_signals = df[df.SIGNAL != NONE].copy()
-    df_signals['m5_start'] = pd.to_datetime(
+    df_signals['m5_start'] = to_datetime(
         df_signals['time']) + pd.to_timedelta(time_d, unit='hours')
 
     buy_condition = df_signals['SIGNAL'] == BUY
@@ -60,6 +62,19 @@ def create_signals(df, time_d=1):
     return df_signals
 
 
+def slim_m5(df_m5, use_spread=True, decimals=None):
+    """time and the bid/ask highs and lows trades are resolved on (the mid
+    ones without spread). Read only: float64 columns are used as they are,
+    so one slim frame can back every GuruTester on the same candles."""
+    prices = ['bid_h', 'bid_l', 'ask_h', 'ask_l']
+    sources = prices if use_spread else [f"mid_{c[-1]}" for c in prices]
+    df = pd.DataFrame({c: df_m5[s] for c, s in zip(['time'] + prices, ['time'] + sources)}, copy=False)
+    if is_compact(df):
+        return restore_candles(df, decimals)
+    df['time'] = to_datetime(df['time'])
+    return df
+
+
 class Trade:
     def __init__(self, row, profit_factor, loss_factor):
         self.running = True
@@ -114,11 +129,18 @@ class GuruTester:
                  use_spread=True,
                  LOSS_FACTOR=-1.0,
                  PROFIT_FACTOR=1.5,
-                 time_d=1):
-        self.df_big = df_big.copy()
+                 time_d=1,
+                 decimals=None,
+                 m5_slim=None):
+        # compact frames (infrastructure/candle_data.py) go back to float64,
+        # rounded to decimals so TP/SL comparisons match the float64 path
+        self.decimals = decimals
+        self.df_big = restore_candles(df_big, decimals) if is_compact(df_big) else df_big.copy()
         self.use_spread = use_spread
         self.apply_signal = apply_signal
-        self.df_m5 = df_m5.copy()
+        # m5_slim: slim_m5(df_m5) made by the caller once for many testers
+        self.df_m5 = df_m5
+        self.m5 = m5_slim
         self.LOSS_FACTOR = LOSS_FACTOR
         self.PROFIT_FACTOR = PROFIT_FACTOR
         self.time_d = time_d
@@ -128,27 +150,37 @@ class GuruTester:
     def prepare_data(self):
         if not self.use_spread:
             remove_spread_vectorized(self.df_big)
-            remove_spread_vectorized(self.df_m5)
 
         apply_signals(self.df_big, self.PROFIT_FACTOR, self.apply_signal)
 
-        df_m5_slim = self.df_m5[['time', 'bid_h',
-                                'bid_l', 'ask_h', 'ask_l']].copy()
+        if self.m5 is None:
+            self.m5 = slim_m5(self.df_m5, self.use_spread, self.decimals)
         df_signals = create_signals(self.df_big, time_d=self.time_d)
+        df_signals['time'] = to_datetime(df_signals['time'])
 
-        df_m5_slim['time'] = pd.to_datetime(df_m5_slim['time'])
-        df_signals['time'] = pd.to_datetime(df_signals['time'])
+        # the M5 row each trade starts on; signals without one are dropped
+        # as the left merge on time in merge_signals drops them
+        df_signals['m5_row'] = pd.Index(self.m5.time).get_indexer(df_signals.time)
+        self.signals = df_signals[df_signals.m5_row >= 0].fillna(0)
+        self.signals.SIGNAL = self.signals.SIGNAL.astype(int)
 
-        self.merged = pd.merge(
-            left=df_m5_slim, right=df_signals, on='time', how='left')
-        self.merged.fillna(0, inplace=True)
-        self.merged.SIGNAL = self.merged.SIGNAL.astype(int)
+    def merge_signals(self):
+        merged = pd.merge(left=self.m5, right=self.signals.drop(columns='m5_row'),
+                          on='time', how='left')
+        merged.fillna(0, inplace=True)
+        merged.SIGNAL = merged.SIGNAL.astype(int)
+        return merged
 
     def run_test(self):
+        self.df_results = resolve_trades(
+            self.m5, self.signals, self.PROFIT_FACTOR, self.LOSS_FACTOR)
+
+    def run_test_loop(self):
+        # row by row version of run_test, kept as its reference
         open_trades_m5 = []
         closed_trades_m5 = []
 
-        for index, row in self.merged.iterrows():
+        for index, row in self.merge_signals().iterrows():
             if row.SIGNAL != NONE:
                 open_trades_m5.append(
                     Trade(row, self.PROFIT_FACTOR, self.LOSS_FACTOR))
@@ -1,9 +1,15 @@
+import numpy as np
 import pandas as pd
 from infrastructure.instrument_collection import Instrument, InstrumentCollection as ic
 import os
 import pandas as pd
 from datetime import datetime
-from simulation.ma_excel import create_ma_result
+from infrastructure.candle_data import load_candles, is_compact, to_datetime
+try:
+    from simulation.ma_excel import create_ma_result
+except ImportError:
+    # ma_excel only has the ExcelStrategy stub so far
+    create_ma_result = None
 
 
 class MAResult:
@@ -109,7 +115,7 @@ def is_trade(row):
     return NONE
 
 
-def load_price_data(pair, granularity, ma_list):
+def load_price_data(pair, granularity, ma_list, compact=False, decimals=None):
     """
     Load price data from a saved pickle file and calculate moving averages.
 
@@ -117,18 +123,30 @@ def load_price_data(pair, granularity, ma_list):
     - pair (str): Name of the trading pair.
     - granularity (str): Granularity of the data.
     - ma_list (list): List of moving average periods to calculate.
+    - compact (bool): Load float32 prices, int32 volume and epoch-second times.
+    - decimals (int): Quoted price precision, used to restore exact prices in compact mode.
 
     Returns:
     pd.DataFrame: DataFrame containing loaded price data with calculated moving averages.
 
     Description:
-    This function reads price data from a pickle file located at "./data/{pair}_{granularity}.csv".
+    This function reads price data from the candle store, or from "./data/candles/{pair}_{granularity}.csv"
+    if the pair has not been migrated.
     It then calculates moving averages for each period in the ma_list and returns the resulting DataFrame.
+    In compact mode the moving averages are still computed and kept in float64 from the restored prices,
+    so the crosses are the same as with the float64 frame.
     """
-    df = pd.read_csv(f"./data/candles/{pair}_{granularity}.csv")
+    if compact:
+        df = load_candles(pair, granularity, compact=True)
+        mid_c = df.mid_c.astype(float)
+        if decimals is not None:
+            mid_c = mid_c.round(decimals)
+    else:
+        df = load_candles(pair, granularity)
+        mid_c = df.mid_c
 
     for ma in ma_list:
-        df[get_ma_col(ma)] = df.mid_c.rolling(window=ma).mean()
+        df[get_ma_col(ma)] = mid_c.rolling(window=ma).mean()
 
     df.dropna(inplace=True)
     df.reset_index(drop=True, inplace=True)
@@ -156,6 +174,9 @@ def get_trades(df_analysis, instrument, granularity):
     are added for further analysis.
     """
     df_trades = df_analysis[df_analysis.TRADE != NONE].copy()
+    if is_compact(df_trades):
+        df_trades["time"] = to_datetime(df_trades.time)
+        df_trades["mid_c"] = df_trades.mid_c.astype(float).round(instrument.displayPrecision + 1)
     df_trades["DIFF"] = df_trades.mid_c.diff().shift(-1)
     df_trades.fillna(0, inplace=True)
     df_trades["GAIN"] = df_trades.DIFF / instrument.pipLocation
@@ -203,6 +224,66 @@ def assess_pair(price_data, ma_l, ma_s, instrument, granularity):
     )
 
 
+# delta columns computed per pass of assess_pair_grid, (rows x combinations)
+MAX_GRID_ELEMENTS = 1 << 24
+
+
+def assess_pair_grid(price_data, ma_long, ma_short, instrument, granularity):
+    """
+    Assess every (ma_l, ma_s) combination with ma_l > ma_s in one go.
+
+    Parameters:
+    - price_data (pd.DataFrame): DataFrame from load_price_data with an MA column for every period.
+    - ma_long (list): Long-term moving average periods.
+    - ma_short (list): Short-term moving average periods.
+    - instrument: The financial instrument being traded.
+    - granularity (str): Granularity of the analysis.
+
+    Returns:
+    list: MAResult instances, the same and in the same order as calling assess_pair for each combination.
+
+    Description:
+    The moving averages are stacked into one (rows x periods) array. Indexing it with the short and the
+    long period of every combination gives all DELTA columns at once, and the crosses of every combination
+    come from comparing that array with itself shifted by one row. Only the rows with a cross are turned
+    back into frames for get_trades.
+    """
+    combinations = [(ma_l, ma_s) for ma_l in ma_long for ma_s in ma_short if ma_l > ma_s]
+    periods = sorted({p for c in combinations for p in c})
+    position = {p: i for i, p in enumerate(periods)}
+    mas = np.column_stack([price_data[get_ma_col(p)].to_numpy(dtype=np.float64) for p in periods]) \
+        if periods else np.empty((price_data.shape[0], 0))
+    rows = mas.shape[0]
+    step = max(1, MAX_GRID_ELEMENTS // max(1, rows))
+
+    results_list = []
+    for k in range(0, len(combinations), step):
+        chunk = combinations[k:k + step]
+        delta = mas[:, [position[s] for _, s in chunk]] - mas[:, [position[l] for l, _ in chunk]]
+        delta_prev = np.vstack([np.full((1, len(chunk)), np.nan), delta[:-1]])
+        trade = np.where((delta >= 0) & (delta_prev < 0), BUY,
+                         np.where((delta < 0) & (delta_prev >= 0), SELL, NONE))
+
+        for j, (ma_l, ma_s) in enumerate(chunk):
+            trade_rows = np.flatnonzero(trade[:, j])
+            df_analysis = price_data.iloc[trade_rows].copy()
+            df_analysis["DELTA"] = delta[trade_rows, j]
+            df_analysis["DELTA_PREV"] = delta_prev[trade_rows, j]
+            df_analysis["TRADE"] = trade[trade_rows, j]
+            df_trades = get_trades(df_analysis, instrument, granularity)
+            df_trades["ma_l"] = get_ma_col(ma_l)
+            df_trades["ma_s"] = get_ma_col(ma_s)
+            df_trades["cross"] = f"{get_ma_col(ma_s)}_{get_ma_col(ma_l)}"
+            results_list.append(MAResult(
+                df_trades,
+                instrument.name,
+                get_ma_col(ma_l),
+                get_ma_col(ma_s),
+                granularity
+            ))
+    return results_list
+
+
 def append_df_to_file(df, filename):
     """
     Append a DataFrame to a file or create a new file if it doesn't exist.
@@ -212,12 +293,18 @@ def append_df_to_file(df, filename):
     - filename (str): Name of the file to which the DataFrame will be appended or created.
 
     Description:
-    If the file already exists, the function reads its contents, concatenates the existing DataFrame
+    If the file already exists with the same columns, the rows of df are appended to it without reading
+    it back. If its columns differ, the function reads its contents, concatenates the existing DataFrame
     with the new DataFrame (df), resets the index, and saves the combined DataFrame back to the file.
     If the file doesn't exist, it creates a new file with the given DataFrame.
-    Finally, it prints the filename, shape of the DataFrame, and the last two rows of the DataFrame.
+    Finally, it prints the filename, shape of the DataFrame written, and its last two rows.
     """
     if os.path.isfile(filename):
+        if list(pd.read_csv(filename, nrows=0).columns) == [str(c) for c in df.columns]:
+            df.to_csv(filename, mode="a", header=False, index=False)
+            print(filename, df.shape)
+            print(df.tail(2))
+            return
         fd = pd.read_csv(filename)
         df = pd.concat([fd, df])
     df.reset_index(drop=True, inplace=True)
@@ -306,25 +393,14 @@ def process_results(result_list, filepath):
     # print(result_list[0].df_trades.head(2))
 
 
-def analyse_pair(instrument, granularity, ma_long, ma_short, filepath):
+def analyse_pair(instrument, granularity, ma_long, ma_short, filepath, compact=False):
     ma_list = set(ma_long + ma_short)
     pair = instrument.name
 
-    price_data = load_price_data(pair, granularity, ma_list)
-    results_list = []
-    for ma_l in ma_long:
-        for ma_s in ma_short:
-            if ma_l <= ma_s:
-                continue
-
-            ma_result = assess_pair(
-                price_data,
-                get_ma_col(ma_l),
-                get_ma_col(ma_s),
-                instrument,
-                granularity
-            )
-            results_list.append(ma_result)
+    # mid prices can carry one digit more than the quoted precision
+    price_data = load_price_data(pair, granularity, ma_list, compact=compact,
+                                 decimals=instrument.displayPrecision + 1)
+    results_list = assess_pair_grid(price_data, ma_long, ma_short, instrument, granularity)
     process_results(results_list, filepath.replace('candles', 'result'))
 
 
@@ -332,7 +408,8 @@ def run_ma_sim(curr_list=["AUD", "CAD", "JPY", "USD", "EUR", "GBP", "NZD"],
                granularity=["M5", "M15", "M30", "H1", "H2", "H4"],
                ma_long=[20, 40, 80, 120, 150, 200],
                ma_short=[10, 20, 30, 40, 50, 100],
-               filepath="./data/candles"):
+               filepath="./data/candles",
+               compact=False):
     """
     Run a moving average simulation for multiple currency pairs, granularities, and moving average periods.
 
@@ -342,6 +419,7 @@ def run_ma_sim(curr_list=["AUD", "CAD", "JPY", "USD", "EUR", "GBP", "NZD"],
     - ma_long (list): List of long-term moving average periods.
     - ma_short (list): List of short-term moving average periods.
     - filepath (str): Path to the directory where result files will be saved.
+    - compact (bool): Load candles in compact dtypes to save memory.
 
     Description:
     This function loads instruments, iterates through combinations of currency pairs, granularities,
@@ -355,6 +433,9 @@ def run_ma_sim(curr_list=["AUD", "CAD", "JPY", "USD", "EUR", "GBP", "NZD"],
                 pair = f"{p1}_{p2}"
                 if pair in ic.instruments_dict.keys():
                     analyse_pair(
-                        ic.instruments_dict[pair], g, ma_long, ma_short, filepath)
-            create_ma_result(g)
+                        ic.instruments_dict[pair], g, ma_long, ma_short, filepath, compact)
+            if create_ma_result is not None:
+                create_ma_result(g)
+    if create_ma_result is None:
+        print("No Excel export, simulation.ma_excel has no create_ma_result")
     print("Done with MA Simulations")
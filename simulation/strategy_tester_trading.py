@@ -1,9 +1,11 @@
-from multiprocessing import Process
 import pandas as pd
 from dateutil import parser
 from technicals.indicators import MACD, RSI, CMF, EVM, IchimokuCloud
-from simulation.guru_tester import GuruTester
+from technicals.indicator_cache import indicatorCache
+from simulation.guru_tester import GuruTester, slim_m5
+from simulation.sweep_runner import SweepRunner, shared_frame, worker_cached
 from infrastructure.instrument_collection import InstrumentCollection
+from infrastructure.candle_data import load_candles, restore_candles
 
 BUY = 1
 SELL = -1
@@ -39,17 +41,20 @@ def apply_macd_cross_signal(row):
 
 def prepare_data_for_simulation(df, slow, fast, signal, ema, rsi_period, cmf_period, evm_period, ichimoku_params):
     df_analyzed = df.copy()
-    df_analyzed = MACD(df_analyzed, n_slow=slow, n_fast=fast, n_signal=signal)
+    # the grid only changes one parameter at a time, the cache returns the
+    # columns for every configuration it has already computed
+    df_analyzed = indicatorCache.apply(
+        df_analyzed, MACD, n_slow=slow, n_fast=fast, n_signal=signal)
     df_analyzed['macd_delta'] = df_analyzed['MACD'] - df_analyzed['SIGNAL']
     df_analyzed['macd_delta_prev'] = df_analyzed['macd_delta'].shift(1)
     df_analyzed['EMA'] = df_analyzed['mid_c'].ewm(
         span=ema, min_periods=ema).mean()
-    df_analyzed = RSI(df_analyzed, n=rsi_period)
-    df_analyzed = CMF(df_analyzed, n_cmf=cmf_period)
+    df_analyzed = indicatorCache.apply(df_analyzed, RSI, n=rsi_period)
+    df_analyzed = indicatorCache.apply(df_analyzed, CMF, n_cmf=cmf_period)
 
-    df_analyzed = EVM(df_analyzed, n=evm_period)
-    df_analyzed = IchimokuCloud(df_analyzed, n1=ichimoku_params['conversion_line_period'],
-                                n2=ichimoku_params['base_line_period'], n3=ichimoku_params['lagging_span_period'])
+    df_analyzed = indicatorCache.apply(df_analyzed, EVM, n=evm_period)
+    df_analyzed = indicatorCache.apply(df_analyzed, IchimokuCloud, n1=ichimoku_params['conversion_line_period'],
+                                       n2=ichimoku_params['base_line_period'], n3=ichimoku_params['lagging_span_period'])
     df_analyzed.dropna(inplace=True)
     df_analyzed.reset_index(drop=True, inplace=True)
     df_analyzed['direction'] = df_analyzed.apply(
@@ -58,36 +63,31 @@ def prepare_data_for_simulation(df, slow, fast, signal, ema, rsi_period, cmf_per
     return df_analyzed
 
 
-def load_data_for_pair(pair, timeframe=1):
+def load_data_for_pair(pair, timeframe=1, compact=False, decimals=None):
     start_date = parser.parse("2015-11-01T00:00:00Z")
     end_date = parser.parse("2023-10-01T00:00:00Z")
 
-    hourly_data = pd.read_csv(f"./data/candles/{pair}_H{timeframe}.csv")
-    five_min_data = pd.read_csv(f"./data/candles/{pair}_M5.csv")
+    hourly_data = load_candles(pair, f"H{timeframe}", compact=compact,
+                               date_from=start_date, date_to=end_date)
+    five_min_data = load_candles(pair, "M5", compact=compact,
+                                 date_from=start_date, date_to=end_date)
 
-    hourly_data['time'] = pd.to_datetime(hourly_data['time'])
-    five_min_data['time'] = pd.to_datetime(five_min_data['time'])
-
-    hourly_data = hourly_data[(hourly_data.time >= start_date) & (
-        hourly_data.time < end_date)]
-    five_min_data = five_min_data[(five_min_data.time >= start_date) & (
-        five_min_data.time < end_date)]
-
-    hourly_data.reset_index(drop=True, inplace=True)
-    five_min_data.reset_index(drop=True, inplace=True)
+    # the hourly frame is small, only the M5 one stays compact
+    if compact:
+        hourly_data = restore_candles(hourly_data, decimals)
 
     return hourly_data, five_min_data
 
 
-def simulate_with_parameters(pair, hourly_data, five_min_data, slow, fast, signal, ema, rsi_period, cmf_period, evm_period, ichimoku_params, timeframe):
+def simulate_with_parameters(pair, hourly_data, five_min_data, slow, fast, signal, ema, rsi_period, cmf_period, evm_period, ichimoku_params, timeframe, decimals=None, m5_slim=None):
     prepared_data = prepare_data_for_simulation(
         hourly_data, slow, fast, signal, ema, rsi_period, cmf_period, evm_period, ichimoku_params)
     tester = GuruTester(prepared_data, apply_trading_signal,
-                        five_min_data, use_spread=True, time_d=timeframe)
+                        five_min_data, use_spread=True, time_d=timeframe, decimals=decimals,
+                        m5_slim=m5_slim)
     tester.run_test()
 
-    results_df = pd.DataFrame()
-
+    results_df = tester.df_results.copy()
     results_df['slow'] = slow
     results_df['fast'] = fast
     results_df['signal'] = signal
@@ -95,26 +95,21 @@ def simulate_with_parameters(pair, hourly_data, five_min_data, slow, fast, signa
     results_df['rsi_period'] = rsi_period
     results_df['cmf_period'] = cmf_period
     results_df['evm_period'] = evm_period
-    ichimoku_params_df = pd.DataFrame(ichimoku_params, index=[0])
-
-    if isinstance(tester.df_results, pd.DataFrame):
-        # Append the data to the results DataFrame
-        results_df = results_df.append(
-            ichimoku_params_df, ignore_index=True)
-    else:
-        results_df = ichimoku_params_df
-
+    for k, v in ichimoku_params.items():
+        results_df[k] = v
     results_df['pair'] = pair
 
     return results_df
 
 
-def run_simulation_for_pair(pair):
-    timeframe = 4
-    hourly_data, five_min_data = load_data_for_pair(pair, timeframe=timeframe)
+ICHIMOKU_PARAMS = [
+    {'conversion_line_period': 9, 'base_line_period': 26, 'lagging_span_period': 52, 'displacement': 26},
+    {'conversion_line_period': 20, 'base_line_period': 60, 'lagging_span_period': 120, 'displacement': 30},
+    {'conversion_line_period': 10, 'base_line_period': 30, 'lagging_span_period': 60, 'displacement': 30}
+]
 
-    results = []
-    trades = []
+
+def parameter_grid():
     for slow in [26, 52, 78]:
         for fast in [12, 18, 24]:
             if slow <= fast:
@@ -124,38 +119,63 @@ def run_simulation_for_pair(pair):
                     for rsi_period in [14, 28, 42]:
                         for cmf_period in [20, 40, 60]:
                             for evm_period in [14, 28, 42]:
-                                for ichimoku_params in [{'conversion_line_period': 9, 'base_line_period': 26, 'lagging_span_period': 52, 'displacement': 26}, {'conversion_line_period': 20, 'base_line_period': 60, 'lagging_span_period': 120, 'displacement': 30}, {'conversion_line_period': 10, 'base_line_period': 30, 'lagging_span_period': 60, 'displacement': 30}]:
-                                    sim_results = simulate_with_parameters(
-                                        pair, hourly_data, five_min_data, slow, fast, signal, ema, rsi_period, cmf_period, evm_period, ichimoku_params, timeframe)
-                                    total_result = sim_results.result.sum()
-                                    results.append({
-                                        'pair': pair,
-                                        'slow': slow,
-                                        'fast': fast,
-                                        'ema': ema,
-                                        'signal': signal,
-                                        'rsi_period': rsi_period,
-                                        'cmf_period': cmf_period,
-                                        'evm_period': evm_period,
-                                        'ichimoku_params': ichimoku_params,
-                                        'result': total_result,
-                                    })
-                                    print(
-                                        f"--> {pair} {slow} {fast} {ema} {signal} {rsi_period} {cmf_period} {evm_period} {ichimoku_params} {total_result}")
-
-    pd.concat(trades).to_csv(
-        f"./data/result/trades/macd_ema_trades_{pair}.csv")
-    return pd.DataFrame(results)
+                                for ichimoku_params in ICHIMOKU_PARAMS:
+                                    yield dict(slow=slow, fast=fast, signal=signal, ema=ema,
+                                               rsi_period=rsi_period, cmf_period=cmf_period,
+                                               evm_period=evm_period, ichimoku_params=ichimoku_params)
 
 
-def run_simulation_process(pair):
-    print(f"PROCESS {pair} STARTED")
-    simulation_results = run_simulation_for_pair(pair)
+def summarize(pair, params, sim_results):
+    total_result = sim_results.result.sum()
+    print(f"--> {pair} {params['slow']} {params['fast']} {params['ema']} {params['signal']} {params['rsi_period']} "
+          f"{params['cmf_period']} {params['evm_period']} {params['ichimoku_params']} {total_result}")
+    return dict(pair=pair, **params, result=total_result)
+
+
+def save_trades(pair, trades):
+    if trades:
+        pd.concat(trades).to_csv(
+            f"./data/result/trades/macd_ema_trades_{pair}.csv")
+
+
+def save_results(pair, simulation_results: pd.DataFrame):
     simulation_results.to_pickle(
         f"./data/result/macd_ema/macd_ema_res_{pair}.csv")
+
+
+def run_simulation_for_pair(pair, compact=False, decimals=None, timeframe=4):
+    hourly_data, five_min_data = load_data_for_pair(
+        pair, timeframe=timeframe, compact=compact, decimals=decimals)
+
+    results = []
+    trades = []
+    for params in parameter_grid():
+        sim_results = simulate_with_parameters(
+            pair, hourly_data, five_min_data, timeframe=timeframe, decimals=decimals, **params)
+        trades.append(sim_results)
+        results.append(summarize(pair, params, sim_results))
+
+    save_trades(pair, trades)
+    return pd.DataFrame(results)
+
+
+def run_simulation_process(pair, compact=False, decimals=None):
+    print(f"PROCESS {pair} STARTED")
+    simulation_results = run_simulation_for_pair(pair, compact, decimals)
+    save_results(pair, simulation_results)
     print(f"PROCESS {pair} ENDED")
 
 
+def run_sweep_task(task):
+    pair, params, timeframe, decimals = task
+    df_m5 = shared_frame((pair, 'M5'))
+    m5_slim = worker_cached((pair, 'M5', 'slim'), lambda: slim_m5(df_m5, decimals=decimals))
+    sim_results = simulate_with_parameters(
+        pair, shared_frame((pair, 'hourly')), df_m5,
+        timeframe=timeframe, decimals=decimals, m5_slim=m5_slim, **params)
+    return pair, summarize(pair, params, sim_results), sim_results
+
+
 def generate_simulation_pairs(l_curr, instrument_collection):
     simulation_pairs = []
     for base_currency in l_curr:
@@ -166,26 +186,38 @@ def generate_simulation_pairs(l_curr, instrument_collection):
     return simulation_pairs
 
 
-def run_full_stimulation(instrument_collection):
-    simulation_pairs = generate_simulation_pairs(
-        ['USD', 'GBP', 'JPY', 'NZD', 'AUD', 'CAD'], instrument_collection)
-    process_limit = 4
-    current_index = 0
-
-    while current_index < len(simulation_pairs):
-        processes = []
-        remaining_pairs = len(simulation_pairs) - current_index
-        process_limit = min(remaining_pairs, process_limit)
-
-        for _ in range(process_limit):
-            processes.append(Process(target=run_simulation_process,
-                             args=(simulation_pairs[current_index],)))
-            current_index += 1
+def price_decimals(instrument_collection, pair):
+    # mid prices can carry one digit more than the quoted precision
+    return instrument_collection.instruments_dict[pair].displayPrecision + 1
 
-        for process in processes:
-            process.start()
 
-        for process in processes:
-            process.join()
+def run_full_stimulation(instrument_collection, compact=False, processes=None, timeframe=4):
+    """Every (pair, parameters) combination on one process pool. Each pair's
+    candles are loaded once and shared with the workers; a pair's results
+    are saved as soon as its last task comes back."""
+    simulation_pairs = generate_simulation_pairs(
+        ['USD', 'GBP', 'JPY', 'NZD', 'AUD', 'CAD'], instrument_collection)
+    decimals = {pair: price_decimals(instrument_collection, pair) for pair in simulation_pairs}
+
+    frames = {}
+    for pair in simulation_pairs:
+        frames[(pair, 'hourly')], frames[(pair, 'M5')] = load_data_for_pair(
+            pair, timeframe=timeframe, compact=compact, decimals=decimals[pair])
+
+    grid = list(parameter_grid())
+    tasks = [(pair, params, timeframe, decimals[pair]) for pair in simulation_pairs for params in grid]
+    remaining = {pair: len(grid) for pair in simulation_pairs}
+    results = {pair: [] for pair in simulation_pairs}
+    trades = {pair: [] for pair in simulation_pairs}
+
+    with SweepRunner(run_sweep_task, frames, processes) as runner:
+        for pair, summary, sim_results in runner.run(tasks):
+            results[pair].append(summary)
+            trades[pair].append(sim_results)
+            remaining[pair] -= 1
+            if remaining[pair] == 0:
+                save_trades(pair, trades.pop(pair))
+                save_results(pair, pd.DataFrame(results.pop(pair)))
+                print(f"PAIR {pair} COMPLETED")
 
     print("ALL SIMULATIONS COMPLETED")
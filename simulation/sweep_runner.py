@@ -0,0 +1,118 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from infrastructure.candle_store import to_epoch
+
+# Runs a parameter sweep on a persistent process pool. The price frames are
+# copied once into shared memory by the parent; workers map them instead of
+# loading CSVs or receiving pickled frames, so a task is only its key and
+# parameters. Tasks are handed out one at a time as workers free up and
+# results come back as they finish.
+#
+#   def task(job):
+#       pair, params = job
+#       df = shared_frame((pair, "M5"))
+#       return pair, params, simulate(df, **params)
+#
+#   with SweepRunner(task, {(pair, "M5"): df_m5, ...}) as runner:
+#       for pair, params, result in runner.run(jobs):
+#           ...
+
+# worker side: specs from the initializer, frames attached on first use,
+# anything a worker derives from them once and reuses across tasks
+_specs = {}
+_frames = {}
+_blocks = []
+_derived = {}
+
+
+def share_frame(df: pd.DataFrame):
+    """Copies df's columns to shared memory. Returns the picklable spec and
+    the SharedMemory blocks, which the caller must close and unlink."""
+    spec, blocks = [], []
+    for c in df.columns:
+        values = df[c]
+        is_time = pd.api.types.is_datetime64_any_dtype(values)
+        values = to_epoch(values) if is_time else np.ascontiguousarray(values.to_numpy())
+        if values.dtype == object:
+            raise ValueError(f"column {c} is not numeric")
+        block = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        blocks.append(block)
+        spec.append((c, block.name, values.dtype.str, values.shape[0], is_time))
+    return spec, blocks
+
+
+def attach_frame(spec):
+    columns = {}
+    for c, name, dtype, rows, is_time in spec:
+        block = shared_memory.SharedMemory(name=name)
+        _blocks.append(block)
+        values = np.ndarray((rows,), dtype=np.dtype(dtype), buffer=block.buf)
+        values.flags.writeable = False
+        columns[c] = pd.to_datetime(values, unit='s', utc=True) if is_time else values
+    return pd.DataFrame(columns, copy=False)
+
+
+def init_worker(specs):
+    _specs.update(specs)
+
+
+def shared_frame(key):
+    """The frame registered under key, read-only, in a worker."""
+    if key not in _frames:
+        _frames[key] = attach_frame(_specs[key])
+    return _frames[key]
+
+
+def worker_cached(key, build):
+    """build() the first time key is asked for in this worker, the same
+    object afterwards. For per-frame preparation every task would repeat."""
+    if key not in _derived:
+        _derived[key] = build()
+    return _derived[key]
+
+
+class SweepRunner:
+
+    def __init__(self, task, frames: dict, processes=None):
+        self.task = task
+        self.frames = frames
+        self.processes = processes or mp.cpu_count()
+        self.blocks = []
+        self.pool = None
+
+    def __enter__(self):
+        specs = {}
+        try:
+            for key, df in self.frames.items():
+                specs[key], blocks = share_frame(df)
+                self.blocks.extend(blocks)
+            self.pool = mp.Pool(self.processes, initializer=init_worker, initargs=(specs,))
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def run(self, jobs):
+        """Yields task(job) for every job in completion order."""
+        return self.pool.imap_unordered(self.task, jobs, chunksize=1)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.pool is not None:
+            self.pool.terminate()
+        self.close()
+
+    def __repr__(self):
+        return f"SweepRunner() processes:{self.processes} frames:{list(self.frames)}"
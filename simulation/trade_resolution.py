@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+# Resolves every trade of a backtest at once instead of walking the M5
+# candles and updating each open trade. For a trade opened on M5 row i the
+# take profit is hit on the first row j >= i where the high reaches it (low
+# for a sell), the stop loss likewise, and the trade closes on whichever
+# comes first, TP winning a tie as in GuruTester's loop.
+#
+# first_reaching() answers "first j >= start with values[j] >= threshold"
+# (<= with below) for all trades together. It checks the rest of the
+# start's block of BLOCK rows, then finds the first block whose maximum
+# (minimum) reaches the threshold on an array of block extremes (the same
+# search, one level up) and scans that block. Each level is one
+# (trades x BLOCK) gather, so a search over n rows costs about
+# log_BLOCK(n) of them whatever the trade lengths.
+
+BUY = 1
+SELL = -1
+NONE = 0
+BLOCK = 16
+# gather at most this many elements per pass to bound memory
+MAX_GATHER = 1 << 22
+
+
+def block_extremes(values, block=BLOCK, below=False):
+    """fmax (fmin with below) over blocks of block rows, recursively until
+    one block is left."""
+    reduce = np.fmin if below else np.fmax
+    levels = [values]
+    while levels[-1].shape[0] > block:
+        top = levels[-1]
+        levels.append(reduce.reduceat(top, np.arange(0, top.shape[0], block)))
+    return levels
+
+
+def first_in_block(values, starts, thresholds, block_end, block=BLOCK, below=False):
+    """First index in [starts, block_end) with values >= thresholds (<= with
+    below), else block_end."""
+    offsets = np.arange(block)
+    positions = starts[:, None] + offsets
+    valid = positions < block_end[:, None]
+    window = values[np.minimum(positions, values.shape[0] - 1)]
+    reached = window <= thresholds[:, None] if below else window >= thresholds[:, None]
+    hit = valid & reached
+    found = hit.any(axis=1)
+    return np.where(found, starts + hit.argmax(axis=1), block_end)
+
+
+def search_level(levels, level, starts, thresholds, block=BLOCK, below=False):
+    values = levels[level]
+    n = values.shape[0]
+    block_end = np.minimum((starts // block + 1) * block, n)
+    result = first_in_block(values, starts, thresholds, block_end, block, below)
+    if level == len(levels) - 1:
+        return result
+
+    # not in the start's own block: first later block whose max reaches it
+    missed = np.flatnonzero(result == block_end)
+    if missed.shape[0]:
+        next_block = starts[missed] // block + 1
+        n_blocks = levels[level + 1].shape[0]
+        in_range = next_block < n_blocks
+        found = np.full(missed.shape[0], n)
+        if in_range.any():
+            sub = missed[in_range]
+            blocks = search_level(levels, level + 1, next_block[in_range], thresholds[sub], block, below)
+            inside = blocks < n_blocks
+            if inside.any():
+                first = blocks[inside] * block
+                found_sub = first_in_block(values, first, thresholds[sub][inside],
+                                           np.minimum(first + block, n), block, below)
+                values_found = np.full(sub.shape[0], n)
+                values_found[inside] = found_sub
+                found[in_range] = values_found
+        result[missed] = found
+    return result
+
+
+def first_reaching(values, starts, thresholds, below=False, levels=None, block=BLOCK):
+    """For each start, the first index j >= start with values[j] >= threshold
+    (<= with below), or len(values) if there is none."""
+    values = np.asarray(values, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    levels = levels or block_extremes(values, block, below)
+    result = np.full(starts.shape[0], values.shape[0], dtype=np.int64)
+    chunk = max(1, MAX_GATHER // block)
+    for k in range(0, starts.shape[0], chunk):
+        todo = slice(k, k + chunk)
+        valid = starts[todo] < values.shape[0]
+        idx = np.flatnonzero(valid) + k
+        if idx.shape[0]:
+            result[idx] = search_level(levels, 0, starts[idx], thresholds[idx], block, below)
+    return result
+
+
+def resolve_trades(m5: pd.DataFrame, signals: pd.DataFrame, profit_factor, loss_factor):
+    """m5: time, bid_h, bid_l, ask_h, ask_l of every M5 candle, only read.
+    signals: one row per trade with m5_row (its entry row in m5), SIGNAL,
+    TP, SL and start prices, as built by GuruTester.prepare_data.
+    Returns the closed trades, one row each, in the order they close."""
+    signals = signals.sort_values('m5_row', kind='stable')
+    rows = signals.m5_row.to_numpy(dtype=np.int64)
+    signal = signals.SIGNAL.to_numpy(dtype=np.int64)
+    n = m5.shape[0]
+    buy = signal == BUY
+    tp = signals.TP.to_numpy(dtype=np.float64)
+    sl = signals.SL.to_numpy(dtype=np.float64)
+    prices = {c: m5[c].to_numpy(dtype=np.float64) for c in ['bid_h', 'bid_l', 'ask_h', 'ask_l']}
+
+    tp_row = np.full(rows.shape[0], n, dtype=np.int64)
+    sl_row = np.full(rows.shape[0], n, dtype=np.int64)
+    for side, tp_col, sl_col, tp_below in [(buy, 'bid_h', 'bid_l', False), (~buy, 'ask_l', 'ask_h', True)]:
+        if side.any():
+            tp_row[side] = first_reaching(prices[tp_col], rows[side], tp[side], below=tp_below)
+            sl_row[side] = first_reaching(prices[sl_col], rows[side], sl[side], below=not tp_below)
+
+    end_row = np.minimum(tp_row, sl_row)
+    closed = np.flatnonzero(end_row < n)
+    trades = closed[np.lexsort((rows[closed], end_row[closed]))]
+    rows, end_row, buy = rows[trades], end_row[trades], buy[trades]
+    win = tp_row[trades] <= sl_row[trades]
+
+    trigger = np.select(
+        [buy & win, buy & ~win, ~buy & win],
+        [prices['bid_h'][end_row], prices['bid_l'][end_row], prices['ask_l'][end_row]],
+        default=prices['ask_h'][end_row]
+    )
+    start_buy = signals.start_price_BUY.to_numpy()[trades]
+    start_sell = signals.start_price_SELL.to_numpy()[trades]
+    return pd.DataFrame(dict(
+        running=np.zeros(rows.shape[0], dtype=bool),
+        start_index_m5=m5.index.to_numpy()[rows],
+        profit_factor=profit_factor,
+        loss_factor=loss_factor,
+        start_price_buy=start_buy,
+        trigger_price_buy=start_buy,
+        start_price_sell=start_sell,
+        trigger_price_sell=start_sell,
+        SIGNAL=signal[trades],
+        start_price=np.where(buy, start_buy, start_sell),
+        trigger_price=trigger,
+        TP=tp[trades],
+        SL=sl[trades],
+        result=np.where(win, profit_factor, loss_factor),
+        end_time=m5.time.iloc[end_row].reset_index(drop=True),
+        start_time=m5.time.iloc[rows].reset_index(drop=True)
+    ))
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Memoizes the columns an indicator from technicals/indicators.py adds.
+# The key is a hash of the candle columns the indicators read plus the
+# indicator name and parameters, so the same pair, granularity and date
+# range with the same parameters is only computed once, whatever frame
+# it arrives in.
+#
+#   df = indicatorCache.apply(df, RSI, n=14)
+#
+# Entries live in an in-memory LRU and, if cache_dir is set, as .npy files
+# that are memory-mapped on load. Both tiers evict the least recently used
+# entries once they pass their byte limit.
+
+INPUT_COLUMNS = ['mid_o', 'mid_h', 'mid_l', 'mid_c', 'volume']
+MAX_MEMORY_BYTES = 512 * 1024 * 1024
+MAX_DISK_BYTES = 4 * 1024 * 1024 * 1024
+
+
+def content_hash(df: pd.DataFrame, columns=INPUT_COLUMNS):
+    h = hashlib.blake2b(digest_size=16)
+    for c in columns:
+        if c in df.columns:
+            values = np.ascontiguousarray(df[c].to_numpy())
+            h.update(f"{c}:{values.dtype.str}:{values.shape[0]};".encode())
+            h.update(values.data)
+    return h.hexdigest()
+
+
+def float_dtype(df: pd.DataFrame, columns=INPUT_COLUMNS):
+    """Float dtype of the candle columns: float32 for compact frames
+    (infrastructure/candle_data.py), float64 otherwise."""
+    for c in columns:
+        if c in df.columns and pd.api.types.is_float_dtype(df[c]):
+            return df[c].dtype
+    return np.dtype(np.float64)
+
+
+def indicator_key(data_hash, func, params):
+    name = f"{func.__module__}.{func.__qualname__}"
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{data_hash}|{name}|{sorted(params.items())!r}".encode())
+    return h.hexdigest()
+
+
+class IndicatorCache:
+
+    def __init__(self, max_memory_bytes=MAX_MEMORY_BYTES, cache_dir=None,
+                 max_disk_bytes=MAX_DISK_BYTES):
+        self.max_memory_bytes = max_memory_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.lock = threading.Lock()
+        self.stats = dict(hits=0, disk_hits=0, misses=0)
+        self.disk_bytes = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.disk_bytes = self.evict_disk()
+
+    def apply(self, df: pd.DataFrame, func, **params):
+        """Same as func(df, **params) but the output columns come from the
+        cache when this data and these params have been seen before. They
+        have the float dtype of the candle columns, so compact frames stay
+        compact."""
+        dtype = float_dtype(df)
+        key = indicator_key(content_hash(df), func, params)
+        columns, values = self.get(key)
+        if columns is None:
+            input_columns = [c for c in INPUT_COLUMNS if c in df.columns]
+            result = func(df[input_columns].copy(), **params)
+            columns = [c for c in result.columns if c not in input_columns]
+            values = np.column_stack([result[c].to_numpy(dtype=dtype) for c in columns]) \
+                if columns else np.empty((df.shape[0], 0), dtype=dtype)
+            self.put(key, columns, values)
+        for i, c in enumerate(columns):
+            # copied so callers can't write into a cached or mapped array
+            df[c] = np.array(values[:, i], dtype=dtype)
+        return df
+
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.stats['hits'] += 1
+                return self.memory[key]
+        entry = self.load(key)
+        with self.lock:
+            if entry is None:
+                self.stats['misses'] += 1
+                return None, None
+            self.stats['disk_hits'] += 1
+        self.put_memory(key, *entry)
+        return entry
+
+    def put(self, key, columns, values):
+        self.put_memory(key, columns, values)
+        self.save(key, columns, values)
+
+    def put_memory(self, key, columns, values):
+        with self.lock:
+            if key in self.memory:
+                return
+            self.memory[key] = (columns, values)
+            self.memory_bytes += values.nbytes
+            while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+                _, (_, evicted) = self.memory.popitem(last=False)
+                self.memory_bytes -= evicted.nbytes
+
+    def paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.json", f"{base}.npy"
+
+    def load(self, key):
+        if self.cache_dir is None:
+            return None
+        json_path, npy_path = self.paths(key)
+        try:
+            values = np.load(npy_path, mmap_mode='r')
+            with open(json_path) as f:
+                columns = json.load(f)
+            os.utime(npy_path)
+        except (OSError, ValueError):
+            return None
+        return columns, values
+
+    def save(self, key, columns, values):
+        if self.cache_dir is None:
+            return
+        json_path, npy_path = self.paths(key)
+        # write to temp files and rename so other processes never see
+        # half-written entries; the .npy goes last as it marks completion
+        tmp = f"{npy_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(columns, f)
+        os.replace(tmp, json_path)
+        with open(tmp, "wb") as f:
+            np.save(f, values)
+        os.replace(tmp, npy_path)
+        self.disk_bytes += values.nbytes
+        if self.disk_bytes > self.max_disk_bytes:
+            self.disk_bytes = self.evict_disk()
+
+    def evict_disk(self):
+        """Removes the oldest entries until the directory fits in
+        max_disk_bytes, returns the bytes left."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npy"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        total = sum(e[1] for e in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            for p in (path, f"{path[:-4]}.json"):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            total -= size
+        return total
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            self.memory_bytes = 0
+
+    def __repr__(self):
+        return f"IndicatorCache() entries:{len(self.memory)} bytes:{self.memory_bytes} {self.stats}"
+
+
+indicatorCache = IndicatorCache()
@@ -13,7 +13,7 @@ def BollingerBands(df: pd.DataFrame, n=20, n_std=2):
 
 def KeltnerChannels(df: pd.DataFrame, n_ema=20, n_atr=10):
     df['EMA'] = df.mid_c.ewm(span=n_ema, min_periods=n_ema).mean()
-    df = ATR(df, n=n_atr, column_name="ATR_KeltnerChannels")
+    df = ATR(df, n_atr=n_atr, column_name="ATR_KeltnerChannels")
     c_atr = "ATR_KeltnerChannels"
     df['KeUp'] = df[c_atr] * 2 + df.EMA
     df['KeLo'] = df.EMA - df[c_atr] * 2
@@ -21,23 +21,105 @@ def KeltnerChannels(df: pd.DataFrame, n_ema=20, n_atr=10):
     return df
 
 
-def ATR(df: pd.DataFrame, n_atr=14, column_name="ATR"):
+# smoothing for RSI, ATR and ADX: the original rolling mean, Wilder's
+# smoothing (alpha 1/n) or an EMA (alpha 2/(n+1))
+SMA = 'sma'
+WILDER = 'wilder'
+EMA = 'ema'
+
+
+class Smoother:
+    """Wilder/EMA smoothing seeded with the mean of the first n values.
+
+    run() smooths a whole array in one pandas ewm pass and keeps the state
+    at the last value; update() continues from there one value at a time
+    with the same arithmetic, so a resumed live series matches the batch
+    one exactly. NaN before the seed is skipped.
+    """
+
+    def __init__(self, n, smoothing=WILDER):
+        if smoothing == WILDER:
+            self.alpha = 1 / n
+        elif smoothing == EMA:
+            self.alpha = 2 / (n + 1)
+        else:
+            raise ValueError(f"Unknown smoothing: {smoothing}")
+        self.n = n
+        self.old_wt_factor = 1 - self.alpha
+        self.seed = []
+        self.value = np.nan
+        self.old_wt = 1.0
+
+    def update(self, x):
+        if self.value != self.value:
+            if x == x:
+                self.seed.append(x)
+                if len(self.seed) == self.n:
+                    self.value = float(np.array(self.seed).mean())
+                    self.seed = []
+            return self.value
+        # pandas' adjust=False recursion
+        self.old_wt *= self.old_wt_factor
+        if x == x:
+            if self.value != x:
+                self.value = ((self.old_wt * self.value) + (self.alpha * x)) / \
+                    (self.old_wt + self.alpha)
+            self.old_wt = 1.0
+        return self.value
+
+    def mean(self):
+        return self.value
+
+    def run(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 1:
+            raise ValueError("Smoother.run() takes one series at a time")
+        if self.value == self.value or self.seed:
+            return np.array([self.update(x) for x in values])
+        out = np.full(values.shape[0], np.nan)
+        valid = np.flatnonzero(values == values)
+        if valid.shape[0] < self.n:
+            self.seed = values[valid].tolist()
+            return out
+        start = valid[self.n - 1]
+        seeded = values[start:].copy()
+        seeded[0] = values[valid[:self.n]].mean()
+        out[start:] = pd.Series(seeded).ewm(
+            alpha=self.alpha, adjust=False).mean().to_numpy()
+        self.value = float(out[-1])
+        self.old_wt = 1.0
+        for _ in range(values.shape[0] - 1 - valid[-1]):
+            self.old_wt *= self.old_wt_factor
+        return out
+
+    def __repr__(self):
+        return f"Smoother() n:{self.n} alpha:{self.alpha} value:{self.value}"
+
+
+def ATR(df: pd.DataFrame, n_atr=14, column_name="ATR", smoothing=SMA):
     prev_c = df.mid_c.shift(1)
     tr1 = df.mid_h - df.mid_l
     tr2 = abs(df.mid_h - prev_c)
     tr3 = abs(prev_c - df.mid_l)
     tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    df[column_name] = tr.rolling(window=n_atr).mean()
+    if smoothing == SMA:
+        df[column_name] = tr.rolling(window=n_atr).mean()
+    else:
+        df[column_name] = Smoother(n_atr, smoothing).run(tr)
     return df
 
 
-def RSI(df: pd.DataFrame, n=14):
+def RSI(df: pd.DataFrame, n=14, smoothing=SMA):
     delta = df.mid_c.diff()
     gain = delta.clip(lower=0)
     loss = -delta.clip(upper=0)
 
-    avg_gain = gain.rolling(window=n, min_periods=1).mean()
-    avg_loss = loss.rolling(window=n, min_periods=1).mean()
+    if smoothing == SMA:
+        avg_gain = gain.rolling(window=n, min_periods=1).mean()
+        avg_loss = loss.rolling(window=n, min_periods=1).mean()
+    else:
+        avg_gain = pd.Series(Smoother(n, smoothing).run(gain), index=df.index)
+        avg_loss = pd.Series(Smoother(n, smoothing).run(loss), index=df.index)
 
     rs = avg_gain / avg_loss
     rsi = 100 - (100 / (1 + rs))
@@ -62,20 +144,33 @@ def VWAP(df: pd.DataFrame):
     return df
 
 
-def ADX(df: pd.DataFrame, n=14) -> pd.DataFrame:
+def ADX(df: pd.DataFrame, n=14, smoothing=SMA) -> pd.DataFrame:
     tr1 = df.mid_h - df.mid_l
     tr2 = np.abs(df.mid_h - df.mid_c.shift(1))
     tr3 = np.abs(df.mid_l - df.mid_c.shift(1))
-    tr = np.maximum.reduce([tr1, tr2, tr3])
-    tr_pos = np.where(df.mid_h > df.mid_h.shift(1), tr, 0)
-    tr_neg = np.where(df.mid_l < df.mid_l.shift(1), tr, 0)
-    atr = tr.rolling(window=n).mean()
-    tr_pos_smoothed = tr_pos.rolling(window=n).mean()
-    tr_neg_smoothed = tr_neg.rolling(window=n).mean()
+    tr = pd.Series(np.maximum.reduce([tr1, tr2, tr3]), index=df.index)
+    tr_pos = pd.Series(
+        np.where(df.mid_h > df.mid_h.shift(1), tr, 0), index=df.index)
+    tr_neg = pd.Series(
+        np.where(df.mid_l < df.mid_l.shift(1), tr, 0), index=df.index)
+    if smoothing == SMA:
+        atr = tr.rolling(window=n).mean()
+        tr_pos_smoothed = tr_pos.rolling(window=n).mean()
+        tr_neg_smoothed = tr_neg.rolling(window=n).mean()
+    else:
+        # the first row has no true range, keep it out of the seeds
+        atr = pd.Series(Smoother(n, smoothing).run(tr), index=df.index)
+        tr_pos_smoothed = pd.Series(Smoother(n, smoothing).run(
+            tr_pos.where(tr.notna())), index=df.index)
+        tr_neg_smoothed = pd.Series(Smoother(n, smoothing).run(
+            tr_neg.where(tr.notna())), index=df.index)
     pos_di = (tr_pos_smoothed / atr) * 100
     neg_di = (tr_neg_smoothed / atr) * 100
     dx = np.abs((pos_di - neg_di) / (pos_di + neg_di)) * 100
-    df['ADX'] = dx.rolling(window=n).mean()
+    if smoothing == SMA:
+        df['ADX'] = dx.rolling(window=n).mean()
+    else:
+        df['ADX'] = Smoother(n, smoothing).run(dx)
     return df
 
 
@@ -128,11 +223,62 @@ def ADL(df: pd.DataFrame):
     return df
 
 
+def rolling_argmax(values, n):
+    """Position (0 = oldest) of the first maximum in each window of n values,
+    NaN for incomplete windows or windows holding a NaN, like
+    rolling(n).apply(np.argmax). Linear time: the van Herk/Gil-Werman split
+    into blocks of n with prefix and suffix maxima, all in numpy."""
+    values = np.asarray(values, dtype=np.float64)
+    size = values.shape[0]
+    result = np.full(size, np.nan)
+    if n <= 0 or size < n:
+        return result
+
+    nan_mask = np.isnan(values)
+    blocks_count = -(-size // n)
+    x = np.full(blocks_count * n, -np.inf)
+    x[:size] = np.where(nan_mask, -np.inf, values)
+    blocks = x.reshape(blocks_count, n)
+    cols = np.arange(n)
+
+    # prefix: a new maximum only when strictly greater, keeps the first one
+    prefix = np.maximum.accumulate(blocks, axis=1)
+    record = np.ones_like(blocks, dtype=bool)
+    record[:, 1:] = blocks[:, 1:] > prefix[:, :-1]
+    prefix_idx = np.maximum.accumulate(np.where(record, cols, 0), axis=1)
+
+    # suffix: scanning right to left, ties move the maximum left
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1]
+    record = np.ones_like(blocks, dtype=bool)
+    record[:, :-1] = blocks[:, :-1] >= suffix[:, 1:]
+    suffix_idx = np.minimum.accumulate(
+        np.where(record, cols, n)[:, ::-1], axis=1)[:, ::-1]
+
+    offsets = (np.arange(blocks_count) * n)[:, None]
+    prefix = prefix.ravel()
+    suffix = suffix.ravel()
+    prefix_idx = (prefix_idx + offsets).ravel()
+    suffix_idx = (suffix_idx + offsets).ravel()
+
+    # window i spans the suffix from i and the prefix up to i + n - 1
+    windows = size - n + 1
+    use_suffix = suffix[:windows] >= prefix[n - 1:size]
+    position = np.where(use_suffix, suffix_idx[:windows], prefix_idx[n - 1:size])
+    result[n - 1:] = position - np.arange(windows)
+
+    if nan_mask.any():
+        nan_count = np.concatenate(([0], np.cumsum(nan_mask)))
+        result[n - 1:][nan_count[n:] > nan_count[:windows]] = np.nan
+    return result
+
+
+def rolling_argmin(values, n):
+    return rolling_argmax(-np.asarray(values, dtype=np.float64), n)
+
+
 def Aroon(df: pd.DataFrame, n=14):
-    df['Aroon_Up'] = df.mid_h.rolling(n).apply(
-        lambda x: float(np.argmax(x) + 1) / n * 100)
-    df['Aroon_Down'] = df.mid_l.rolling(n).apply(
-        lambda x: float(np.argmin(x) + 1) / n * 100)
+    df['Aroon_Up'] = (rolling_argmax(df.mid_h, n) + 1) / n * 100
+    df['Aroon_Down'] = (rolling_argmin(df.mid_l, n) + 1) / n * 100
     return df
 
 
@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+import technicals.indicators as indicators
+
+# Indicators for many instruments at once. A Panel holds every candle field
+# as a time x instrument DataFrame, so one rolling/ewm call covers all
+# instruments. pandas runs the same per-column kernel as for a single
+# Series, so each instrument's column is identical to running the
+# technicals/indicators.py function on that instrument alone.
+#
+#   panel = Panel.from_pairs({"EUR_USD": df_eu, "GBP_USD": df_gu})
+#   compute(panel, "RSI", n=14)
+#   compute(panel, "IchimokuCloud")
+#   panel.RSI            -> time x instrument DataFrame
+#   panel.instrument("EUR_USD")
+
+
+class Panel:
+
+    def __init__(self, fields: dict):
+        self.__dict__['fields'] = dict(fields)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame):
+        """df with MultiIndex columns (field, instrument)"""
+        return cls({f: df[f] for f in df.columns.get_level_values(0).unique()})
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, instruments, index=None):
+        """arrays of shape (time, instrument) keyed by field, e.g. 'mid_c'"""
+        return cls({f: pd.DataFrame(np.asarray(a), index=index, columns=list(instruments))
+                    for f, a in arrays.items()})
+
+    @classmethod
+    def from_pairs(cls, frames: dict, columns=None, how='inner'):
+        """Aligns per-pair candle frames on their time column."""
+        if columns is None:
+            first = next(iter(frames.values()))
+            columns = [c for c in first.columns if c != 'time']
+        indexed = {pair: df.set_index('time') for pair, df in frames.items()}
+        return cls({c: pd.concat({pair: df[c] for pair, df in indexed.items()}, axis=1, join=how)
+                    for c in columns})
+
+    def __getattr__(self, name):
+        try:
+            return self.fields[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self.fields[name] = value
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    def __setitem__(self, name, value):
+        self.fields[name] = value
+
+    def __contains__(self, name):
+        return name in self.fields
+
+    def drop(self, columns, inplace=False):
+        columns = [columns] if isinstance(columns, str) else columns
+        fields = {k: v for k, v in self.fields.items() if k not in columns}
+        if inplace:
+            self.__dict__['fields'] = fields
+            return None
+        return Panel(fields)
+
+    @property
+    def index(self):
+        return next(iter(self.fields.values())).index
+
+    @property
+    def instruments(self):
+        return list(next(iter(self.fields.values())).columns)
+
+    def instrument(self, pair):
+        return pd.DataFrame({f: v[pair] for f, v in self.fields.items()})
+
+    def to_frame(self):
+        return pd.concat(self.fields, axis=1)
+
+    def __repr__(self):
+        return f"Panel() {len(self.index)} rows {self.instruments} fields:{list(self.fields)}"
+
+
+# The functions below replace the ones in technicals/indicators.py that only
+# work on a single Series; everything else runs unchanged on a Panel.
+
+def _smooth(frame: pd.DataFrame, n, smoothing):
+    # each instrument seeds from its own first n values
+    values = frame.to_numpy(dtype=np.float64)
+    out = np.column_stack([indicators.Smoother(n, smoothing).run(values[:, k])
+                           for k in range(values.shape[1])]) if values.shape[1] else values
+    return pd.DataFrame(out, index=frame.index, columns=frame.columns)
+
+
+def ATR(panel: Panel, n_atr=14, column_name="ATR", smoothing=indicators.SMA):
+    prev_c = panel.mid_c.shift(1)
+    tr1 = panel.mid_h - panel.mid_l
+    tr2 = abs(panel.mid_h - prev_c)
+    tr3 = abs(prev_c - panel.mid_l)
+    # fmax skips NaN like concat(...).max(axis=1)
+    tr = np.fmax(np.fmax(tr1, tr2), tr3)
+    if smoothing == indicators.SMA:
+        panel[column_name] = tr.rolling(window=n_atr).mean()
+    else:
+        panel[column_name] = _smooth(tr, n_atr, smoothing)
+    return panel
+
+
+def RSI(panel: Panel, n=14, smoothing=indicators.SMA):
+    delta = panel.mid_c.diff()
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+
+    if smoothing == indicators.SMA:
+        avg_gain = gain.rolling(window=n, min_periods=1).mean()
+        avg_loss = loss.rolling(window=n, min_periods=1).mean()
+    else:
+        avg_gain = _smooth(gain, n, smoothing)
+        avg_loss = _smooth(loss, n, smoothing)
+
+    rs = avg_gain / avg_loss
+    rsi = 100 - (100 / (1 + rs))
+
+    panel['RSI'] = rsi.ffill()
+    return panel
+
+
+def KeltnerChannels(panel: Panel, n_ema=20, n_atr=10):
+    panel['EMA'] = panel.mid_c.ewm(span=n_ema, min_periods=n_ema).mean()
+    panel = ATR(panel, n_atr=n_atr, column_name="ATR_KeltnerChannels")
+    c_atr = "ATR_KeltnerChannels"
+    panel['KeUp'] = panel[c_atr] * 2 + panel.EMA
+    panel['KeLo'] = panel.EMA - panel[c_atr] * 2
+    panel.drop(columns=c_atr, inplace=True)
+    return panel
+
+
+def ADX(panel: Panel, n=14, smoothing=indicators.SMA):
+    tr1 = panel.mid_h - panel.mid_l
+    tr2 = np.abs(panel.mid_h - panel.mid_c.shift(1))
+    tr3 = np.abs(panel.mid_l - panel.mid_c.shift(1))
+    tr = np.maximum(np.maximum(tr1, tr2), tr3)
+    tr_pos = tr.where(panel.mid_h > panel.mid_h.shift(1), 0)
+    tr_neg = tr.where(panel.mid_l < panel.mid_l.shift(1), 0)
+    if smoothing == indicators.SMA:
+        atr = tr.rolling(window=n).mean()
+        tr_pos_smoothed = tr_pos.rolling(window=n).mean()
+        tr_neg_smoothed = tr_neg.rolling(window=n).mean()
+    else:
+        # the first row has no true range, keep it out of the seeds
+        atr = _smooth(tr, n, smoothing)
+        tr_pos_smoothed = _smooth(tr_pos.where(tr.notna()), n, smoothing)
+        tr_neg_smoothed = _smooth(tr_neg.where(tr.notna()), n, smoothing)
+    pos_di = (tr_pos_smoothed / atr) * 100
+    neg_di = (tr_neg_smoothed / atr) * 100
+    dx = np.abs((pos_di - neg_di) / (pos_di + neg_di)) * 100
+    if smoothing == indicators.SMA:
+        panel['ADX'] = dx.rolling(window=n).mean()
+    else:
+        panel['ADX'] = _smooth(dx, n, smoothing)
+    return panel
+
+
+def _rolling_position(frame: pd.DataFrame, n, func):
+    values = frame.to_numpy(dtype=np.float64)
+    out = np.column_stack([func(values[:, k], n) for k in range(values.shape[1])]) \
+        if values.shape[1] else values
+    return pd.DataFrame(out, index=frame.index, columns=frame.columns)
+
+
+def Aroon(panel: Panel, n=14):
+    panel['Aroon_Up'] = (_rolling_position(
+        panel.mid_h, n, indicators.rolling_argmax) + 1) / n * 100
+    panel['Aroon_Down'] = (_rolling_position(
+        panel.mid_l, n, indicators.rolling_argmin) + 1) / n * 100
+    return panel
+
+
+def Aroon_Oscillator(panel: Panel, n=14):
+    panel = Aroon(panel, n)
+    panel['Aroon_Oscillator'] = panel['Aroon_Up'] - panel['Aroon_Down']
+    return panel
+
+
+PANEL_FUNCTIONS = {
+    'ATR': ATR,
+    'RSI': RSI,
+    'KeltnerChannels': KeltnerChannels,
+    'ADX': ADX,
+    'Aroon': Aroon,
+    'Aroon_Oscillator': Aroon_Oscillator,
+}
+
+
+def compute(panel: Panel, name, **params):
+    func = PANEL_FUNCTIONS.get(name) or getattr(indicators, name)
+    return func(panel, **params)
@@ -1,7 +1,41 @@
-import pandas as pd
 import json
+import os
+import pandas as pd
 import numpy as np
-import dask.dataframe as dd
+
+# Pattern thresholds come from the "pattern_config_data" section of the
+# repo's config.json. Nothing is read at import time: the file is loaded the
+# first time a pattern function needs it, or a PatternConfig can be passed
+# to any of them (or set once with set_pattern_config).
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'config.json')
+PATTERN_CONFIG_KEYS = [
+    'HANGING_MAN_BODY',
+    'HANGING_MAN_HEIGHT',
+    'SHOOTING_STAR_HEIGHT',
+    'SPINNING_TOP_MIN',
+    'SPINNING_TOP_MAX',
+    'MARUBOZU',
+    'ENGULFING_FACTOR',
+    'MORNING_STAR_PREV2_BODY',
+    'MORNING_STAR_PREV_BODY',
+    'TWEEZER_BODY',
+    'TWEEZER_HL',
+    'TWEEZER_TOP_BODY',
+    'TWEEZER_BOTTOM_BODY',
+    'DOJI_BODY',
+    'HAMMER_UPPER',
+    'HAMMER_LOWER',
+    'INVERTED_HAMMER_UPPER',
+    'INVERTED_HAMMER_LOWER',
+    'DARK_CLOUD_COVER_PERCENTAGE',
+    'PIERCING_PERCENTAGE',
+    'BULLISH_ENGULFING_PERCENTAGE',
+    'BULLISH_HARAMI_PERCENTAGE',
+    'BEARISH_ENGULFING_PERCENTAGE',
+    'BEARISH_HARAMI_PERCENTAGE',
+]
 
 
 def read_config(file_path):
@@ -10,34 +44,44 @@ def read_config(file_path):
     return config
 
 
-config = read_config('../config.json')
-pattern_config_data = config['pattern_config_data']
-
-
-HANGING_MAN_BODY = pattern_config_data['HANGING_MAN_BODY']
-HANGING_MAN_HEIGHT = pattern_config_data['HANGING_MAN_HEIGHT']
-SHOOTING_STAR_HEIGHT = pattern_config_data['SHOOTING_STAR_HEIGHT']
-SPINNING_TOP_MIN = pattern_config_data['SPINNING_TOP_MIN']
-SPINNING_TOP_MAX = pattern_config_data['SPINNING_TOP_MAX']
-MARUBOZU = pattern_config_data['MARUBOZU']
-ENGULFING_FACTOR = pattern_config_data['ENGULFING_FACTOR']
-MORNING_STAR_PREV2_BODY = pattern_config_data['MORNING_STAR_PREV2_BODY']
-MORNING_STAR_PREV_BODY = pattern_config_data['MORNING_STAR_PREV_BODY']
-TWEEZER_BODY = pattern_config_data['TWEEZER_BODY']
-TWEEZER_HL = pattern_config_data['TWEEZER_HL']
-TWEEZER_TOP_BODY = pattern_config_data['TWEEZER_TOP_BODY']
-TWEEZER_BOTTOM_BODY = pattern_config_data['TWEEZER_BOTTOM_BODY']
-DOJI_BODY = pattern_config_data['DOJI_BODY']
-HAMMER_UPPER = pattern_config_data['HAMMER_UPPER']
-HAMMER_LOWER = pattern_config_data['HAMMER_LOWER']
-INVERTED_HAMMER_UPPER = pattern_config_data['INVERTED_HAMMER_UPPER']
-INVERTED_HAMMER_LOWER = pattern_config_data['INVERTED_HAMMER_LOWER']
-DARK_CLOUD_COVER_PERCENTAGE = pattern_config_data['DARK_CLOUD_COVER_PERCENTAGE']
-PIERCING_PERCENTAGE = pattern_config_data['PIERCING_PERCENTAGE']
-BULLISH_ENGULFING_PERCENTAGE = pattern_config_data['BULLISH_ENGULFING_PERCENTAGE']
-BULLISH_HARAMI_PERCENTAGE = pattern_config_data['BULLISH_HARAMI_PERCENTAGE']
-BEARISH_ENGULFING_PERCENTAGE = pattern_config_data['BEARISH_ENGULFING_PERCENTAGE']
-BEARISH_HARAMI_PERCENTAGE = pattern_config_data['BEARISH_HARAMI_PERCENTAGE']
+class PatternConfig:
+
+    def __init__(self, values: dict):
+        missing = [k for k in PATTERN_CONFIG_KEYS if k not in values]
+        if missing:
+            raise KeyError(f"pattern config is missing {missing}")
+        self.values = {k: values[k] for k in PATTERN_CONFIG_KEYS}
+        for k, v in self.values.items():
+            setattr(self, k, v)
+
+    @classmethod
+    def from_file(cls, file_path=CONFIG_FILE):
+        return cls(read_config(file_path)['pattern_config_data'])
+
+    def __repr__(self):
+        return f"PatternConfig() {self.values}"
+
+
+_pattern_config = None
+
+
+def get_pattern_config():
+    global _pattern_config
+    if _pattern_config is None:
+        _pattern_config = PatternConfig.from_file()
+    return _pattern_config
+
+
+def set_pattern_config(config: PatternConfig):
+    global _pattern_config
+    _pattern_config = config
+
+
+def __getattr__(name):
+    # the thresholds used to be module constants, e.g. patterns.DOJI_BODY
+    if name in PATTERN_CONFIG_KEYS:
+        return getattr(get_pattern_config(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def apply_candle_props(df: pd.DataFrame):
@@ -80,101 +124,102 @@ def apply_candle_props(df: pd.DataFrame):
     return df_an
 
 
-def set_candle_patterns(df_an: pd.DataFrame):
+def set_candle_patterns(df_an: pd.DataFrame, config: PatternConfig = None):
+    cfg = config or get_pattern_config()
     df_an['HANGING_MAN'] = (
-        (df_an['body_bottom_percentage'] > HANGING_MAN_HEIGHT) &
-        (df_an['body_percentage'] < HANGING_MAN_BODY)
+        (df_an['body_bottom_percentage'] > cfg.HANGING_MAN_HEIGHT) &
+        (df_an['body_percentage'] < cfg.HANGING_MAN_BODY)
     )
     df_an['SHOOTING_STAR'] = (
-        (df_an['body_top_percentage'] < SHOOTING_STAR_HEIGHT) &
-        (df_an['body_percentage'] < HANGING_MAN_BODY)
+        (df_an['body_top_percentage'] < cfg.SHOOTING_STAR_HEIGHT) &
+        (df_an['body_percentage'] < cfg.HANGING_MAN_BODY)
     )
     df_an['SPINNING_TOP'] = (
-        (df_an['body_top_percentage'] < SPINNING_TOP_MAX) &
-        (df_an['body_bottom_percentage'] > SPINNING_TOP_MIN) &
-        (df_an['body_percentage'] < HANGING_MAN_BODY)
+        (df_an['body_top_percentage'] < cfg.SPINNING_TOP_MAX) &
+        (df_an['body_bottom_percentage'] > cfg.SPINNING_TOP_MIN) &
+        (df_an['body_percentage'] < cfg.HANGING_MAN_BODY)
     )
-    df_an['MARUBOZU'] = (df_an['body_percentage'] > MARUBOZU)
+    df_an['MARUBOZU'] = (df_an['body_percentage'] > cfg.MARUBOZU)
     df_an['ENGULFING'] = (
         (df_an['direction'] != df_an['direction_prev']) &
-        (df_an['body_size'] > df_an['body_size_prev'] * ENGULFING_FACTOR)
+        (df_an['body_size'] > df_an['body_size_prev'] * cfg.ENGULFING_FACTOR)
     )
     df_an['TWEEZER_TOP'] = (
-        (np.abs(df_an['body_size_change']) < TWEEZER_BODY) &
+        (np.abs(df_an['body_size_change']) < cfg.TWEEZER_BODY) &
         (df_an['direction'] == -1) &
         (df_an['direction'] != df_an['direction_prev']) &
-        (np.abs(df_an['low_change']) < TWEEZER_HL) &
-        (np.abs(df_an['high_change']) < TWEEZER_HL) &
-        (df_an['body_top_percentage'] < TWEEZER_TOP_BODY)
+        (np.abs(df_an['low_change']) < cfg.TWEEZER_HL) &
+        (np.abs(df_an['high_change']) < cfg.TWEEZER_HL) &
+        (df_an['body_top_percentage'] < cfg.TWEEZER_TOP_BODY)
     )
     df_an['TWEEZER_BOTTOM'] = (
-        (np.abs(df_an['body_size_change']) < TWEEZER_BODY) &
+        (np.abs(df_an['body_size_change']) < cfg.TWEEZER_BODY) &
         (df_an['direction'] == 1) &
         (df_an['direction'] != df_an['direction_prev']) &
-        (np.abs(df_an['low_change']) < TWEEZER_HL) &
-        (np.abs(df_an['high_change']) < TWEEZER_HL) &
-        (df_an['body_bottom_percentage'] > TWEEZER_BOTTOM_BODY)
+        (np.abs(df_an['low_change']) < cfg.TWEEZER_HL) &
+        (np.abs(df_an['high_change']) < cfg.TWEEZER_HL) &
+        (df_an['body_bottom_percentage'] > cfg.TWEEZER_BOTTOM_BODY)
     )
     df_an['MORNING_STAR'] = (
-        (df_an['body_percentage_prev_2'] > MORNING_STAR_PREV2_BODY) &
-        (df_an['body_percentage_prev'] < MORNING_STAR_PREV_BODY) &
+        (df_an['body_percentage_prev_2'] > cfg.MORNING_STAR_PREV2_BODY) &
+        (df_an['body_percentage_prev'] < cfg.MORNING_STAR_PREV_BODY) &
         (df_an['direction'] == 1) &
         (df_an['direction_prev_2'] != 1) &
         (df_an['mid_c'] > df_an['mid_point_prev_2'])
     )
     df_an['EVENING_STAR'] = (
-        (df_an['body_percentage_prev_2'] > MORNING_STAR_PREV2_BODY) &
-        (df_an['body_percentage_prev'] < MORNING_STAR_PREV_BODY) &
+        (df_an['body_percentage_prev_2'] > cfg.MORNING_STAR_PREV2_BODY) &
+        (df_an['body_percentage_prev'] < cfg.MORNING_STAR_PREV_BODY) &
         (df_an['direction'] == -1) &
         (df_an['direction_prev_2'] != -1) &
         (df_an['mid_c'] < df_an['mid_point_prev_2'])
     )
     df_an['DOJI'] = (
-        (df_an['body_percentage'] < DOJI_BODY)
+        (df_an['body_percentage'] < cfg.DOJI_BODY)
     )
     df_an['HAMMER'] = (
-        (df_an['body_bottom_percentage'] > HAMMER_LOWER) &
-        (df_an['body_top_percentage'] < HAMMER_UPPER) &
-        (df_an['body_percentage'] < HANGING_MAN_BODY)
+        (df_an['body_bottom_percentage'] > cfg.HAMMER_LOWER) &
+        (df_an['body_top_percentage'] < cfg.HAMMER_UPPER) &
+        (df_an['body_percentage'] < cfg.HANGING_MAN_BODY)
     )
     df_an['INVERTED_HAMMER'] = (
-        (df_an['body_bottom_percentage'] < INVERTED_HAMMER_LOWER) &
-        (df_an['body_top_percentage'] > INVERTED_HAMMER_UPPER) &
-        (df_an['body_percentage'] < HANGING_MAN_BODY)
+        (df_an['body_bottom_percentage'] < cfg.INVERTED_HAMMER_LOWER) &
+        (df_an['body_top_percentage'] > cfg.INVERTED_HAMMER_UPPER) &
+        (df_an['body_percentage'] < cfg.HANGING_MAN_BODY)
     )
     df_an['DARK_CLOUD_COVER'] = (
         (df_an['direction_prev'] == 1) &
         (df_an['direction'] == -1) &
-        (df_an['mid_c'].pct_change() < -DARK_CLOUD_COVER_PERCENTAGE)
+        (df_an['mid_c'].pct_change() < -cfg.DARK_CLOUD_COVER_PERCENTAGE)
     )
     df_an['PIERCING_PATTERN'] = (
         (df_an['direction_prev'] == -1) &
         (df_an['direction'] == 1) &
-        (df_an['mid_c'].pct_change() > PIERCING_PERCENTAGE)
+        (df_an['mid_c'].pct_change() > cfg.PIERCING_PERCENTAGE)
     )
     df_an['BULLISH_ENGULFING'] = (
         (df_an['direction_prev'] == -1) &
         (df_an['direction'] == 1) &
         (df_an['body_size'] > df_an['body_size_prev']
-         * BULLISH_ENGULFING_PERCENTAGE)
+         * cfg.BULLISH_ENGULFING_PERCENTAGE)
     )
     df_an['BULLISH_HARAMI'] = (
         (df_an['direction_prev'] == -1) &
         (df_an['direction'] == 1) &
         (df_an['body_size'] < df_an['body_size_prev']
-         * BULLISH_HARAMI_PERCENTAGE)
+         * cfg.BULLISH_HARAMI_PERCENTAGE)
     )
     df_an['BEARISH_ENGULFING'] = (
         (df_an['direction_prev'] == 1) &
         (df_an['direction'] == -1) &
         (df_an['body_size'] > df_an['body_size_prev']
-         * BEARISH_ENGULFING_PERCENTAGE)
+         * cfg.BEARISH_ENGULFING_PERCENTAGE)
     )
     df_an['BEARISH_HARAMI'] = (
         (df_an['direction_prev'] == 1) &
         (df_an['direction'] == -1) &
         (df_an['body_size'] < df_an['body_size_prev']
-         * BEARISH_HARAMI_PERCENTAGE)
+         * cfg.BEARISH_HARAMI_PERCENTAGE)
     )
     df_an['THREE_WHITE_SOLDIERS'] = (
         (df_an['direction'] == 1) &
@@ -197,27 +242,165 @@ def set_candle_patterns(df_an: pd.DataFrame):
     df_an['BULLISH_ABANDONED_BABY'] = (
         (df_an['direction'].shift(2) == -1) &
         (df_an['direction'] == 1) &
-        (df_an['body_percentage'].shift(1) < DOJI_BODY) &
+        (df_an['body_percentage'].shift(1) < cfg.DOJI_BODY) &
         (df_an['mid_o'].shift(1) < df_an['mid_c'].shift(2)) &
         (df_an['mid_o'] > df_an['mid_c'].shift(1))
     )
     df_an['BEARISH_ABANDONED_BABY'] = (
         (df_an['direction'].shift(2) == 1) &
         (df_an['direction'] == -1) &
-        (df_an['body_percentage'].shift(1) < DOJI_BODY) &
+        (df_an['body_percentage'].shift(1) < cfg.DOJI_BODY) &
         (df_an['mid_o'].shift(1) > df_an['mid_c'].shift(2)) &
         (df_an['mid_o'] < df_an['mid_c'].shift(1))
     )
     df_an['BULLISH_TRI_STAR'] = (
-        (df_an['body_percentage'] < DOJI_BODY) &
-        (df_an['body_percentage'].shift(1) < DOJI_BODY) &
-        (df_an['body_percentage'].shift(2) < DOJI_BODY) &
+        (df_an['body_percentage'] < cfg.DOJI_BODY) &
+        (df_an['body_percentage'].shift(1) < cfg.DOJI_BODY) &
+        (df_an['body_percentage'].shift(2) < cfg.DOJI_BODY) &
         (df_an['mid_o'].shift(1) < df_an['mid_c'].shift(2)) &
         (df_an['mid_o'] > df_an['mid_c'].shift(1))
     )
 
 
-def apply_patterns(df: pd.DataFrame):
+def apply_patterns(df: pd.DataFrame, config: PatternConfig = None):
     df_an = apply_candle_props(df)
-    set_candle_patterns(df_an)
+    set_candle_patterns(df_an, config)
     return df_an
+
+
+# Bit-packed pattern engine: the candle properties are computed once as
+# numpy arrays and every pattern from set_candle_patterns() becomes one bit
+# of a uint32 per candle (4 bytes instead of ~25 bool/float columns).
+#
+#   masks = pattern_masks(df)
+#   df[has_pattern(masks, 'HAMMER')]
+#   decode_patterns(masks[-1])   -> ['DOJI', 'SPINNING_TOP']
+
+PATTERNS = [
+    'HANGING_MAN', 'SHOOTING_STAR', 'SPINNING_TOP', 'MARUBOZU', 'ENGULFING',
+    'TWEEZER_TOP', 'TWEEZER_BOTTOM', 'MORNING_STAR', 'EVENING_STAR', 'DOJI',
+    'HAMMER', 'INVERTED_HAMMER', 'DARK_CLOUD_COVER', 'PIERCING_PATTERN',
+    'BULLISH_ENGULFING', 'BULLISH_HARAMI', 'BEARISH_ENGULFING', 'BEARISH_HARAMI',
+    'THREE_WHITE_SOLDIERS', 'THREE_BLACK_CROWS', 'BULLISH_ABANDONED_BABY',
+    'BEARISH_ABANDONED_BABY', 'BULLISH_TRI_STAR'
+]
+PATTERN_BITS = {name: np.uint32(1 << i) for i, name in enumerate(PATTERNS)}
+
+
+def _shift(values, n):
+    out = np.empty(values.shape[0], dtype=np.float64)
+    out[:n] = np.nan
+    out[n:] = values[:values.shape[0] - n]
+    return out
+
+
+def _pct_change(values):
+    return (values / _shift(values, 1) - 1) * 100
+
+
+def candle_props(mid_o, mid_h, mid_l, mid_c):
+    """The properties apply_candle_props() adds, as a dict of arrays."""
+    mid_o, mid_h, mid_l, mid_c = (np.asarray(x, dtype=np.float64)
+                                  for x in (mid_o, mid_h, mid_l, mid_c))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        direction = mid_c - mid_o
+        body_size = np.abs(direction)
+        direction = np.where(direction >= 0, 1.0, -1.0)
+        full_range = mid_h - mid_l
+        body_upper = np.maximum(mid_c, mid_o)
+        return dict(
+            mid_o=mid_o,
+            mid_c=mid_c,
+            direction=direction,
+            body_size=body_size,
+            body_percentage=(body_size / full_range) * 100,
+            body_bottom_percentage=((np.minimum(mid_c, mid_o) - mid_l) / full_range) * 100,
+            body_top_percentage=100 - (((mid_h - body_upper) / full_range) * 100),
+            mid_point=full_range / 2 + mid_l,
+            low_change=_pct_change(mid_l),
+            high_change=_pct_change(mid_h),
+            body_size_change=_pct_change(body_size),
+            close_change=mid_c / _shift(mid_c, 1) - 1
+        )
+
+
+# properties the patterns read from the previous candle and the one before
+PREV_PROPS = ['direction', 'body_size', 'body_percentage', 'mid_o', 'mid_c']
+PREV_2_PROPS = ['direction', 'body_percentage', 'mid_c', 'mid_point']
+
+
+def evaluate_patterns(p, p1, p2, config: PatternConfig = None):
+    """Pattern conditions for candles p given the previous (p1) and the one
+    before (p2). Works element-wise on arrays and on plain floats."""
+    cfg = config or get_pattern_config()
+    body = p['body_percentage']
+    top = p['body_top_percentage']
+    bottom = p['body_bottom_percentage']
+    d, d1, d2 = p['direction'], p1['direction'], p2['direction']
+    small_body = body < cfg.HANGING_MAN_BODY
+    tweezer = ((abs(p['body_size_change']) < cfg.TWEEZER_BODY) & (d != d1) &
+               (abs(p['low_change']) < cfg.TWEEZER_HL) & (abs(p['high_change']) < cfg.TWEEZER_HL))
+    star = (p2['body_percentage'] > cfg.MORNING_STAR_PREV2_BODY) & \
+        (p1['body_percentage'] < cfg.MORNING_STAR_PREV_BODY)
+    c, o, c1, o1, c2 = p['mid_c'], p['mid_o'], p1['mid_c'], p1['mid_o'], p2['mid_c']
+    return {
+        'HANGING_MAN': (bottom > cfg.HANGING_MAN_HEIGHT) & small_body,
+        'SHOOTING_STAR': (top < cfg.SHOOTING_STAR_HEIGHT) & small_body,
+        'SPINNING_TOP': (top < cfg.SPINNING_TOP_MAX) & (bottom > cfg.SPINNING_TOP_MIN) & small_body,
+        'MARUBOZU': body > cfg.MARUBOZU,
+        'ENGULFING': (d != d1) & (p['body_size'] > p1['body_size'] * cfg.ENGULFING_FACTOR),
+        'TWEEZER_TOP': tweezer & (d == -1) & (top < cfg.TWEEZER_TOP_BODY),
+        'TWEEZER_BOTTOM': tweezer & (d == 1) & (bottom > cfg.TWEEZER_BOTTOM_BODY),
+        'MORNING_STAR': star & (d == 1) & (d2 != 1) & (c > p2['mid_point']),
+        'EVENING_STAR': star & (d == -1) & (d2 != -1) & (c < p2['mid_point']),
+        'DOJI': body < cfg.DOJI_BODY,
+        'HAMMER': (bottom > cfg.HAMMER_LOWER) & (top < cfg.HAMMER_UPPER) & small_body,
+        'INVERTED_HAMMER': (bottom < cfg.INVERTED_HAMMER_LOWER) & (top > cfg.INVERTED_HAMMER_UPPER) & small_body,
+        'DARK_CLOUD_COVER': (d1 == 1) & (d == -1) & (p['close_change'] < -cfg.DARK_CLOUD_COVER_PERCENTAGE),
+        'PIERCING_PATTERN': (d1 == -1) & (d == 1) & (p['close_change'] > cfg.PIERCING_PERCENTAGE),
+        'BULLISH_ENGULFING': (d1 == -1) & (d == 1) &
+        (p['body_size'] > p1['body_size'] * cfg.BULLISH_ENGULFING_PERCENTAGE),
+        'BULLISH_HARAMI': (d1 == -1) & (d == 1) &
+        (p['body_size'] < p1['body_size'] * cfg.BULLISH_HARAMI_PERCENTAGE),
+        'BEARISH_ENGULFING': (d1 == 1) & (d == -1) &
+        (p['body_size'] > p1['body_size'] * cfg.BEARISH_ENGULFING_PERCENTAGE),
+        'BEARISH_HARAMI': (d1 == 1) & (d == -1) &
+        (p['body_size'] < p1['body_size'] * cfg.BEARISH_HARAMI_PERCENTAGE),
+        'THREE_WHITE_SOLDIERS': (d == 1) & (d1 == 1) & (d2 == 1) & (c > c1) & (c1 > c2) &
+        (o < c1) & (o1 < c2),
+        'THREE_BLACK_CROWS': (d == -1) & (d1 == -1) & (d2 == -1) & (c < c1) & (c1 < c2) &
+        (o > c1) & (o1 > c2),
+        'BULLISH_ABANDONED_BABY': (d2 == -1) & (d == 1) & (p1['body_percentage'] < cfg.DOJI_BODY) &
+        (o1 < c2) & (o > c1),
+        'BEARISH_ABANDONED_BABY': (d2 == 1) & (d == -1) & (p1['body_percentage'] < cfg.DOJI_BODY) &
+        (o1 > c2) & (o < c1),
+        'BULLISH_TRI_STAR': (body < cfg.DOJI_BODY) & (p1['body_percentage'] < cfg.DOJI_BODY) &
+        (p2['body_percentage'] < cfg.DOJI_BODY) & (o1 < c2) & (o > c1),
+    }
+
+
+def pattern_masks(df: pd.DataFrame, config: PatternConfig = None):
+    """One uint32 per candle with a bit set for each pattern it matches."""
+    p = candle_props(df.mid_o, df.mid_h, df.mid_l, df.mid_c)
+    p1 = {k: _shift(p[k], 1) for k in PREV_PROPS}
+    p2 = {k: _shift(p[k], 2) for k in PREV_2_PROPS}
+    masks = np.zeros(df.shape[0], dtype=np.uint32)
+    with np.errstate(invalid='ignore'):
+        for name, matched in evaluate_patterns(p, p1, p2, config).items():
+            np.bitwise_or(masks, PATTERN_BITS[name], out=masks, where=matched)
+    return masks
+
+
+def has_pattern(masks, name):
+    return (np.asarray(masks) & PATTERN_BITS[name]) != 0
+
+
+def decode_patterns(mask):
+    """Pattern names set in a single mask."""
+    mask = int(mask)
+    return [name for name in PATTERNS if mask & int(PATTERN_BITS[name])]
+
+
+def patterns_frame(masks, index=None):
+    """The masks as bool columns, like the ones set_candle_patterns() adds."""
+    return pd.DataFrame({name: has_pattern(masks, name) for name in PATTERNS}, index=index)
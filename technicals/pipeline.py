@@ -0,0 +1,268 @@
+import pandas as pd
+import numpy as np
+from technicals.indicators import rolling_argmax, rolling_argmin, Smoother, SMA
+
+# Computes several indicators from technicals/indicators.py in one go.
+# Intermediates (typical price, true range, rolling highs/lows, EMAs, ...)
+# are nodes keyed by their parameters; an indicator asks for the nodes it
+# needs and each node is computed once, however many indicators share it.
+# All output columns are added to the frame in a single concat.
+#
+#   pipeline = IndicatorPipeline([
+#       ("ATR", dict(n_atr=14)),
+#       ("IchimokuCloud", dict(n1=9, n2=26, n3=52)),
+#       ("BollingerBands", dict(n=12, n_std=2.5)),
+#   ])
+#   df = pipeline.run(df)
+
+
+class Intermediates:
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.nodes = {}
+
+    def get(self, key, compute):
+        if key not in self.nodes:
+            self.nodes[key] = compute()
+        return self.nodes[key]
+
+    def prev_c(self):
+        return self.get('prev_c', lambda: self.df.mid_c.shift(1))
+
+    def shift_c(self, n):
+        return self.get(('shift_c', n), lambda: self.df.mid_c.shift(n))
+
+    def diff_c(self):
+        return self.get('diff_c', lambda: self.df.mid_c.diff())
+
+    def typical(self):
+        return self.get('typical', lambda: (self.df.mid_h + self.df.mid_l + self.df.mid_c) / 3)
+
+    def typical_mean(self, n):
+        return self.get(('typical_mean', n), lambda: self.typical().rolling(window=n).mean())
+
+    def typical_std(self, n):
+        return self.get(('typical_std', n), lambda: self.typical().rolling(window=n).std())
+
+    def true_range(self):
+        def compute():
+            prev_c = self.prev_c()
+            tr1 = self.df.mid_h - self.df.mid_l
+            tr2 = abs(self.df.mid_h - prev_c)
+            tr3 = abs(prev_c - self.df.mid_l)
+            return pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+        return self.get('tr', compute)
+
+    def atr(self, n, smoothing=SMA):
+        if smoothing == SMA:
+            return self.get(('atr', n), lambda: self.true_range().rolling(window=n).mean())
+        return self.get(('atr', n, smoothing), lambda: pd.Series(
+            Smoother(n, smoothing).run(self.true_range()), index=self.df.index))
+
+    def ema(self, span, min_periods=0, adjust=True):
+        return self.get(('ema', span, min_periods, adjust),
+                        lambda: self.df.mid_c.ewm(span=span, min_periods=min_periods, adjust=adjust).mean())
+
+    def rolling_max(self, column, n):
+        return self.get(('max', column, n), lambda: self.df[column].rolling(n).max())
+
+    def rolling_min(self, column, n):
+        return self.get(('min', column, n), lambda: self.df[column].rolling(n).min())
+
+    def rolling_sum(self, column, n):
+        return self.get(('sum', column, n), lambda: self.df[column].rolling(n).sum())
+
+    def hl_range(self):
+        return self.get('hl_range', lambda: self.df.mid_h - self.df.mid_l)
+
+
+def _bollinger_bands(nodes: Intermediates, n=20, n_std=2):
+    ma = nodes.typical_mean(n)
+    stddev = nodes.typical_std(n)
+    return {'BB_MA': ma, 'BB_UP': ma + stddev * n_std, 'BB_LW': ma - stddev * n_std}
+
+
+def _keltner_channels(nodes: Intermediates, n_ema=20, n_atr=10):
+    ema = nodes.ema(n_ema, n_ema)
+    atr = nodes.atr(n_atr)
+    return {'EMA': ema, 'KeUp': atr * 2 + ema, 'KeLo': ema - atr * 2}
+
+
+def _atr(nodes: Intermediates, n_atr=14, column_name="ATR", smoothing=SMA):
+    return {column_name: nodes.atr(n_atr, smoothing)}
+
+
+def _smooth(series: pd.Series, n, smoothing):
+    return pd.Series(Smoother(n, smoothing).run(series), index=series.index)
+
+
+def _rsi(nodes: Intermediates, n=14, smoothing=SMA):
+    delta = nodes.diff_c()
+    if smoothing == SMA:
+        avg_gain = delta.clip(lower=0).rolling(window=n, min_periods=1).mean()
+        avg_loss = (-delta.clip(upper=0)).rolling(window=n, min_periods=1).mean()
+    else:
+        avg_gain = _smooth(delta.clip(lower=0), n, smoothing)
+        avg_loss = _smooth(-delta.clip(upper=0), n, smoothing)
+    rs = avg_gain / avg_loss
+    return {'RSI': (100 - (100 / (1 + rs))).ffill()}
+
+
+def _macd(nodes: Intermediates, n_slow=26, n_fast=12, n_signal=9):
+    macd = nodes.ema(n_fast, n_fast) - nodes.ema(n_slow, n_slow)
+    signal = macd.ewm(span=n_signal, min_periods=n_signal).mean()
+    return {'MACD': macd, 'SIGNAL': signal, 'HIST': macd - signal}
+
+
+def _vwap(nodes: Intermediates):
+    df = nodes.df
+    return {'VWAP': (nodes.typical() * df.volume).cumsum() / df.volume.cumsum()}
+
+
+def _adx(nodes: Intermediates, n=14, smoothing=SMA):
+    df = nodes.df
+    # ADX leaves the first true range undefined instead of using h - l
+    tr = nodes.true_range().where(nodes.prev_c().notna())
+    tr_pos = pd.Series(np.where(df.mid_h > df.mid_h.shift(1), tr, 0), index=df.index)
+    tr_neg = pd.Series(np.where(df.mid_l < df.mid_l.shift(1), tr, 0), index=df.index)
+    if smoothing == SMA:
+        atr = tr.rolling(window=n).mean()
+        pos_di = (tr_pos.rolling(window=n).mean() / atr) * 100
+        neg_di = (tr_neg.rolling(window=n).mean() / atr) * 100
+    else:
+        atr = _smooth(tr, n, smoothing)
+        pos_di = (_smooth(tr_pos.where(tr.notna()), n, smoothing) / atr) * 100
+        neg_di = (_smooth(tr_neg.where(tr.notna()), n, smoothing) / atr) * 100
+    dx = np.abs((pos_di - neg_di) / (pos_di + neg_di)) * 100
+    if smoothing == SMA:
+        return {'ADX': dx.rolling(window=n).mean()}
+    return {'ADX': _smooth(dx, n, smoothing)}
+
+
+def _stochastic_oscillator(nodes: Intermediates, n=14):
+    low_min = nodes.rolling_min('mid_l', n)
+    high_max = nodes.rolling_max('mid_h', n)
+    k = (nodes.df.mid_c - low_min) / (high_max - low_min) * 100
+    return {'%K': k, '%D': k.rolling(window=3).mean()}
+
+
+def _moving_average(nodes: Intermediates, n=50):
+    return {f'MA_{n}': nodes.get(('ma', n), lambda: nodes.df.mid_c.rolling(window=n).mean())}
+
+
+def _exponential_moving_average(nodes: Intermediates, n=50):
+    return {f'EMA_{n}': nodes.ema(n, adjust=False)}
+
+
+def _commodity_channel_index(nodes: Intermediates, n=20):
+    return {'CCI': (nodes.typical() - nodes.typical_mean(n)) / (0.015 * nodes.typical_std(n))}
+
+
+def _momentum(nodes: Intermediates, n=14):
+    return {'Momentum': nodes.df.mid_c - nodes.shift_c(n)}
+
+
+def _rate_of_change(nodes: Intermediates, n=14):
+    shifted = nodes.shift_c(n)
+    return {'ROC': ((nodes.df.mid_c - shifted) / shifted) * 100}
+
+
+def _on_balance_volume(nodes: Intermediates):
+    return {'OBV': (np.sign(nodes.diff_c()) * nodes.df.volume).fillna(0).cumsum()}
+
+
+def _adl(nodes: Intermediates):
+    df = nodes.df
+    clv = ((df.mid_c - df.mid_l) - (df.mid_h - df.mid_c)) / nodes.hl_range()
+    return {'ADL': (clv.fillna(0) * df.volume).cumsum()}
+
+
+def _aroon(nodes: Intermediates, n=14):
+    df = nodes.df
+    return nodes.get(('aroon', n), lambda: {
+        'Aroon_Up': pd.Series((rolling_argmax(df.mid_h, n) + 1) / n * 100, index=df.index),
+        'Aroon_Down': pd.Series((rolling_argmin(df.mid_l, n) + 1) / n * 100, index=df.index)
+    })
+
+
+def _aroon_oscillator(nodes: Intermediates, n=14):
+    out = _aroon(nodes, n)
+    return dict(out, Aroon_Oscillator=out['Aroon_Up'] - out['Aroon_Down'])
+
+
+def _cmf(nodes: Intermediates, n_cmf=20):
+    df = nodes.df
+    mf_multiplier = (df.mid_c - df.mid_l - df.mid_h + df.mid_c) / nodes.hl_range()
+    mf_volume = mf_multiplier * df.volume
+    return {'CMF': mf_volume.rolling(n_cmf).sum() / nodes.rolling_sum('volume', n_cmf)}
+
+
+def _evm(nodes: Intermediates, n=14):
+    df = nodes.df
+    mid = (df.mid_h + df.mid_l) / 2
+    br = (df.volume / 1e6) / nodes.hl_range()
+    return {'EVM': (mid - mid.shift(1)) / br}
+
+
+def _ichimoku_cloud(nodes: Intermediates, n1=9, n2=26, n3=52):
+    def midpoint(n):
+        return (nodes.rolling_max('mid_h', n) + nodes.rolling_min('mid_l', n)) / 2
+    tenkan = midpoint(n1)
+    kijun = midpoint(n2)
+    return {
+        'Tenkan_sen': tenkan,
+        'Kijun_sen': kijun,
+        'Senkou_Span_A': ((tenkan + kijun) / 2).shift(n3),
+        'Senkou_Span_B': midpoint(n3).shift(n3),
+        'Chikou_Span': nodes.df.mid_c.shift(-n2)
+    }
+
+
+BUILDERS = {
+    'BollingerBands': _bollinger_bands,
+    'KeltnerChannels': _keltner_channels,
+    'ATR': _atr,
+    'RSI': _rsi,
+    'MACD': _macd,
+    'VWAP': _vwap,
+    'ADX': _adx,
+    'StochasticOscillator': _stochastic_oscillator,
+    'MovingAverage': _moving_average,
+    'ExponentialMovingAverage': _exponential_moving_average,
+    'CommodityChannelIndex': _commodity_channel_index,
+    'Momentum': _momentum,
+    'RateOfChange': _rate_of_change,
+    'OnBalanceVolume': _on_balance_volume,
+    'ADL': _adl,
+    'Aroon': _aroon,
+    'Aroon_Oscillator': _aroon_oscillator,
+    'CMF': _cmf,
+    'EVM': _evm,
+    'IchimokuCloud': _ichimoku_cloud,
+}
+
+
+class IndicatorPipeline:
+
+    def __init__(self, indicators):
+        self.indicators = []
+        for name, params in indicators:
+            if name not in BUILDERS:
+                raise ValueError(f"Unknown indicator: {name}")
+            self.indicators.append((name, dict(params or {})))
+
+    def compute(self, df: pd.DataFrame):
+        nodes = Intermediates(df)
+        outputs = {}
+        for name, params in self.indicators:
+            outputs.update(BUILDERS[name](nodes, **params))
+        return outputs
+
+    def run(self, df: pd.DataFrame):
+        outputs = self.compute(df)
+        new_cols = pd.DataFrame(outputs, index=df.index)
+        return pd.concat([df.drop(columns=[c for c in outputs if c in df.columns]), new_cols], axis=1)
+
+    def __repr__(self):
+        return f"IndicatorPipeline({self.indicators})"
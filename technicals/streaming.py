@@ -0,0 +1,592 @@
+import abc
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+from technicals.indicators import Smoother, SMA
+from technicals.patterns import PATTERN_BITS, PatternConfig, evaluate_patterns
+
+# Incremental counterparts of technicals/indicators.py.
+# Each *Stream class takes one candle at a time (anything indexable by
+# mid_o/mid_h/mid_l/mid_c/volume, e.g. a CandleBuffer row) and returns the
+# same columns, with the same values, the batch function would give for
+# that candle. Every update is O(1) (amortised O(1) for rolling max/min).
+# ATR, RSI and ADX built with smoothing=WILDER/EMA warm up in one batch
+# pass and then carry on from the Smoother state.
+
+NAN = float('nan')
+
+
+def _div(a, b):
+    # float division with numpy/pandas semantics instead of ZeroDivisionError
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class RollingSum:
+
+    def __init__(self, n, min_periods=None):
+        self.n = n
+        self.min_periods = n if min_periods is None else min_periods
+        self.values = deque(maxlen=n)
+        self.total = 0.0
+        self.count = 0
+
+    def update(self, x):
+        if len(self.values) == self.n:
+            old = self.values[0]
+            if old == old:
+                self.total -= old
+                self.count -= 1
+                if self.count == 0:
+                    self.total = 0.0
+        self.values.append(x)
+        if x == x:
+            self.total += x
+            self.count += 1
+
+    def sum(self):
+        return self.total if self.count >= self.min_periods else NAN
+
+    def mean(self):
+        return self.total / self.count if self.count >= max(self.min_periods, 1) else NAN
+
+
+class RollingVariance:
+    # Welford's algorithm over a sliding window, ddof=1 like pandas.
+
+    def __init__(self, n):
+        self.n = n
+        self.values = deque(maxlen=n)
+        self.avg = 0.0
+        self.m2 = 0.0
+
+    def update(self, x):
+        if len(self.values) < self.n:
+            self.values.append(x)
+            delta = x - self.avg
+            self.avg += delta / len(self.values)
+            self.m2 += delta * (x - self.avg)
+        else:
+            old = self.values[0]
+            self.values.append(x)
+            prev_avg = self.avg
+            self.avg += (x - old) / self.n
+            self.m2 += (x - old) * (x - self.avg + old - prev_avg)
+            if self.m2 < 0:
+                self.m2 = 0.0
+
+    def mean(self):
+        return self.avg if len(self.values) == self.n else NAN
+
+    def std(self):
+        if len(self.values) < self.n or self.n < 2:
+            return NAN
+        return math.sqrt(self.m2 / (self.n - 1))
+
+
+class RollingExtreme:
+    # Monotonic deque; ties keep the earliest index, like np.argmax/argmin.
+
+    def __init__(self, n, is_max=True):
+        self.n = n
+        self.is_max = is_max
+        self.items = deque()
+        self.index = -1
+
+    def update(self, x):
+        self.index += 1
+        items = self.items
+        if self.is_max:
+            while items and items[-1][1] < x:
+                items.pop()
+        else:
+            while items and items[-1][1] > x:
+                items.pop()
+        items.append((self.index, x))
+        if items[0][0] <= self.index - self.n:
+            items.popleft()
+
+    def ready(self):
+        return self.index + 1 >= self.n
+
+    def value(self):
+        return self.items[0][1] if self.ready() else NAN
+
+    def position(self):
+        # position of the extreme inside the current window, 0 = oldest
+        return self.items[0][0] - (self.index - self.n + 1) if self.ready() else NAN
+
+
+class EWM:
+    # Same recursion as pandas' ewm(span=...).mean() with ignore_na=False.
+
+    def __init__(self, span, min_periods=0, adjust=True):
+        alpha = 2 / (span + 1)
+        self.old_wt_factor = 1 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.adjust = adjust
+        self.min_periods = max(min_periods, 1)
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, x):
+        is_obs = x == x
+        self.nobs += is_obs
+        if self.weighted == self.weighted:
+            self.old_wt *= self.old_wt_factor
+            if is_obs:
+                if self.weighted != x:
+                    self.weighted = ((self.old_wt * self.weighted) + (self.new_wt * x)) / \
+                        (self.old_wt + self.new_wt)
+                if self.adjust:
+                    self.old_wt += self.new_wt
+                else:
+                    self.old_wt = 1.0
+        elif is_obs:
+            self.weighted = x
+        return self.value()
+
+    def value(self):
+        return self.weighted if self.nobs >= self.min_periods else NAN
+
+
+class StreamIndicator(abc.ABC):
+
+    @abc.abstractmethod
+    def update(self, candle) -> dict:
+        """Columns for this candle, given every earlier one was passed in."""
+
+    def warm_up(self, df: pd.DataFrame):
+        out = {}
+        for candle in df.to_dict('records'):
+            out = self.update(candle)
+        return out
+
+
+class BollingerBandsStream(StreamIndicator):
+
+    def __init__(self, n=20, n_std=2):
+        self.n_std = n_std
+        self.var = RollingVariance(n)
+
+    def update(self, candle):
+        self.var.update(
+            (candle['mid_c'] + candle['mid_h'] + candle['mid_l']) / 3)
+        ma = self.var.mean()
+        std = self.var.std()
+        return {'BB_MA': ma, 'BB_UP': ma + std * self.n_std, 'BB_LW': ma - std * self.n_std}
+
+
+class ATRStream(StreamIndicator):
+
+    def __init__(self, n_atr=14, column_name="ATR", smoothing=SMA):
+        self.column_name = column_name
+        self.smoothing = smoothing
+        self.prev_c = None
+        self.tr = RollingSum(n_atr) if smoothing == SMA else Smoother(
+            n_atr, smoothing)
+
+    def update(self, candle):
+        h, l = candle['mid_h'], candle['mid_l']
+        tr = h - l
+        if self.prev_c is not None:
+            tr = max(tr, abs(h - self.prev_c), abs(self.prev_c - l))
+        self.prev_c = candle['mid_c']
+        self.tr.update(tr)
+        return {self.column_name: self.tr.mean()}
+
+    def warm_up(self, df: pd.DataFrame):
+        if self.smoothing == SMA or df.shape[0] == 0:
+            return super().warm_up(df)
+        prev_c = df.mid_c.shift(1)
+        if self.prev_c is not None:
+            prev_c.iloc[0] = self.prev_c
+        tr = pd.concat([df.mid_h - df.mid_l, abs(df.mid_h - prev_c),
+                        abs(prev_c - df.mid_l)], axis=1).max(axis=1)
+        self.tr.run(tr)
+        self.prev_c = df.mid_c.iloc[-1]
+        return {self.column_name: self.tr.mean()}
+
+
+class KeltnerChannelsStream(StreamIndicator):
+
+    def __init__(self, n_ema=20, n_atr=10):
+        self.ema = EWM(n_ema, min_periods=n_ema)
+        self.atr = ATRStream(n_atr)
+
+    def update(self, candle):
+        ema = self.ema.update(candle['mid_c'])
+        atr = self.atr.update(candle)['ATR']
+        return {'EMA': ema, 'KeUp': atr * 2 + ema, 'KeLo': ema - atr * 2}
+
+
+class RSIStream(StreamIndicator):
+
+    def __init__(self, n=14, smoothing=SMA):
+        self.smoothing = smoothing
+        self.prev_c = None
+        if smoothing == SMA:
+            self.gain = RollingSum(n, min_periods=1)
+            self.loss = RollingSum(n, min_periods=1)
+        else:
+            self.gain = Smoother(n, smoothing)
+            self.loss = Smoother(n, smoothing)
+        self.rsi = NAN
+
+    def update(self, candle):
+        c = candle['mid_c']
+        delta = NAN if self.prev_c is None else c - self.prev_c
+        self.prev_c = c
+        self.gain.update(max(delta, 0.0) if delta == delta else NAN)
+        self.loss.update(-min(delta, 0.0) if delta == delta else NAN)
+        rs = _div(self.gain.mean(), self.loss.mean())
+        rsi = 100 - (100 / (1 + rs))
+        if rsi == rsi:
+            self.rsi = rsi
+        return {'RSI': self.rsi}
+
+    def warm_up(self, df: pd.DataFrame):
+        if self.smoothing == SMA or df.shape[0] == 0:
+            return super().warm_up(df)
+        delta = df.mid_c.diff()
+        if self.prev_c is not None:
+            delta.iloc[0] = df.mid_c.iloc[0] - self.prev_c
+        avg_gain = pd.Series(self.gain.run(delta.clip(lower=0)))
+        avg_loss = pd.Series(self.loss.run(-delta.clip(upper=0)))
+        rsi = (100 - (100 / (1 + avg_gain / avg_loss))).dropna()
+        if rsi.shape[0]:
+            self.rsi = rsi.iloc[-1]
+        self.prev_c = df.mid_c.iloc[-1]
+        return {'RSI': self.rsi}
+
+
+class MACDStream(StreamIndicator):
+
+    def __init__(self, n_slow=26, n_fast=12, n_signal=9):
+        self.ema_long = EWM(n_slow, min_periods=n_slow)
+        self.ema_short = EWM(n_fast, min_periods=n_fast)
+        self.signal = EWM(n_signal, min_periods=n_signal)
+
+    def update(self, candle):
+        c = candle['mid_c']
+        macd = self.ema_short.update(c) - self.ema_long.update(c)
+        signal = self.signal.update(macd)
+        return {'MACD': macd, 'SIGNAL': signal, 'HIST': macd - signal}
+
+
+class VWAPStream(StreamIndicator):
+
+    def __init__(self):
+        self.tp_volume = 0.0
+        self.volume = 0.0
+
+    def update(self, candle):
+        tp = (candle['mid_h'] + candle['mid_l'] + candle['mid_c']) / 3
+        self.tp_volume += tp * candle['volume']
+        self.volume += candle['volume']
+        return {'VWAP': _div(self.tp_volume, self.volume)}
+
+
+class ADXStream(StreamIndicator):
+
+    def __init__(self, n=14, smoothing=SMA):
+        self.smoothing = smoothing
+        self.prev = None
+        if smoothing == SMA:
+            self.tr = RollingSum(n)
+            self.tr_pos = RollingSum(n)
+            self.tr_neg = RollingSum(n)
+            self.dx = RollingSum(n)
+        else:
+            self.tr = Smoother(n, smoothing)
+            self.tr_pos = Smoother(n, smoothing)
+            self.tr_neg = Smoother(n, smoothing)
+            self.dx = Smoother(n, smoothing)
+
+    def update(self, candle):
+        h, l, c = candle['mid_h'], candle['mid_l'], candle['mid_c']
+        if self.prev is None:
+            tr = NAN
+            tr_pos = tr_neg = 0.0 if self.smoothing == SMA else NAN
+        else:
+            prev_h, prev_l, prev_c = self.prev
+            tr = max(h - l, abs(h - prev_c), abs(l - prev_c))
+            tr_pos = tr if h > prev_h else 0.0
+            tr_neg = tr if l < prev_l else 0.0
+        self.prev = (h, l, c)
+        self.tr.update(tr)
+        self.tr_pos.update(tr_pos)
+        self.tr_neg.update(tr_neg)
+        atr = self.tr.mean()
+        pos_di = _div(self.tr_pos.mean(), atr) * 100
+        neg_di = _div(self.tr_neg.mean(), atr) * 100
+        self.dx.update(abs(_div(pos_di - neg_di, pos_di + neg_di)) * 100)
+        return {'ADX': self.dx.mean()}
+
+    def warm_up(self, df: pd.DataFrame):
+        if self.smoothing == SMA or df.shape[0] == 0:
+            return super().warm_up(df)
+        prev_h, prev_l, prev_c = df.mid_h.shift(1), df.mid_l.shift(1), df.mid_c.shift(1)
+        if self.prev is not None:
+            prev_h.iloc[0], prev_l.iloc[0], prev_c.iloc[0] = self.prev
+        tr = pd.Series(np.maximum.reduce([df.mid_h - df.mid_l, np.abs(df.mid_h - prev_c),
+                                          np.abs(df.mid_l - prev_c)]), index=df.index)
+        tr_pos = tr.where(df.mid_h > prev_h, 0).where(tr.notna())
+        tr_neg = tr.where(df.mid_l < prev_l, 0).where(tr.notna())
+        atr = pd.Series(self.tr.run(tr))
+        pos_di = (pd.Series(self.tr_pos.run(tr_pos)) / atr) * 100
+        neg_di = (pd.Series(self.tr_neg.run(tr_neg)) / atr) * 100
+        self.dx.run(np.abs((pos_di - neg_di) / (pos_di + neg_di)) * 100)
+        last = df.iloc[-1]
+        self.prev = (last.mid_h, last.mid_l, last.mid_c)
+        return {'ADX': self.dx.mean()}
+
+
+class StochasticOscillatorStream(StreamIndicator):
+
+    def __init__(self, n=14):
+        self.low = RollingExtreme(n, is_max=False)
+        self.high = RollingExtreme(n, is_max=True)
+        self.k = RollingSum(3)
+
+    def update(self, candle):
+        self.low.update(candle['mid_l'])
+        self.high.update(candle['mid_h'])
+        low_min = self.low.value()
+        k = _div(candle['mid_c'] - low_min, self.high.value() - low_min) * 100
+        self.k.update(k)
+        return {'%K': k, '%D': self.k.mean()}
+
+
+class MovingAverageStream(StreamIndicator):
+
+    def __init__(self, n=50):
+        self.column_name = f'MA_{n}'
+        self.ma = RollingSum(n)
+
+    def update(self, candle):
+        self.ma.update(candle['mid_c'])
+        return {self.column_name: self.ma.mean()}
+
+
+class ExponentialMovingAverageStream(StreamIndicator):
+
+    def __init__(self, n=50):
+        self.column_name = f'EMA_{n}'
+        self.ema = EWM(n, adjust=False)
+
+    def update(self, candle):
+        return {self.column_name: self.ema.update(candle['mid_c'])}
+
+
+class CommodityChannelIndexStream(StreamIndicator):
+
+    def __init__(self, n=20):
+        self.var = RollingVariance(n)
+
+    def update(self, candle):
+        tp = (candle['mid_h'] + candle['mid_l'] + candle['mid_c']) / 3
+        self.var.update(tp)
+        return {'CCI': _div(tp - self.var.mean(), 0.015 * self.var.std())}
+
+
+class MomentumStream(StreamIndicator):
+
+    def __init__(self, n=14):
+        self.closes = deque(maxlen=n + 1)
+
+    def shifted(self):
+        return self.closes[0] if len(self.closes) == self.closes.maxlen else NAN
+
+    def update(self, candle):
+        self.closes.append(candle['mid_c'])
+        return {'Momentum': candle['mid_c'] - self.shifted()}
+
+
+class RateOfChangeStream(MomentumStream):
+
+    def update(self, candle):
+        self.closes.append(candle['mid_c'])
+        prev = self.shifted()
+        return {'ROC': _div(candle['mid_c'] - prev, prev) * 100}
+
+
+class OnBalanceVolumeStream(StreamIndicator):
+
+    def __init__(self):
+        self.prev_c = None
+        self.obv = 0.0
+
+    def update(self, candle):
+        c = candle['mid_c']
+        if self.prev_c is not None:
+            delta = c - self.prev_c
+            self.obv += ((delta > 0) - (delta < 0)) * candle['volume']
+        self.prev_c = c
+        return {'OBV': self.obv}
+
+
+class ADLStream(StreamIndicator):
+
+    def __init__(self):
+        self.adl = 0.0
+
+    def update(self, candle):
+        h, l, c = candle['mid_h'], candle['mid_l'], candle['mid_c']
+        clv = _div((c - l) - (h - c), h - l)
+        if clv == clv:
+            self.adl += clv * candle['volume']
+        return {'ADL': self.adl}
+
+
+class AroonStream(StreamIndicator):
+
+    def __init__(self, n=14):
+        self.n = n
+        self.high = RollingExtreme(n, is_max=True)
+        self.low = RollingExtreme(n, is_max=False)
+
+    def update(self, candle):
+        self.high.update(candle['mid_h'])
+        self.low.update(candle['mid_l'])
+        return {
+            'Aroon_Up': float(self.high.position() + 1) / self.n * 100,
+            'Aroon_Down': float(self.low.position() + 1) / self.n * 100
+        }
+
+
+class AroonOscillatorStream(AroonStream):
+
+    def update(self, candle):
+        out = super().update(candle)
+        out['Aroon_Oscillator'] = out['Aroon_Up'] - out['Aroon_Down']
+        return out
+
+
+class CMFStream(StreamIndicator):
+
+    def __init__(self, n_cmf=20):
+        self.mf_volume = RollingSum(n_cmf)
+        self.volume = RollingSum(n_cmf)
+
+    def update(self, candle):
+        h, l, c = candle['mid_h'], candle['mid_l'], candle['mid_c']
+        mf_multiplier = _div(c - l - h + c, h - l)
+        self.mf_volume.update(mf_multiplier * candle['volume'])
+        self.volume.update(candle['volume'])
+        return {'CMF': _div(self.mf_volume.sum(), self.volume.sum())}
+
+
+class EVMStream(StreamIndicator):
+    # EVM() takes an n it does not use; there is no window to keep here
+
+    def __init__(self):
+        self.prev_mid = NAN
+
+    def update(self, candle):
+        h, l = candle['mid_h'], candle['mid_l']
+        mid = (h + l) / 2
+        dm = mid - self.prev_mid
+        self.prev_mid = mid
+        br = _div(candle['volume'] / 1e6, h - l)
+        return {'EVM': _div(dm, br)}
+
+
+class IchimokuCloudStream(StreamIndicator):
+    # Chikou_Span looks n2 candles ahead, so like the last rows of the batch
+    # version it is always NaN for the newest candle.
+
+    def __init__(self, n1=9, n2=26, n3=52):
+        self.extremes = [(RollingExtreme(n, True), RollingExtreme(n, False))
+                         for n in (n1, n2, n3)]
+        self.span_a = deque(maxlen=n3 + 1)
+        self.span_b = deque(maxlen=n3 + 1)
+
+    def midpoint(self, i, candle):
+        high, low = self.extremes[i]
+        high.update(candle['mid_h'])
+        low.update(candle['mid_l'])
+        return (high.value() + low.value()) / 2
+
+    def update(self, candle):
+        tenkan = self.midpoint(0, candle)
+        kijun = self.midpoint(1, candle)
+        self.span_a.append((tenkan + kijun) / 2)
+        self.span_b.append(self.midpoint(2, candle))
+        full = len(self.span_a) == self.span_a.maxlen
+        return {
+            'Tenkan_sen': tenkan,
+            'Kijun_sen': kijun,
+            'Senkou_Span_A': self.span_a[0] if full else NAN,
+            'Senkou_Span_B': self.span_b[0] if full else NAN,
+            'Chikou_Span': NAN
+        }
+
+
+class PatternStream(StreamIndicator):
+    # Bitmask of technicals/patterns.py for each candle, same as
+    # pattern_masks(). Patterns look back two candles, so only the
+    # properties of the last two are kept.
+
+    PROPS = ['direction', 'body_size', 'body_percentage', 'mid_o', 'mid_c', 'mid_point',
+             'mid_h', 'mid_l']
+
+    def __init__(self, config: PatternConfig = None):
+        self.config = config
+        self.prev = deque([dict.fromkeys(PatternStream.PROPS, NAN)] * 2, maxlen=2)
+        self.mask = 0
+
+    def candle_props(self, candle):
+        o, h, l, c = candle['mid_o'], candle['mid_h'], candle['mid_l'], candle['mid_c']
+        p1 = self.prev[-1]
+        direction = c - o
+        body_size = abs(direction)
+        full_range = h - l
+        body_upper = max(c, o)
+        return dict(
+            mid_o=o,
+            mid_h=h,
+            mid_l=l,
+            mid_c=c,
+            direction=1.0 if direction >= 0 else -1.0,
+            body_size=body_size,
+            body_percentage=_div(body_size, full_range) * 100,
+            body_bottom_percentage=_div(min(c, o) - l, full_range) * 100,
+            body_top_percentage=100 - (_div(h - body_upper, full_range) * 100),
+            mid_point=full_range / 2 + l,
+            low_change=(_div(l, p1['mid_l']) - 1) * 100,
+            high_change=(_div(h, p1['mid_h']) - 1) * 100,
+            body_size_change=(_div(body_size, p1['body_size']) - 1) * 100,
+            close_change=_div(c, p1['mid_c']) - 1
+        )
+
+    def update(self, candle):
+        props = self.candle_props(candle)
+        self.mask = 0
+        for name, matched in evaluate_patterns(props, self.prev[-1], self.prev[-2],
+                                               self.config).items():
+            if matched:
+                self.mask |= int(PATTERN_BITS[name])
+        self.prev.append(props)
+        return {'PATTERNS': self.mask}
+
+    def warm_up(self, df: pd.DataFrame):
+        # only the last three candles can affect the state
+        return super().warm_up(df.tail(3))
+
+
+class IndicatorStreams(StreamIndicator):
+
+    def __init__(self, streams):
+        self.streams = list(streams)
+
+    def update(self, candle):
+        out = {}
+        for s in self.streams:
+            out.update(s.update(candle))
+        return out
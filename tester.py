@@ -1,8 +1,9 @@
 import pandas as pd
+from infrastructure.candle_data import load_candles
 
 from timeit import default_timer as timer
 
-df = pd.read_csv("./data/candles/GBP_JPY_M5.csv")
+df = load_candles("GBP_JPY", "M5")
 
 print(f"Total Rows:{df.shape[0]}")
 